@@ -1,113 +1,54 @@
+import argparse
 import asyncio
-import sys
+import json
 import os
-from typing import List
+import sys
+import time
 from dotenv import load_dotenv
 
 # Ensure the current directory is in sys.path to handle imports correctly
 sys.path.append(os.getcwd())
 load_dotenv(os.path.join("small_agent", ".env"), override=True)
 
-import small_agent.agent as agent
-from config.loader import get_config
-from google.adk.runners import Runner
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
-from google.genai import types
-
-async def run_scenario(name: str, user_inputs: List[str]):
-    print(f"\n{'-'*20} Scenario: {name} {'-'*20}")
-    
-    session_service = InMemorySessionService()
-    # Create a unique session ID for this scenario
-    session_id = f"session_{name.replace(' ', '_').lower()}"
-    session = await session_service.create_session(
-        app_name="eval_script", user_id="test_user", session_id=session_id
-    )
-    
-    runner = Runner(
-        agent=agent.root_agent,
-        app_name="eval_script",
-        session_service=session_service,
-    )
-
-    escalated = False
-
-    model_responses = []
-
-    for user_input in user_inputs:
-        print(f"\nUser: {user_input}")
-        
-        async for event in runner.run_async(
-            session_id=session.id, 
-            user_id="test_user", 
-            new_message=types.Content(role="user", parts=[types.Part(text=user_input)])
-        ):
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    if part.text:
-                        text = part.text.strip()
-                        # Print only the text part of the response
-                        print(f"Agent: {text}")
-                        model_responses.append(text)
-                    
-                    if part.function_call:
-                        print(f"[Tool Call]: {part.function_call.name}")
-                        if part.function_call.name == "escalate_conversation":
-                            escalated = True
-                            
-    # Quality Checks
-    print("\n--- Evaluation Results ---")
-    
-    # Check 1: Escalation
-    if escalated:
-        print("[PASS] Escalation triggered.")
-    else:
-        # Note: Depending on the scenario, this might be a fail or pass. 
-        # But for our test cases, we expect escalation at the end.
-        print("[FAIL] Escalation did NOT trigger.")
-
-    # Check 2: Fields (Read directly from agent state)
-    if session.id in agent.session_states:
-        state = agent.session_states[session.id]
-        print(f"State Status: {state.status}")
-        print(f"Collected Fields: {state.collected_fields}")
-        
-        config = get_config()
-        required = [f.name for f in config.fields if f.required]
-        missing = [f for f in required if f not in state.collected_fields]
-        
-        if not missing:
-             print("[PASS] All required fields collected.")
-        else:
-             print(f"[INFO] Missing fields: {missing}")
-    else:
-        print("[WARN] No state found for session.")
-
-    # Check 3: Language/Tone (Basic Keyword Check)
-    # We check the logs for common persona words
-    # This is a heuristic.
-    persona_keywords = ["Hola", "soy", "gracias", "gusto"]
-    found_keywords = [kw for kw in persona_keywords if any(kw.lower() in resp.lower() for resp in model_responses)]
-    
-    if found_keywords:
-        print(f"[PASS] Persona keywords found: {set(found_keywords)} (Indicates correct language/tone)")
-    else:
-        print("[WARN] No persona keywords found. Check language settings.")
+from config.loader import get_snapshot, load_config
+from small_agent.evaluation import ResultWriter, load_scenarios, run_scenarios, summarize
 
 async def main():
-    # Scenario 1: Happy Path - User provides all info
-    await run_scenario("Happy Path", [
-        "Hola",
-        "Juan Perez",
-        "555-1234",
-        "juan@example.com"
-    ])
-
-    # Scenario 2: Escalation Trigger - User says 'urgent' or 'refund request'
-    await run_scenario("Escalation Trigger", [
-        "Hola", 
-        "Tengo un refund request urgente"
-    ])
+    parser = argparse.ArgumentParser(description="Run evaluation scenarios against the agent concurrently.")
+    parser.add_argument("scenarios", nargs="?", default="evals/scenarios.yaml", help="YAML or JSONL scenario file")
+    parser.add_argument("--config", help="config file (default: config/base_config.yaml)")
+    parser.add_argument("--concurrency", type=int, default=8, help="scenarios run at once")
+    parser.add_argument("--timeout", type=float, default=300, help="per-scenario timeout in seconds")
+    parser.add_argument("--output", default="results/eval_results.jsonl", help="per-scenario results (JSON lines)")
+    parser.add_argument("--summary", default="results/eval_summary.json", help="aggregate summary (JSON)")
+    args = parser.parse_args()
+
+    if args.config:
+        load_config(args.config)
+    scenarios = load_scenarios(args.scenarios)
+    print(f"Running {len(scenarios)} scenarios ({args.concurrency} at a time)...")
+
+    def report(result):
+        writer(result)
+        verdict = "PASS" if result.passed else "FAIL"
+        detail = result.error or ", ".join(f"{name}={'ok' if ok else 'failed'}" for name, ok in result.checks.items())
+        print(f"[{verdict}] {result.name} ({result.latency_seconds:.1f}s, {result.model_calls} model calls) {detail}")
+
+    started = time.perf_counter()
+    with ResultWriter(args.output) as writer:
+        results = await run_scenarios(
+            scenarios, get_snapshot, concurrency=args.concurrency, timeout=args.timeout, on_result=report
+        )
+    summary = summarize(results, elapsed_seconds=time.perf_counter() - started)
+
+    if os.path.dirname(args.summary):
+        os.makedirs(os.path.dirname(args.summary), exist_ok=True)
+    with open(args.summary, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print("\n--- Evaluation Summary ---")
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["passed"] == summary["scenarios"] else 1
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
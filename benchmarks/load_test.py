@@ -0,0 +1,204 @@
+"""
+End-to-end load test for the intake API.
+
+Runs ``small_agent.api:app`` in-process (ASGI, no network) on the offline
+scripted model and drives simulated conversations through create, message,
+history and state calls. Prints (or writes) a JSON report with throughput,
+per-endpoint latency percentiles, event-loop lag and RSS growth, so runs can
+be compared between commits.
+
+    python benchmarks/load_test.py --conversations 2000 --concurrency 100 \\
+        --latency 0.05 --output results/load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import yaml
+
+# Ensure the project root is importable when run as a script
+sys.path.append(os.getcwd())
+
+from config.loader import DEFAULT_CONFIG_PATH, load_config, read_config
+
+MESSAGES = [
+    "Hola, me llamo Ana Pérez",
+    "Mi correo es ana{n}@example.com",
+    "Mi teléfono es +54 11 4444 {n:04d}",
+    "Gracias, eso es todo",
+]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile; 0 for an empty sample."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean_ms": 1000 * sum(samples) / len(samples) if samples else 0.0,
+        "p50_ms": 1000 * percentile(samples, 50),
+        "p95_ms": 1000 * percentile(samples, 95),
+        "p99_ms": 1000 * percentile(samples, 99),
+        "max_ms": 1000 * max(samples, default=0.0),
+    }
+
+
+def rss_bytes() -> int:
+    """Current resident set size (falls back to the peak where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def install_offline_config(latency: float) -> None:
+    """Installs the base config switched to the offline scripted model."""
+    data = read_config(DEFAULT_CONFIG_PATH).model_dump(mode="json")
+    data["llm"]["provider"] = "offline"
+    data["llm"]["offline"].update(mode="scripted", latency_seconds=latency)
+    data["reload"]["enabled"] = False
+    # The config is parsed here and never re-read (reload is disabled), so the file can go
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "load_test.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(data, f, allow_unicode=True)
+        load_config(path)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    async def call(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started)
+        codes = self.statuses.setdefault(endpoint, {})
+        codes[str(response.status_code)] = codes.get(str(response.status_code), 0) + 1
+        return response
+
+
+async def conversation(client: httpx.AsyncClient, recorder: Recorder, n: int, messages: int) -> bool:
+    response = await recorder.call(client, "create", "POST", "/conversations/", json={"greet": True})
+    if response.status_code != 200:
+        return False
+    cid = response.json()["conversation_id"]
+    for text in MESSAGES[:messages]:
+        await recorder.call(
+            client, "message", "POST", f"/conversations/{cid}/messages/", json={"text": text.format(n=n)}
+        )
+    await recorder.call(client, "history", "GET", f"/conversations/{cid}/messages/")
+    await recorder.call(client, "state", "GET", f"/conversations/{cid}", params={"include_messages": "false"})
+    return True
+
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    """Measures how late the event loop wakes a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    install_offline_config(args.latency)
+    from small_agent.api import app
+
+    recorder = Recorder()
+    lag: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(n: int) -> bool:
+        async with semaphore:
+            return await conversation(client, recorder, n, args.messages)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            # Warm up imports and caches so they don't count as growth
+            await conversation(client, recorder, 0, 1)
+            recorder.latencies.clear()
+            recorder.statuses.clear()
+
+            rss_before = rss_bytes()
+            stop = asyncio.Event()
+            lag_task = asyncio.create_task(monitor_loop_lag(lag, stop))
+            started = time.perf_counter()
+            completed = await asyncio.gather(*(bounded(n) for n in range(1, args.conversations + 1)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await lag_task
+            rss_after = rss_bytes()
+
+    requests = sum(len(v) for v in recorder.latencies.values())
+    return {
+        "commit": git_commit(),
+        "params": vars(args),
+        "elapsed_seconds": elapsed,
+        "conversations_completed": sum(completed),
+        "throughput": {
+            "requests_per_second": requests / elapsed,
+            "conversations_per_second": sum(completed) / elapsed,
+        },
+        "endpoints": {
+            name: {**summarize(samples), "status_codes": recorder.statuses.get(name, {})}
+            for name, samples in recorder.latencies.items()
+        },
+        "event_loop_lag": summarize(lag),
+        "memory": {
+            "rss_before_bytes": rss_before,
+            "rss_after_bytes": rss_after,
+            "rss_growth_per_conversation_bytes": (rss_after - rss_before) / max(args.conversations, 1),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50, help="conversations in flight at once")
+    parser.add_argument("--messages", type=int, default=3, help=f"messages per conversation (max {len(MESSAGES)})")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated model latency in seconds")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered + "\n")
+    else:
+        print(rendered)
+
+
+if __name__ == "__main__":
+    main()
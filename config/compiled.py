@@ -0,0 +1,119 @@
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Mapping, Pattern, Tuple
+
+from .models import BaseConfig
+
+_LEADING_ANCHORS = ("^", r"\A")
+_TRAILING_ANCHORS = ("$", r"\Z")
+
+
+def searchable_pattern(validation_regex: str) -> Pattern[str]:
+    """
+    Turns a full-value validation regex into one that finds the value inside
+    free text: anchors are dropped and replaced by word boundaries.
+    """
+    pattern = validation_regex
+    for anchor in _LEADING_ANCHORS:
+        if pattern.startswith(anchor):
+            pattern = pattern[len(anchor):]
+            break
+    for anchor in _TRAILING_ANCHORS:
+        if pattern.endswith(anchor) and not pattern.endswith("\\" + anchor):
+            pattern = pattern[: -len(anchor)]
+            break
+    return re.compile(rf"(?<![\w@.+-])(?:{pattern})(?![\w@-])")
+
+
+def render_greeting(config: BaseConfig) -> str:
+    persona = config.persona
+    return persona.greeting_template.format(name=persona.name, title=persona.title)
+
+
+def render_instruction(config: BaseConfig) -> str:
+    """Renders the agent instruction for a config."""
+    persona = config.persona
+    field_desc = "\n    ".join([f"- {f.name}: {f.description}" for f in config.fields])
+    escalation_triggers = ", ".join(config.escalation.triggers)
+    if config.escalation.enabled:
+        on_complete = "Call 'escalate_conversation' immediately."
+    else:
+        on_complete = "Thank the user and tell them their details are complete; do not escalate."
+    return f"""
+    You are {persona.name}, {persona.title} at {persona.company_name}.
+    Personality: {persona.personality}
+
+    Your goal is to collect the following user information:
+    {field_desc}
+
+    Rules:
+    1. Only ask for ONE missing field at a time.
+    2. Call the 'collect_field' tool when the user provides a field value.
+    3. The conversation state at the end of these instructions (and the 'collect_field' result) tells you which fields are still missing. Ask for the next one in the same reply.
+    4. If the 'collect_field' tool returns 'is_complete': True, {on_complete}
+    5. If the user mentions an escalation trigger (e.g. {escalation_triggers}), call 'escalate_conversation' immediately.
+    6. Main Greeting to use at start: "{render_greeting(config)}"
+    7. Start small talk if the user asks unrelated questions, then pivot back to collection.
+    8. Do not make up info.
+    """
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledConfig:
+    """
+    Immutable snapshot of a config with everything the hot path needs
+    precomputed once per load. Field names are lower-cased.
+    """
+
+    version: int
+    config: BaseConfig
+    required_fields: FrozenSet[str]
+    required_order: Tuple[str, ...]
+    search_patterns: Mapping[str, Pattern[str]]
+    capture_cues: Mapping[str, Pattern[str]]
+    greeting: str
+    instruction: str
+
+    def missing_fields(self, collected_fields: Mapping[str, str]) -> list:
+        """Required fields not yet collected, in config order."""
+        return [f for f in self.required_order if not collected_fields.get(f)]
+
+    def render_progress(self, collected_fields: Mapping[str, str], status: str) -> str:
+        """Per-turn block telling the model what is known and what to ask next."""
+        collected = ", ".join(f"{name}={value}" for name, value in collected_fields.items()) or "none"
+        missing = self.missing_fields(collected_fields)
+        lines = [
+            "",
+            "    Current conversation state:",
+            f"    - Status: {status}",
+            f"    - Collected: {collected}",
+            f"    - Still missing: {', '.join(missing) or 'none'}",
+        ]
+        if status == "COMPLETED":
+            lines.append("    All required fields are collected and the intake is complete; do not ask for more fields.")
+        elif status != "COLLECTING":
+            lines.append("    The conversation was handed off; do not ask for more fields.")
+        elif missing:
+            lines.append(f"    Next field to ask for: {missing[0]}. Ask for it in this reply.")
+        elif self.config.escalation.enabled:
+            lines.append("    All required fields are collected; call 'escalate_conversation' now.")
+        else:
+            lines.append("    All required fields are collected; tell the user their details are complete.")
+        return "\n".join(lines) + "\n"
+
+
+def compile_config(config: BaseConfig, version: int = 0) -> CompiledConfig:
+    """Builds a CompiledConfig snapshot from a parsed config."""
+    required_order = tuple(f.name.lower() for f in config.fields if f.required)
+    regex_fields = [(f.name.lower(), f.validation_regex) for f in config.fields if f.validation_regex]
+    return CompiledConfig(
+        version=version,
+        config=config,
+        required_fields=frozenset(required_order),
+        required_order=required_order,
+        search_patterns=MappingProxyType({name: searchable_pattern(regex) for name, regex in regex_fields}),
+        capture_cues=MappingProxyType({f.name.lower(): re.compile(f.capture_cue) for f in config.fields if f.capture_cue}),
+        greeting=render_greeting(config),
+        instruction=render_instruction(config),
+    )
@@ -14,18 +14,111 @@ class FieldConfig(BaseModel):
     description: str
     required: bool = True
     validation_regex: Optional[str] = None
+    # Regex the message must also match before the fast path captures this field
+    # (e.g. "tel" for phone, so order numbers and amounts are left to the model)
+    capture_cue: Optional[str] = None
 
 class EscalationConfig(BaseModel):
     enabled: bool = True
     triggers: List[str] = Field(default_factory=list)
 
+class ScriptRule(BaseModel):
+    on: str = "user"  # "user": match the user's text; "tool": match the tool name after a tool result
+    match: str = ".*"  # regex; groups can be used as {0}, {1}, {name} in reply/args
+    reply: Optional[str] = None
+    call: Optional[str] = None  # name of the tool to call
+    args: Dict[str, str] = Field(default_factory=dict)
+
+class OfflineLLMConfig(BaseModel):
+    mode: str = "scripted"  # "record", "replay" or "scripted"
+    cassette: str = "data/cassettes/llm.jsonl"
+    latency_seconds: float = 0.0  # simulated per-call latency (replay / scripted)
+    default_reply: str = "Thanks! Could you tell me a bit more?"
+    rules: List[ScriptRule] = Field(default_factory=list)
+
 class LLMConfig(BaseModel):
-    provider: str = "gemini"
+    provider: str = "gemini"  # "gemini" or "offline"
     model: str = "gemini-2.5-flash"
     temperature: float = 0.1
+    # Stops runaway tool loops: model calls allowed per user turn (None: no cap)
+    max_model_calls_per_turn: Optional[int] = 8
+    model_call_cap_reply: str = "Dame un momento, por favor. Un agente revisará tu caso."
+    offline: OfflineLLMConfig = Field(default_factory=OfflineLLMConfig)
+
+class StorageConfig(BaseModel):
+    backend: str = "memory"  # "memory" or "sqlite"
+    path: str = "data/conversations.db"
+    flush_interval_seconds: float = 0.5
+    flush_batch_size: int = 100
+
+class SessionLimitsConfig(BaseModel):
+    max_conversations: int = 10000  # resident conversations before LRU eviction
+    idle_ttl_seconds: float = 3600
+    terminal_ttl_seconds: float = 300  # ESCALATED / COMPLETED conversations
+    sweep_interval_seconds: float = 30
+
+class ReloadConfig(BaseModel):
+    enabled: bool = True
+    interval_seconds: float = 2.0
+
+class TenantsConfig(BaseModel):
+    directory: str = "config/tenants"  # one {tenant_id}.yaml per tenant
+    max_cached: int = 32  # built agents kept in memory (LRU)
+
+class AdmissionConfig(BaseModel):
+    max_concurrent_turns: int = 16  # agent turns running against the LLM at once
+    max_queue: int = 256
+    max_wait_seconds: float = 10.0
+    max_queued_per_flow: int = 64  # per tenant / API key
+    weights: Dict[str, float] = Field(default_factory=dict)  # flow -> share (default 1)
+
+class BatchConfig(BaseModel):
+    max_items: int = 500
+    max_parallel: int = 32  # conversations processed at once per batch request
+
+class CompactionConfig(BaseModel):
+    enabled: bool = True
+    max_turns: int = 20  # user turns in the model context before compacting
+    max_tokens: int = 8000  # estimated prompt tokens (chars / 4) before compacting
+    keep_recent_turns: int = 4  # most recent user turns kept verbatim
+
+class TelemetryConfig(BaseModel):
+    enabled: bool = False
+    exporter: str = "console"  # "console", "file", "otlp" or "cloud_trace"
+    file_path: str = "data/telemetry.jsonl"  # spans; metrics go to data/telemetry.metrics.jsonl
+    otlp_endpoint: Optional[str] = None  # e.g. http://localhost:4318; default from OTEL_EXPORTER_OTLP_ENDPOINT
+    service_name: str = "intake-agent"
+    metrics_interval_seconds: float = 60
+
+class OutboxConfig(BaseModel):
+    enabled: bool = False
+    sink_url: Optional[str] = None  # tickets are POSTed here in batches
+    headers: Dict[str, str] = Field(default_factory=dict)  # e.g. Authorization
+    path: str = "data/outbox.db"
+    batch_size: int = 50
+    flush_interval_seconds: float = 1.0
+    timeout_seconds: float = 10.0
+    max_attempts: int = 8
+    backoff_base_seconds: float = 1.0
+    backoff_max_seconds: float = 300.0
+
+class ChangeFeedConfig(BaseModel):
+    capacity: int = 10000  # events kept in memory; older ones are overwritten
+    max_wait_seconds: float = 30.0  # longest long-poll on GET /changes
+    heartbeat_seconds: float = 15.0  # keep-alive comment interval on the SSE stream
 
 class BaseConfig(BaseModel):
     persona: AgentPersona = Field(default_factory=AgentPersona)
     fields: List[FieldConfig] = Field(default_factory=list)
     escalation: EscalationConfig = Field(default_factory=EscalationConfig)
     llm: LLMConfig = Field(default_factory=LLMConfig)
+    storage: StorageConfig = Field(default_factory=StorageConfig)
+    sessions: SessionLimitsConfig = Field(default_factory=SessionLimitsConfig)
+    reload: ReloadConfig = Field(default_factory=ReloadConfig)
+    tenants: TenantsConfig = Field(default_factory=TenantsConfig)
+    admission: AdmissionConfig = Field(default_factory=AdmissionConfig)
+    batch: BatchConfig = Field(default_factory=BatchConfig)
+    compaction: CompactionConfig = Field(default_factory=CompactionConfig)
+    telemetry: TelemetryConfig = Field(default_factory=TelemetryConfig)
+    outbox: OutboxConfig = Field(default_factory=OutboxConfig)
+    changes: ChangeFeedConfig = Field(default_factory=ChangeFeedConfig)
@@ -1 +1,10 @@
-from . import agent
+import importlib
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    # Import the agent module (and the ADK stack) only when it is first used,
+    # e.g. by the ADK CLI looking up ``small_agent.agent.root_agent``.
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,34 +1,108 @@
-from typing import Any, Dict
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, Optional
 
 from google.adk import Agent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
 from google.adk.tools.long_running_tool import LongRunningFunctionTool
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
 
 try:
+    from .extraction import FieldExtractor
     from .state import AgentState
+    from .store import ConversationStore, create_store
     from .tools import AgentTools
+    from .triggers import TriggerMatcher
 except ImportError:
+    from extraction import FieldExtractor
     from state import AgentState
+    from store import ConversationStore, create_store
     from tools import AgentTools
+    from triggers import TriggerMatcher
+
+from .llm_client import LLMClient, create_llm_client
+from .metrics import metrics
+from config.compiled import CompiledConfig
+from config.loader import get_config, get_snapshot
+
+# Persona, fields and triggers are read from the current snapshot on each
+# turn so they can be hot-reloaded; storage and LLM settings are fixed at startup.
+# The module-level services below (project_config, session_states, llm_client,
+# root_agent) are built on first access, not at import (see __getattr__).
+
+# Marks the canned reply returned when a turn hits llm.max_model_calls_per_turn
+MODEL_CALL_CAP_KEY = "model_call_cap"
+
+
+@lru_cache(maxsize=256)
+def field_extractor_for(snapshot: CompiledConfig) -> FieldExtractor:
+    """Regex fast path for well-formed fields (see extraction.py)."""
+    return FieldExtractor.from_snapshot(snapshot)
+
+
+@lru_cache(maxsize=256)
+def trigger_matcher_for(snapshot: CompiledConfig) -> TriggerMatcher:
+    """Deterministic escalation trigger matcher (see triggers.py)."""
+    escalation = snapshot.config.escalation
+    return TriggerMatcher(escalation.triggers if escalation.enabled else [])
+
+
+def state_instruction(snapshot: CompiledConfig, state: AgentState) -> str:
+    """
+    The snapshot's instruction plus the live progress block for ``state``.
+
+    Rendered once per (state revision, snapshot); the model calls within a
+    turn reuse it. The progress block goes last so the static prefix stays
+    identical across turns.
+    """
+    cached = state._instruction_cache
+    if cached is not None and cached[0] == state.revision and cached[1] is snapshot:
+        return cached[2]
+    text = snapshot.instruction + snapshot.render_progress(state.collected_fields, state.status.value)
+    state._instruction_cache = (state.revision, snapshot, text)
+    return text
+
+
+@contextmanager
+def pinned_snapshot(state: AgentState, snapshot: CompiledConfig) -> Iterator[None]:
+    """
+    Pins ``state``'s turn to ``snapshot``: the agent's tools, instruction and
+    model call cap use it even if a reload swaps the config mid-turn.
+    """
+    state._turn_snapshot = snapshot
+    try:
+        yield
+    finally:
+        state._turn_snapshot = None
+
 
-from .llm_client import GeminiADKClient
-from config.loader import get_config
+_session_states: Optional[ConversationStore] = None
+_llm_client: Optional[LLMClient] = None
+_root_agent: Optional[Agent] = None
 
-# Load configuration
-# Load configuration
-project_config = get_config()
-persona = project_config.persona
-required_names = ", ".join([f.name for f in project_config.fields if f.required])
-field_desc = "\n    ".join([f"- {f.name}: {f.description}" for f in project_config.fields])
-escalation_triggers = ", ".join(project_config.escalation.triggers)
 
-# In-memory store for agent state per session
-session_states: Dict[str, AgentState] = {}
+def get_session_states() -> ConversationStore:
+    """Conversation store for agent state per session (dict-like, see store.py)."""
+    global _session_states
+    if _session_states is None:
+        config = get_config()
+        _session_states = create_store(config.storage, config.sessions)
+    return _session_states
 
 
-def _get_tools(tool_context: ToolContext) -> AgentTools:
+def _get_tools(
+    tool_context: ToolContext,
+    config: Optional[CompiledConfig] = None,
+    states: Optional[ConversationStore] = None,
+) -> AgentTools:
     """Retrieves or creates the AgentTools instance for the current session."""
+    if states is None:
+        states = get_session_states()
     try:
         session_id = tool_context.session.id
     except AttributeError:
@@ -36,48 +110,110 @@ def _get_tools(tool_context: ToolContext) -> AgentTools:
         # But assuming session.id exists based on typical ADK structure
         session_id = str(tool_context.session)
 
-    if session_id not in session_states:
-        session_states[session_id] = AgentState(conversation_id=session_id)
-    return AgentTools(session_states[session_id])
-
-
-def collect_field(name: str, value: str, tool_context: ToolContext) -> Dict[str, Any]:
-  """Collects a specific piece of user information."""
-  tools = _get_tools(tool_context)
-  return tools.collect_field(name, value)
-
-
-def escalate_conversation(
-    reason: str, summary: str, tool_context: ToolContext
-) -> Dict[str, Any]:
-  """Escalates the conversation to a human agent."""
-  tools = _get_tools(tool_context)
-  return tools.escalate_conversation(reason, summary, tool_context)
-
-
-
-# LLM Client initialization
-llm_client = GeminiADKClient(model_name=project_config.llm.model)
-
-root_agent = llm_client.create_agent(
-    name='customer_support_agent',
-    instruction=f"""
-    You are {persona.name}, {persona.title} at {persona.company_name}.
-    Personality: {persona.personality}
-    
-    Your goal is to collect the following user information:
-    {field_desc}
-    
-    Rules:
-    1. Only ask for ONE missing field at a time.
-    2. Call the 'collect_field' tool when the user provides a field value.
-    3. The 'collect_field' tool will tell you which fields are still missing. Use that info to decide what to ask next.
-    4. If the 'collect_field' tool returns 'is_complete': True, Call 'escalate_conversation' immediately.
-    5. If the user mentions an escalation trigger (e.g. {escalation_triggers}), call 'escalate_conversation' immediately.
-    6. Main Greeting to use at start: "{persona.greeting_template.format(name=persona.name, title=persona.title)}"
-    7. Start small talk if the user asks unrelated questions, then pivot back to collection.
-    8. Do not make up info.
-    """,
-    tools=[collect_field, LongRunningFunctionTool(func=escalate_conversation)],
-    config=types.GenerateContentConfig(temperature=project_config.llm.temperature),
-)
+    if session_id not in states:
+        states[session_id] = AgentState(conversation_id=session_id)
+    state = states[session_id]
+    return AgentTools(state, state._turn_snapshot or config)
+
+
+def build_agent(
+    config_provider: Callable[[], CompiledConfig] = get_snapshot,
+    llm_client: Optional[LLMClient] = None,
+    agent_name: str = 'customer_support_agent',
+    states: Optional[ConversationStore] = None,
+) -> Agent:
+  """
+  Builds an intake agent whose instruction and tools read the config
+  returned by ``config_provider`` (so it can be swapped), except during a
+  turn pinned with ``pinned_snapshot``, which uses that turn's snapshot.
+  Conversation state lives in ``states`` (the shared ``session_states``
+  by default; evals pass their own store to stay isolated).
+  """
+  if states is None:
+    states = get_session_states()
+
+  def collect_field(name: str, value: str, tool_context: ToolContext) -> Dict[str, Any]:
+    """Collects a specific piece of user information."""
+    tools = _get_tools(tool_context, config_provider(), states)
+    return tools.collect_field(name, value)
+
+  def escalate_conversation(
+      reason: str, summary: str, tool_context: ToolContext
+  ) -> Dict[str, Any]:
+    """Escalates the conversation to a human agent."""
+    tools = _get_tools(tool_context, config_provider(), states)
+    return tools.escalate_conversation(reason, summary, tool_context)
+
+  def snapshot_for(state: Optional[AgentState]) -> CompiledConfig:
+    """The snapshot pinned for the turn in progress, else the current one."""
+    pinned = state._turn_snapshot if state is not None else None
+    return pinned or config_provider()
+
+  def instruction(context: ReadonlyContext) -> str:
+    """Serves the snapshot's instruction with the conversation's current progress."""
+    state = states.get(context.session.id)
+    if state is None:
+      return config_provider().instruction
+    return state_instruction(snapshot_for(state), state)
+
+  # Model calls made so far per invocation (one invocation = one user turn)
+  model_calls: "OrderedDict[str, int]" = OrderedDict()
+
+  def cap_model_calls(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """Ends the turn with a fixed reply once it hits the model call cap."""
+    llm = snapshot_for(states.get(callback_context.session.id)).config.llm
+    if llm.max_model_calls_per_turn is None:
+      return None
+    invocation_id = callback_context.invocation_id
+    calls = model_calls.pop(invocation_id, 0) + 1
+    model_calls[invocation_id] = calls
+    while len(model_calls) > 1024:
+      model_calls.popitem(last=False)
+    if calls <= llm.max_model_calls_per_turn:
+      return None
+    metrics.inc("model_call_cap_reached_total")
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part(text=llm.model_call_cap_reply)]),
+        custom_metadata={MODEL_CALL_CAP_KEY: True},
+    )
+
+  config = config_provider().config
+  client = llm_client or create_llm_client(config.llm)
+  return client.create_agent(
+      name=agent_name,
+      instruction=instruction,
+      tools=[collect_field, LongRunningFunctionTool(func=escalate_conversation)],
+      config=types.GenerateContentConfig(temperature=config.llm.temperature),
+      before_model_callback=cap_model_calls,
+  )
+
+
+def get_llm_client() -> LLMClient:
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = create_llm_client(get_config().llm)
+    return _llm_client
+
+
+def get_root_agent() -> Agent:
+    """The default tenant's agent, built on first use."""
+    global _root_agent
+    if _root_agent is None:
+        _root_agent = build_agent(get_snapshot, get_llm_client())
+    return _root_agent
+
+
+_LAZY = {
+    "project_config": get_config,
+    "session_states": get_session_states,
+    "llm_client": get_llm_client,
+    "root_agent": get_root_agent,
+}
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps ``agent.root_agent`` (ADK CLI) and ``from .agent import session_states`` working
+    factory = _LAZY.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
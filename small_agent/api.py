@@ -1,26 +1,46 @@
 
 import asyncio
+import hashlib
+import json
 import os
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional
-from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Set
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, BackgroundTasks, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from google.adk.runners import Runner
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
-from google.genai import types
 from dotenv import load_dotenv
-import os
 
-load_dotenv(os.path.join(os.path.dirname(__file__), ".env"), override=True)
+from .registry import DEFAULT_TENANT, AgentRegistry, TenantRuntime
+from config.loader import ConfigWatcher, DEFAULT_CONFIG_PATH, get_config, get_snapshot, load_config
+from .changefeed import ChangeEvent, ChangeFeed
+from .extraction import capture_note
+from .triggers import handoff_note
+from .metrics import metrics
+from .outbox import EscalationOutbox
+from .state import AgentState, ConversationStatus, Ticket, TurnUsage
+from .scheduler import AdmissionController, AdmissionRejected
+from .startup import StartupTimer
+from .tools import AgentTools, add_change_listener, add_escalation_listener, remove_escalation_listener
+from .telemetry import TracingMiddleware, flow_digest, model_calls_per_turn, setup_telemetry, shutdown_telemetry, span, turn_duration
+from .turns import IdempotencyKeyReused, TurnCoordinator
 
-from .agent import root_agent, session_states
-from .state import AgentState, ConversationStatus
+if TYPE_CHECKING:
+    from google.genai import types
 
 # Models
+class CreateConversationRequest(BaseModel):
+    tenant_id: Optional[str] = None
+    # Return the persona greeting immediately instead of waiting for a model turn
+    greet: bool = False
+
 class CreateConversationResponse(BaseModel):
     conversation_id: str
+    tenant_id: str = DEFAULT_TENANT
+    greeting: Optional[str] = None
 
 class MessageRequest(BaseModel):
     text: str
@@ -29,43 +49,230 @@ class MessageResponse(BaseModel):
     role: str
     text: str
 
+class BatchMessageItem(BaseModel):
+    conversation_id: str
+    text: str
+    idempotency_key: Optional[str] = None
+
+class BatchMessageRequest(BaseModel):
+    messages: List[BatchMessageItem]
+
+class BatchMessageResult(BaseModel):
+    index: int
+    conversation_id: str
+    status_code: int
+    responses: List[MessageResponse] = []
+    error: Optional[str] = None
+
+class BatchMessageResponse(BaseModel):
+    results: List[BatchMessageResult]
+
+class ToolResolutionItem(BaseModel):
+    conversation_id: str
+    call_id: str  # id of the pending long-running function call
+    response: Dict[str, Any] = {}  # sent to the model as the tool's final result
+
+class ToolResolutionRequest(BaseModel):
+    resolutions: List[ToolResolutionItem]
+
+class ToolResolutionResult(BaseModel):
+    index: int
+    conversation_id: str
+    call_id: str
+    status_code: int
+    error: Optional[str] = None
+
+class ToolResolutionResponse(BaseModel):
+    results: List[ToolResolutionResult]
+    # Agent replies per resumed conversation
+    responses: Dict[str, List[MessageResponse]] = {}
+
+class ChangeFeedResponse(BaseModel):
+    events: List[ChangeEvent]
+    # Pass as ``cursor`` on the next poll
+    next_cursor: int
+    # Events after the cursor were overwritten (or the server restarted)
+    truncated: bool = False
+
+class ConversationSummary(BaseModel):
+    conversation_id: str
+    tenant_id: Optional[str] = None
+    status: ConversationStatus
+    collected_fields: Dict[str, str]
+    updated_at: float
+
+class ConversationListResponse(BaseModel):
+    conversations: List[ConversationSummary]
+    # Pass as ``cursor`` for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
 class ChatHistoryResponse(BaseModel):
     messages: List[Dict[str, str]]
+    # Pass as ``since`` on the next poll to fetch only newer messages
+    next_cursor: str = "0"
+    has_more: bool = False
 
 class ConservationStateResponse(BaseModel):
     conversation_id: str
     status: ConversationStatus
     collected_fields: Dict[str, str]
     summary: Optional[str] = None
-    messages: List[Dict[str, str]]
+    # Omitted when requested with include_messages=false
+    messages: Optional[List[Dict[str, str]]] = None
+    message_count: int = 0
+    # Model calls, tool calls and tokens: totals and the most recent turn
+    usage: TurnUsage = TurnUsage()
+    last_turn_usage: Optional[TurnUsage] = None
+    # Escalation ticket delivery (see the outbox config)
+    ticket: Optional[Ticket] = None
+    # Long-running tool calls awaiting POST /conversations/tool-calls:resolve
+    pending_calls: Dict[str, str] = {}
 
 # Global Services
-session_service = InMemorySessionService()
 APP_NAME = "intake_agent_api"
 # We can use a fixed user_id for now or make it dynamic, 
 # but the task implies anonymous/single user per conversation context.
 DEFAULT_USER_ID = "user" 
 
-runner = Runner(
-    agent=root_agent,
-    app_name=APP_NAME,
-    session_service=session_service,
-)
+# One turn at a time per conversation; retries with the same Idempotency-Key are coalesced
+turns = TurnCoordinator()
+
+# The services below (config, conversation store, session service, root agent,
+# runner, admission control and tenant registry) are built by _initialize() on
+# first use: the lifespan hook, the first request, or attribute access such as
+# ``small_agent.api.runner``. The app itself is built by create_app() on first
+# access to ``small_agent.api.app``. Importing this module stays cheap: the ADK
+# stack (agent.py, store.py, compaction.py) is only imported from here on.
+_SERVICES = ("project_config", "session_states", "session_service", "root_agent", "runner", "admission", "registry", "change_feed")
+_config_path = DEFAULT_CONFIG_PATH
+_initialized = False
+_init_lock = threading.Lock()
+startup = StartupTimer()
+
+def _initialize() -> None:
+    global project_config, session_states, session_service, root_agent, runner, admission, registry, change_feed, _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        with startup.phase("config"):
+            _load_env()
+            project_config = get_config()
+        with startup.phase("store"):
+            from .agent import get_session_states
+            from .store import PersistentSessionService
+            session_states = get_session_states()
+            session_service = PersistentSessionService(session_states)
+        with startup.phase("root_agent"):
+            from .agent import get_root_agent
+            root_agent = get_root_agent()
+        with startup.phase("runner"):
+            from google.adk.runners import Runner
+            runner = Runner(
+                agent=root_agent,
+                app_name=APP_NAME,
+                session_service=session_service,
+            )
+        with startup.phase("services"):
+            # Global LLM admission control with fair queueing across tenants / API keys
+            admission = AdmissionController(project_config.admission)
+
+            # Per-tenant agents and runners, built on first use; the root agent serves the default tenant
+            registry = AgentRegistry(
+                session_service=session_service,
+                app_name=APP_NAME,
+                default=TenantRuntime(DEFAULT_TENANT, get_snapshot, root_agent, runner),
+                directory=project_config.tenants.directory,
+                max_cached=project_config.tenants.max_cached,
+            )
+
+            # Field and status changes for GET /changes, recorded by the tools
+            change_feed = ChangeFeed(project_config.changes.capacity)
+            add_change_listener(change_feed.record)
+            # Save field and status changes as they happen, so the store's
+            # indexes (GET /conversations) reflect them before the turn ends
+            add_change_listener(_conversation_changed)
+        startup.export()
+        _initialized = True
+
+def __getattr__(name: str) -> Any:
+    if name in _SERVICES:
+        _initialize()
+        return globals()[name]
+    if name == "app":
+        # ``uvicorn small_agent.api:app`` and ``from small_agent.api import app``
+        with _init_lock:
+            if "app" not in globals():
+                globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def _ensure_initialized() -> None:
+    if not _initialized:
+        _initialize()
+
+async def _sweep_expired_conversations(interval: float):
+    """Periodically expires idle and terminal conversations."""
+    while True:
+        await asyncio.sleep(interval)
+        session_states.sweep()
+
+def _conversation_changed(state: AgentState, change: Dict[str, Any]) -> None:
+    # Change listeners are process-wide; skip states owned by another store (e.g. evals)
+    if state.conversation_id in session_states:
+        session_states.save(state)
+
+def _ticket_updated(conversation_id: str, ticket: Ticket) -> None:
+    """Writes an outbox delivery result back to the conversation."""
+    state = session_states.get(conversation_id)
+    if state is None:
+        return  # expired in the meantime
+    state.ticket = ticket
+    state.touch()
+    session_states.save(state)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup logic if needed
+    # Build the agent and services before serving, not on the first request
+    _initialize()
+    setup_telemetry(project_config.telemetry, active_conversations=lambda: session_states.resident_count)
+    sweeper = asyncio.create_task(_sweep_expired_conversations(project_config.sessions.sweep_interval_seconds))
+    watcher = None
+    if project_config.reload.enabled:
+        watcher = ConfigWatcher(_config_path, interval=project_config.reload.interval_seconds).start()
+    outbox = None
+    if project_config.outbox.enabled:
+        # Escalations are queued durably and delivered in the background
+        outbox = EscalationOutbox(project_config.outbox, on_update=_ticket_updated)
+        add_escalation_listener(outbox.enqueue)
+        dispatcher = asyncio.create_task(outbox.run())
     yield
-    # Shutdown logic if needed
+    if outbox:
+        remove_escalation_listener(outbox.enqueue)
+        dispatcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await dispatcher
+        outbox.close()
+    if watcher:
+        watcher.stop()
+    sweeper.cancel()
+    # Flush any buffered conversation writes
+    session_states.close()
+    shutdown_telemetry()
 
-app = FastAPI(title="Intake Agent API", lifespan=lifespan)
+router = APIRouter(dependencies=[Depends(_ensure_initialized)])
+
+@router.post("/conversations/", response_model=CreateConversationResponse)
+async def create_conversation(request: Optional[CreateConversationRequest] = None):
+    tenant_id = (request.tenant_id if request else None) or DEFAULT_TENANT
+    if not registry.exists(tenant_id):
+        raise HTTPException(status_code=404, detail="Tenant not found")
 
-@app.post("/conversations/", response_model=CreateConversationResponse)
-async def create_conversation():
     conversation_id = str(uuid.uuid4())
     
     # Create ADK session
-    await session_service.create_session(
+    session = await session_service.create_session(
         app_name=APP_NAME,
         user_id=DEFAULT_USER_ID,
         session_id=conversation_id
@@ -73,69 +280,620 @@ async def create_conversation():
     
     # Initialize AgentState
     # This ensures state exists before any messages
-    session_states[conversation_id] = AgentState(conversation_id=conversation_id)
-    
-    return CreateConversationResponse(conversation_id=conversation_id)
+    state = AgentState(conversation_id=conversation_id, tenant_id=tenant_id)
+
+    greeting = None
+    if request and request.greet:
+        from google.adk.events.event import Event
+        from google.genai import types
+        from .compaction import event_messages
+
+        # The greeting is fully determined by the persona template, so render it
+        # locally and seed it into both histories instead of spending a model call.
+        tenant = registry.get(tenant_id)
+        greeting = tenant.snapshot.greeting
+        event = Event(
+            author=tenant.agent.name,
+            content=types.Content(role="model", parts=[types.Part(text=greeting)]),
+        )
+        await session_service.append_event(session, event)
+        for role, message in event_messages([event]):
+            state.add_message(role, message)
+
+    session_states[conversation_id] = state
+
+    return CreateConversationResponse(conversation_id=conversation_id, tenant_id=tenant_id, greeting=greeting)
+
+def _flow(state: AgentState, api_key: Optional[str]) -> str:
+    """Fair-queueing flow for a request: the API key if given, else the tenant."""
+    return api_key or state.tenant_id or DEFAULT_TENANT
+
+
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.detail,
+        headers={"Retry-After": str(max(1, round(e.retry_after)))},
+    )
+
+
+def _record_usage_metrics(usage: TurnUsage, tenant_id: str) -> None:
+    metrics.inc("model_calls_total", usage.model_calls, tenant=tenant_id)
+    metrics.inc("tool_calls_total", usage.tool_calls, tenant=tenant_id)
+    metrics.inc("llm_tokens_total", usage.prompt_tokens, tenant=tenant_id, kind="prompt")
+    metrics.inc("llm_tokens_total", usage.completion_tokens, tenant=tenant_id, kind="completion")
+    metrics.observe("model_calls_per_turn", usage.model_calls, buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16))
+    model_calls_per_turn.record(usage.model_calls, {"tenant": tenant_id})
+
+
+async def _run_turn(
+    state: AgentState,
+    text: str,
+    flow: str = DEFAULT_TENANT,
+    function_responses: Optional[List["types.FunctionResponse"]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs one agent turn and yields each event as soon as the runner produces it.
+
+    With ``function_responses`` the turn resumes pending long-running tool
+    calls instead of sending ``text`` (no fast path or triggers apply).
+
+    Yielded events are plain dicts with a ``type`` key:
+    ``message`` (model text), ``fields_captured``, ``tool_call`` and
+    ``escalation``. Model text is appended to ``state.messages`` as it arrives.
+
+    Waits for an admission slot first and raises ``AdmissionRejected``
+    (before touching the state) if the turn is shed.
+    """
+    from google.genai import types
+    from .agent import MODEL_CALL_CAP_KEY, field_extractor_for, pinned_snapshot, trigger_matcher_for
+    from .compaction import compact_events
+
+    tenant_id = state.tenant_id or DEFAULT_TENANT
+    started = time.monotonic()
+    with span("agent.turn", **{"conversation.id": state.conversation_id, "tenant.id": tenant_id, "flow.hash": flow_digest(flow)}) as turn_span:
+        # Global admission control: wait for a slot in this flow's fair share
+        async with admission.slot(flow):
+            tenant = registry.get(state.tenant_id)
+            snapshot = tenant.snapshot
+            # Keep the conversation resident while the turn runs, and pin the turn
+            # (fast path, agent tools and instruction) to one config version even
+            # if a reload lands mid-turn
+            with session_states.pinned(state.conversation_id), pinned_snapshot(state, snapshot):
+                if function_responses:
+                    # Resuming long-running tool calls: the responses are the whole message
+                    parts = [types.Part(function_response=r) for r in function_responses]
+                    for response in function_responses:
+                        state.pending_calls.pop(response.id, None)
+                    state.touch()
+                else:
+                    # Update local state history
+                    state.add_message("user", text)
+
+                    # Prepare content for ADK
+                    parts = [types.Part(text=text)]
+
+                    # Fast path: record well-formed values locally instead of waiting for
+                    # the model to call collect_field, then tell the model what was saved.
+                    field_extractor = field_extractor_for(snapshot)
+                    with span("fast_path.extract"):
+                        captured = (
+                            field_extractor.extract(text, state.collected_fields)
+                            if field_extractor and state.status == ConversationStatus.COLLECTING
+                            else {}
+                        )
+                    if captured:
+                        tools = AgentTools(state, snapshot)
+                        for name, value in captured.items():
+                            result = tools.collect_field(name, value)
+                        parts.append(types.Part(text=capture_note(captured, result)))
+                        yield {"type": "fields_captured", "fields": captured, "missing_fields": result["missing_fields"]}
+
+                    # Deterministic escalation: escalate immediately and only use the model
+                    # to phrase the hand-off message.
+                    trigger_matcher = trigger_matcher_for(snapshot)
+                    trigger = trigger_matcher.find(text) if trigger_matcher and state.status == ConversationStatus.COLLECTING else None
+                    if trigger:
+                        result = AgentTools(state, snapshot).escalate_conversation(
+                            reason=f"Escalation trigger: {trigger}",
+                            summary=f"User said: {text}. Collected fields: {state.collected_fields}",
+                        )
+                        parts.append(types.Part(text=handoff_note(trigger, result["ticketId"])))
+                        yield {"type": "escalation", "id": None, "status": state.status.value, "response": result}
+
+                # Bound the prompt: fold older events into a summary of the fields
+                with span("context.compact"):
+                    session_service.compact_session(
+                        APP_NAME,
+                        DEFAULT_USER_ID,
+                        state.conversation_id,
+                        lambda events: compact_events(events, state, snapshot),
+                    )
+
+                content = types.Content(role="user", parts=parts)
+                usage = TurnUsage(turns=1)
+
+                events_async = tenant.runner.run_async(
+                    session_id=state.conversation_id,
+                    user_id=DEFAULT_USER_ID,
+                    new_message=content
+                )
+
+                try:
+                    async for event in events_async:
+                        if event.author == tenant.agent.name and event.content and event.content.role == "model" and not event.partial:
+                            # The canned reply at the model call cap is not a real call
+                            if not (event.custom_metadata or {}).get(MODEL_CALL_CAP_KEY):
+                                usage.add_model_call(event.usage_metadata)
+                        if not (event.content and event.content.parts):
+                            continue
+                        for part in event.content.parts:
+                            if part.text:
+                                text_response = part.text.strip()
+                                if text_response:
+                                    state.add_message("model", text_response)
+                                    yield {"type": "message", "role": "model", "text": text_response}
+                            if part.function_call:
+                                usage.tool_calls += 1
+                                if part.function_call.id in (event.long_running_tool_ids or ()):
+                                    # Awaits a response via POST /conversations/tool-calls:resolve
+                                    state.pending_calls[part.function_call.id] = part.function_call.name
+                                    state.touch()
+                                yield {
+                                    "type": "tool_call",
+                                    "id": part.function_call.id,
+                                    "name": part.function_call.name,
+                                    "args": dict(part.function_call.args or {}),
+                                }
+                            if part.function_response and part.function_response.name == "escalate_conversation":
+                                yield {
+                                    "type": "escalation",
+                                    "id": part.function_response.id,
+                                    "status": state.status.value,
+                                    "response": dict(part.function_response.response or {}),
+                                }
+
+                        # Note: We are currently expecting text responses.
+                        # If the agent calls tools, those are handled by the runner and the agent loop.
+                        # Ideally, the agent eventually outputs text back to the user.
+                finally:
+                    state.record_usage(usage)
+                    _record_usage_metrics(usage, tenant_id)
+                    turn_span.set_attributes({
+                        "agent.model_calls": usage.model_calls,
+                        "agent.tool_calls": usage.tool_calls,
+                        "agent.total_tokens": usage.total_tokens,
+                    })
+                    # Persist the turn (write-behind for durable stores)
+                    with span("state.save"):
+                        session_states.save(state)
+    turn_duration.record(time.monotonic() - started, {"tenant": tenant_id})
+
+
+# Tasks started by _read_ahead; referenced here so they aren't garbage collected
+_background_tasks: Set["asyncio.Task[None]"] = set()
+
+async def _read_ahead(source: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Yields ``source``'s items, but runs ``source`` in its own task with an
+    unbounded buffer so it never waits for the consumer. If the consumer
+    goes away, ``source`` still runs to completion.
+    """
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+    end = object()
+
+    async def pump() -> None:
+        try:
+            async for item in source:
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(end)
 
-@app.post("/conversations/{conversation_id}/messages/", response_model=List[MessageResponse])
-async def send_message(conversation_id: str, message: MessageRequest):
+    task = asyncio.create_task(pump())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    while (item := await queue.get()) is not end:
+        yield item
+    await task
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Formats a single Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _process_message(
+    conversation_id: str,
+    text: str,
+    idempotency_key: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> List[MessageResponse]:
+    """Runs one buffered turn; shared by send_message and the batch endpoint."""
     if conversation_id not in session_states:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    
-    # Update local state history
-    state = session_states[conversation_id]
-    state.messages.append({"role": "user", "text": message.text})
-    
-    # Prepare content for ADK
-    content = types.Content(role="user", parts=[types.Part(text=message.text)])
-    
-    # Run agent
-    responses: List[MessageResponse] = []
-    
+
+    async def turn() -> List[MessageResponse]:
+        state = session_states[conversation_id]
+
+        # Run agent
+        responses: List[MessageResponse] = []
+
+        try:
+            async for event in _run_turn(state, text, _flow(state, api_key)):
+                if event["type"] == "message":
+                    responses.append(MessageResponse(role=event["role"], text=event["text"]))
+        except AdmissionRejected as e:
+            raise _rejected(e)
+        except Exception as e:
+            # In case of error (e.g. session not found in service, though we created it), handle gracefully
+            raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+
+        return responses
+
+    # A retried request attaches to the in-flight turn or gets its cached result;
+    # reusing the key for a different message is a client error
+    fingerprint = hashlib.sha256(text.encode()).hexdigest()
     try:
-        events_async = runner.run_async(
-            session_id=conversation_id,
-            user_id=DEFAULT_USER_ID,
-            new_message=content
+        return await turns.run(conversation_id, idempotency_key, turn, fingerprint)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.post("/conversations/{conversation_id}/messages/", response_model=List[MessageResponse])
+async def send_message(
+    conversation_id: str,
+    message: MessageRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    api_key: Optional[str] = Header(default=None, alias="X-API-Key"),
+):
+    return await _process_message(conversation_id, message.text, idempotency_key, api_key)
+
+@router.post("/conversations/messages:batch", response_model=BatchMessageResponse)
+async def send_messages_batch(
+    batch: BatchMessageRequest,
+    api_key: Optional[str] = Header(default=None, alias="X-API-Key"),
+):
+    """
+    Processes messages for many conversations in one request.
+
+    Conversations run concurrently (at most ``batch.max_parallel`` at once);
+    messages for the same conversation run in the order given. Each item gets
+    its own result, so one failure doesn't fail the batch.
+    """
+    if len(batch.messages) > project_config.batch.max_items:
+        raise HTTPException(status_code=413, detail=f"At most {project_config.batch.max_items} messages per batch")
+
+    results: List[Optional[BatchMessageResult]] = [None] * len(batch.messages)
+    by_conversation: Dict[str, List[int]] = {}
+    for index, item in enumerate(batch.messages):
+        by_conversation.setdefault(item.conversation_id, []).append(index)
+
+    semaphore = asyncio.Semaphore(project_config.batch.max_parallel)
+
+    async def run_conversation(indexes: List[int]) -> None:
+        async with semaphore:
+            for index in indexes:
+                item = batch.messages[index]
+                try:
+                    responses = await _process_message(item.conversation_id, item.text, item.idempotency_key, api_key)
+                    results[index] = BatchMessageResult(
+                        index=index, conversation_id=item.conversation_id, status_code=200, responses=responses
+                    )
+                except HTTPException as e:
+                    results[index] = BatchMessageResult(
+                        index=index, conversation_id=item.conversation_id, status_code=e.status_code, error=str(e.detail)
+                    )
+
+    await asyncio.gather(*(run_conversation(indexes) for indexes in by_conversation.values()))
+    return BatchMessageResponse(results=results)
+
+@router.post("/conversations/tool-calls:resolve", response_model=ToolResolutionResponse)
+async def resolve_tool_calls(
+    request: ToolResolutionRequest,
+    api_key: Optional[str] = Header(default=None, alias="X-API-Key"),
+):
+    """
+    Sends final responses for pending long-running tool calls (e.g. an
+    approved escalation) and resumes the affected conversations.
+
+    Calls resolved for the same conversation go back in one turn;
+    conversations resume concurrently (at most ``batch.max_parallel`` at
+    once). Each item gets its own status: 404 for an unknown conversation or
+    a call that isn't pending, 409 for a call listed twice.
+    """
+    from google.genai import types
+
+    if len(request.resolutions) > project_config.batch.max_items:
+        raise HTTPException(status_code=413, detail=f"At most {project_config.batch.max_items} resolutions per request")
+
+    results: List[Optional[ToolResolutionResult]] = [None] * len(request.resolutions)
+    replies: Dict[str, List[MessageResponse]] = {}
+
+    def settle(index: int, status_code: int, error: Optional[str] = None) -> None:
+        item = request.resolutions[index]
+        results[index] = ToolResolutionResult(
+            index=index, conversation_id=item.conversation_id, call_id=item.call_id, status_code=status_code, error=error
         )
-        
-        async for event in events_async:
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    if part.text:
-                        text_response = part.text.strip()
-                        if text_response:
-                            responses.append(MessageResponse(role="model", text=text_response))
-                            state.messages.append({"role": "model", "text": text_response})
-            
-            # Note: We are currently expecting text responses. 
-            # If the agent calls tools, those are handled by the runner and the agent loop.
-            # Ideally, the agent eventually outputs text back to the user.
-            
-    except Exception as e:
-        # In case of error (e.g. session not found in service, though we created it), handle gracefully
-        raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
-
-    return responses
-
-@app.get("/conversations/{conversation_id}/messages/", response_model=ChatHistoryResponse)
-async def get_chat_history(conversation_id: str):
+
+    by_conversation: Dict[str, List[int]] = {}
+    seen = set()
+    for index, item in enumerate(request.resolutions):
+        if (item.conversation_id, item.call_id) in seen:
+            settle(index, 409, "Tool call listed more than once")
+            continue
+        seen.add((item.conversation_id, item.call_id))
+        by_conversation.setdefault(item.conversation_id, []).append(index)
+
+    semaphore = asyncio.Semaphore(project_config.batch.max_parallel)
+
+    async def resume(conversation_id: str, indexes: List[int]) -> None:
+        async with semaphore:
+            if conversation_id not in session_states:
+                for index in indexes:
+                    settle(index, 404, "Conversation not found")
+                return
+            async with turns.lock(conversation_id):
+                state = session_states[conversation_id]
+                function_responses: List[types.FunctionResponse] = []
+                accepted: List[int] = []
+                for index in indexes:
+                    item = request.resolutions[index]
+                    name = state.pending_calls.get(item.call_id)
+                    if name is None:
+                        settle(index, 404, "No pending tool call with this id")
+                        continue
+                    function_responses.append(types.FunctionResponse(id=item.call_id, name=name, response=item.response))
+                    accepted.append(index)
+                if not function_responses:
+                    return
+
+                status_code, error = 200, None
+                messages: List[MessageResponse] = []
+                try:
+                    async for event in _run_turn(state, "", _flow(state, api_key), function_responses=function_responses):
+                        if event["type"] == "message":
+                            messages.append(MessageResponse(role=event["role"], text=event["text"]))
+                    replies[conversation_id] = messages
+                except AdmissionRejected as e:
+                    status_code, error = e.status_code, e.detail
+                except Exception as e:
+                    status_code, error = 500, f"Agent execution failed: {str(e)}"
+                for index in accepted:
+                    settle(index, status_code, error)
+
+    await asyncio.gather(*(resume(cid, indexes) for cid, indexes in by_conversation.items()))
+    return ToolResolutionResponse(results=results, responses=replies)
+
+@router.post("/conversations/{conversation_id}/messages/stream")
+async def stream_message(
+    conversation_id: str,
+    message: MessageRequest,
+    api_key: Optional[str] = Header(default=None, alias="X-API-Key"),
+):
+    """
+    Streaming variant of ``send_message`` using Server-Sent Events.
+
+    Each text part, tool call and escalation is sent as soon as the runner
+    yields it, followed by a final ``done`` event.
+    """
     if conversation_id not in session_states:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    
+
+    flow = _flow(session_states[conversation_id], api_key)
+    try:
+        # Shed before the stream starts so the client gets a real 429/503
+        admission.check(flow)
+    except AdmissionRejected as e:
+        raise _rejected(e)
+
+    async def produce() -> AsyncIterator[str]:
+        async with turns.lock(conversation_id):
+            state = session_states[conversation_id]
+            try:
+                async for event in _run_turn(state, message.text, flow):
+                    yield _sse(event["type"], event)
+            except AdmissionRejected as e:
+                yield _sse("error", {"type": "error", "status_code": e.status_code, "detail": e.detail})
+                return
+            except Exception as e:
+                # Headers are already sent, so errors are reported in-band
+                yield _sse("error", {"type": "error", "detail": f"Agent execution failed: {str(e)}"})
+                return
+            yield _sse("done", {"type": "done", "status": state.status.value})
+
+    return StreamingResponse(
+        # The turn (and its admission slot and turn lock) ends as soon as the
+        # model is done, not when a slow client has read every event
+        _read_ahead(produce()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _not_modified(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+@router.get("/conversations", response_model=ConversationListResponse)
+async def list_conversations(
+    request: Request,
+    status: Optional[ConversationStatus] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+):
+    """
+    Conversations matching ``status`` and any ``field.<name>=<value>``
+    filters (e.g. ``field.email=ana@example.com``), most recently active
+    first. Served from the store's secondary indexes (see
+    ``ConversationStore.query_index``), never by scanning the store.
+    """
+    fields = {key[len("field."):]: value for key, value in request.query_params.items() if key.startswith("field.")}
+    try:
+        entries, next_cursor = session_states.query_index(status.value if status else None, fields, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Rendered from the index entries: listing never loads (or re-admits) a stored conversation
+    conversations = [
+        ConversationSummary(
+            conversation_id=entry.conversation_id,
+            tenant_id=entry.tenant_id,
+            status=entry.status,
+            collected_fields=entry.collected_fields,
+            updated_at=entry.updated_at,
+        )
+        for entry in entries
+    ]
+    return ConversationListResponse(conversations=conversations, next_cursor=next_cursor)
+
+@router.get("/conversations/{conversation_id}/messages/", response_model=ChatHistoryResponse)
+async def get_chat_history(
+    conversation_id: str,
+    response: Response,
+    since: str = Query(default="0", description="Cursor from a previous next_cursor"),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+):
+    if conversation_id not in session_states:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    try:
+        start = int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if start < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
     state = session_states[conversation_id]
-    return ChatHistoryResponse(messages=state.messages)
+    total = len(state.messages)
+    # History is append-only, so the length identifies the page content
+    etag = f'W/"{conversation_id}-{start}-{limit}-{total}"'
+    if _not_modified(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    end = total if limit is None else min(total, start + limit)
+    response.headers["ETag"] = etag
+    return ChatHistoryResponse(
+        messages=state.messages[start:end],
+        next_cursor=str(max(end, start)),
+        has_more=end < total,
+    )
 
-@app.get("/conversations/{conversation_id}", response_model=ConservationStateResponse)
-async def get_conversation_state(conversation_id: str):
+@router.get("/conversations/{conversation_id}", response_model=ConservationStateResponse)
+async def get_conversation_state(
+    conversation_id: str,
+    response: Response,
+    include_messages: bool = Query(default=True),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+):
     if conversation_id not in session_states:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     state = session_states[conversation_id]
+    etag = state.etag() if include_messages else state.etag().replace('"', '"lean-', 1)
+    if _not_modified(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return ConservationStateResponse(
         conversation_id=state.conversation_id,
         status=state.status,
         collected_fields=state.collected_fields,
         summary=state.summary,
-        messages=state.messages
+        messages=state.messages.to_list() if include_messages else None,
+        message_count=len(state.messages),
+        usage=state.usage,
+        last_turn_usage=state.last_turn_usage,
+        ticket=state.ticket,
+        pending_calls=state.pending_calls,
     )
+
+@router.get("/changes", response_model=ChangeFeedResponse)
+async def get_changes(
+    cursor: int = Query(default=0, ge=0, description="next_cursor from the previous poll (0: everything retained)"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    status: Optional[ConversationStatus] = Query(default=None),
+    tenant_id: Optional[str] = Query(default=None),
+    event_type: Optional[str] = Query(default=None, alias="type"),
+    wait: float = Query(default=0, ge=0, description="Seconds to wait for a matching event (long-poll)"),
+):
+    """
+    Conversation changes after ``cursor``: ``field_collected`` and
+    ``status_changed`` events, optionally filtered by status (after the
+    change), tenant and type. A conversation moves to ESCALATED when it is
+    escalated, or to COMPLETED when its last required field is collected
+    with escalation disabled. With ``wait`` the request is held until a
+    matching event arrives or the wait (capped at
+    ``changes.max_wait_seconds``) runs out.
+    """
+    filters = {"status": status.value if status else None, "tenant_id": tenant_id, "event_type": event_type}
+    deadline = time.monotonic() + min(wait, project_config.changes.max_wait_seconds)
+    events, next_cursor, truncated = change_feed.read(cursor, limit, **filters)
+    while not events and not truncated:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not await change_feed.wait(next_cursor, remaining):
+            break
+        events, next_cursor, truncated = change_feed.read(next_cursor, limit, **filters)
+    return ChangeFeedResponse(events=events, next_cursor=next_cursor, truncated=truncated)
+
+@router.get("/changes/stream")
+async def stream_changes(
+    cursor: Optional[int] = Query(default=None, ge=0, description="Last seq seen (default: Last-Event-ID, else 0)"),
+    status: Optional[ConversationStatus] = Query(default=None),
+    tenant_id: Optional[str] = Query(default=None),
+    event_type: Optional[str] = Query(default=None, alias="type"),
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events variant of ``GET /changes``.
+
+    Each event carries its ``seq`` as the SSE id, so a reconnecting client
+    resumes where it left off. A ``truncated`` event means events were missed.
+    """
+    if cursor is None:
+        cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    filters = {"status": status.value if status else None, "tenant_id": tenant_id, "event_type": event_type}
+    heartbeat = project_config.changes.heartbeat_seconds
+
+    async def event_stream() -> AsyncIterator[str]:
+        position = cursor
+        while True:
+            events, position, truncated = change_feed.read(position, 500, **filters)
+            if truncated:
+                yield _sse("truncated", {"type": "truncated", "first_seq": change_feed.first_seq})
+            for event in events:
+                yield f"id: {event.seq}\n" + _sse(event.type, event.model_dump())
+            if not events and not await change_feed.wait(position, heartbeat):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/metrics")
+async def get_metrics():
+    """Process metrics: eviction counters, resident conversations, etc."""
+    return metrics.snapshot()
+
+def _load_env() -> None:
+    load_dotenv(os.path.join(os.path.dirname(__file__), ".env"), override=True)
+
+def create_app(config_path: Optional[str] = None) -> FastAPI:
+    """
+    Builds the API app. Only the config is read here; the conversation store,
+    agents and runners are built by the lifespan hook (or the first request).
+    Services are process-wide, so create one app per process.
+    """
+    global _config_path
+    with startup.phase("create_app"):
+        _load_env()
+        if config_path:
+            _config_path = config_path
+            load_config(config_path)
+        application = FastAPI(title="Intake Agent API", lifespan=lifespan)
+        if get_config().telemetry.enabled:
+            application.add_middleware(TracingMiddleware)
+        application.include_router(router)
+    return application
+
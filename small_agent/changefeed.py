@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from .metrics import metrics
+from .state import AgentState
+
+
+class ChangeEvent(BaseModel):
+    seq: int
+    type: str  # "field_collected" or "status_changed"
+    conversation_id: str
+    tenant_id: Optional[str] = None
+    status: str  # conversation status after the change
+    time: float
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ChangeFeed:
+    """
+    Bounded in-process feed of conversation changes.
+
+    Events get consecutive sequence numbers and live in a ring buffer of
+    ``capacity`` slots, so memory stays flat and the oldest events are
+    overwritten first. Readers pass the last ``seq`` they saw as a cursor;
+    ``read`` reports ``truncated`` when events after the cursor were already
+    overwritten, or the cursor is from before a restart. ``record`` is a
+    change listener for ``AgentTools`` (see tools.py) and may be called from
+    any thread.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._buffer: List[Optional[ChangeEvent]] = [None] * capacity
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    @property
+    def first_seq(self) -> int:
+        """Oldest sequence number still in the buffer."""
+        return max(1, self._next_seq - self.capacity)
+
+    def record(self, state: AgentState, change: Dict[str, Any]) -> ChangeEvent:
+        data = {k: v for k, v in change.items() if k != "type"}
+        with self._lock:
+            event = ChangeEvent(
+                seq=self._next_seq,
+                type=change["type"],
+                conversation_id=state.conversation_id,
+                tenant_id=state.tenant_id,
+                status=state.status.value,
+                time=time.time(),
+                data=data,
+            )
+            self._buffer[event.seq % self.capacity] = event
+            self._next_seq += 1
+            waiters, self._waiters = self._waiters, []
+        metrics.inc("change_events_total", type=event.type)
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # loop already closed
+        return event
+
+    def read(
+        self,
+        cursor: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        event_type: Optional[str] = None,
+    ) -> Tuple[List[ChangeEvent], int, bool]:
+        """
+        Events after ``cursor`` matching the filters, at most ``limit``.
+
+        Returns ``(events, next_cursor, truncated)``. ``next_cursor`` is the
+        last sequence number examined, matching or not, so filtered readers
+        don't rescan skipped events.
+        """
+        events: List[ChangeEvent] = []
+        with self._lock:
+            first, last = self.first_seq, self.last_seq
+            # A cursor ahead of the feed is from before a restart: replay what is retained
+            reset = cursor > last
+            if reset:
+                cursor = 0
+            truncated = reset or cursor + 1 < first
+            seq = max(cursor + 1, first)
+            while seq <= last and len(events) < limit:
+                event = self._buffer[seq % self.capacity]
+                if (
+                    (status is None or event.status == status)
+                    and (tenant_id is None or event.tenant_id == tenant_id)
+                    and (event_type is None or event.type == event_type)
+                ):
+                    events.append(event)
+                seq += 1
+        return events, max(cursor, seq - 1), truncated
+
+    async def wait(self, cursor: int, timeout: float) -> bool:
+        """Waits up to ``timeout`` seconds for an event after ``cursor``."""
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[None]" = loop.create_future()
+        with self._lock:
+            if self.last_seq > cursor:
+                return True
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
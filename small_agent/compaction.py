@@ -0,0 +1,133 @@
+import json
+from typing import Iterable, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.genai import types
+
+from config.compiled import CompiledConfig
+from .metrics import metrics
+from .state import AgentState
+
+# Histogram bounds for prompt sizes, in estimated tokens
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+_SUMMARY_KEY = "context_summary"
+
+
+def estimate_tokens(events: List[Event]) -> int:
+    """Cheap prompt size estimate (~4 characters per token) for a list of events."""
+    chars = 0
+    for event in events:
+        if not (event.content and event.content.parts):
+            continue
+        for part in event.content.parts:
+            if part.text:
+                chars += len(part.text)
+            if part.function_call:
+                chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+            if part.function_response:
+                chars += len(part.function_response.name or "") + len(json.dumps(part.function_response.response or {}, default=str))
+    return (chars + 3) // 4
+
+
+def is_summary(event: Event) -> bool:
+    return bool(event.custom_metadata and event.custom_metadata.get(_SUMMARY_KEY))
+
+
+def summary_text(state: AgentState, snapshot: CompiledConfig) -> str:
+    """Compact stand-in for the compacted events: what is known and what is left."""
+    collected = ", ".join(f"{name}={value}" for name, value in state.collected_fields.items()) or "none"
+    missing = ", ".join(snapshot.missing_fields(state.collected_fields)) or "none"
+    lines = [
+        "[system] Earlier messages of this conversation were summarized to save context.",
+        f"Status: {state.status.value}.",
+        f"Collected fields: {collected}.",
+        f"Still missing: {missing}.",
+    ]
+    if state.summary:
+        lines.append(f"Escalation summary: {state.summary}")
+    return "\n".join(lines)
+
+
+def event_messages(events: Iterable[Event]) -> List[Tuple[str, str]]:
+    """
+    The ``(role, text)`` transcript messages that ``events`` account for, as
+    ``_run_turn`` records them: the user's text (the first part of a user
+    event) and every non-empty text part of the agent's events, stripped.
+    """
+    messages = []
+    for event in events:
+        if not (event.content and event.content.parts) or is_summary(event):
+            continue
+        if event.author == "user":
+            if event.content.parts[0].text is not None:
+                messages.append(("user", event.content.parts[0].text))
+            continue
+        for part in event.content.parts:
+            text = part.text.strip() if part.text else ""
+            if text:
+                messages.append(("model", text))
+    return messages
+
+
+def _has_pending_calls(older: List[Event], events: List[Event]) -> bool:
+    """True if a long-running call in ``older`` has no response yet."""
+    pending = set()
+    for event in older:
+        pending.update(event.long_running_tool_ids or ())
+    if not pending:
+        return False
+    for event in events:
+        for response in event.get_function_responses():
+            pending.discard(response.id)
+    return bool(pending)
+
+
+def compact_events(events: List[Event], state: AgentState, snapshot: CompiledConfig) -> Optional[List[Event]]:
+    """
+    Returns a compacted copy of ``events``, or None if no compaction is due.
+    On compaction, the transcript messages of the dropped events are counted
+    into ``state.archived_messages``.
+
+    Compaction kicks in once the context holds more than ``max_turns`` user
+    turns or about ``max_tokens`` tokens. Everything before the last
+    ``keep_recent_turns`` user turns is replaced by a single summary event.
+    The cut always lands on a user turn boundary, so tool calls and their
+    responses are never split.
+    """
+    config = snapshot.config.compaction
+    if not config.enabled:
+        return None
+
+    turn_starts = [i for i, event in enumerate(events) if event.author == "user" and not is_summary(event)]
+    if len(turn_starts) <= config.keep_recent_turns:
+        return None
+    tokens_before = estimate_tokens(events)
+    if len(turn_starts) <= config.max_turns and tokens_before <= config.max_tokens:
+        return None
+
+    cut = turn_starts[-config.keep_recent_turns] if config.keep_recent_turns > 0 else len(events)
+    older = events[:cut]
+    if all(is_summary(event) for event in older) or _has_pending_calls(older, events):
+        return None
+    # Calls awaiting POST /conversations/tool-calls:resolve must stay in context
+    if state.pending_calls and any(
+        call.id in state.pending_calls for event in older for call in event.get_function_calls()
+    ):
+        return None
+
+    summary = Event(
+        author="user",
+        content=types.Content(role="user", parts=[types.Part(text=summary_text(state, snapshot))]),
+        custom_metadata={_SUMMARY_KEY: True, "compacted_events": len(older)},
+        timestamp=older[-1].timestamp,
+    )
+    compacted = [summary] + list(events[cut:])
+    state.archived_messages += len(event_messages(older))
+
+    tokens_after = estimate_tokens(compacted)
+    metrics.inc("context_compactions_total")
+    metrics.inc("context_tokens_saved_total", max(tokens_before - tokens_after, 0))
+    metrics.observe("context_tokens_before_compaction", tokens_before, buckets=TOKEN_BUCKETS)
+    metrics.observe("context_tokens_after_compaction", tokens_after, buckets=TOKEN_BUCKETS)
+    return compacted
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+from google.adk.runners import Runner
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.genai import types
+from pydantic import BaseModel, Field
+
+from config.compiled import CompiledConfig
+from .agent import build_agent
+from .llm_client import LLMClient
+from .state import ConversationStatus
+from .store import InMemoryConversationStore
+
+EVAL_APP_NAME = "eval_runner"
+EVAL_USER_ID = "eval_user"
+
+
+class ScenarioExpectations(BaseModel):
+    escalated: Optional[bool] = None  # None: don't check
+    fields: Optional[List[str]] = None  # must be collected; None: all required fields
+    keywords: List[str] = Field(default_factory=list)  # any one must appear in the replies
+
+
+class Scenario(BaseModel):
+    name: str
+    turns: List[str]
+    expect: ScenarioExpectations = Field(default_factory=ScenarioExpectations)
+
+
+class ScenarioResult(BaseModel):
+    name: str
+    passed: bool
+    checks: Dict[str, bool] = Field(default_factory=dict)
+    escalated: bool = False
+    status: Optional[str] = None
+    collected_fields: Dict[str, str] = Field(default_factory=dict)
+    missing_fields: List[str] = Field(default_factory=list)
+    turns: int = 0
+    model_calls: int = 0
+    tool_calls: int = 0
+    total_tokens: int = 0
+    latency_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def load_scenarios(path: str) -> List[Scenario]:
+    """Reads scenarios from YAML (a list or ``{scenarios: [...]}``) or JSON lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            items = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = yaml.safe_load(f) or []
+            items = data.get("scenarios", []) if isinstance(data, dict) else data
+    return [Scenario(**item) for item in items]
+
+
+async def run_scenario(
+    scenario: Scenario,
+    config_provider: Callable[[], CompiledConfig],
+    llm_client: Optional[LLMClient] = None,
+) -> ScenarioResult:
+    """Runs one scenario against its own agent, session service and state store."""
+    states = InMemoryConversationStore()
+    agent = build_agent(config_provider, llm_client, states=states)
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name=EVAL_APP_NAME, session_service=session_service)
+    session_id = str(uuid.uuid4())
+    await session_service.create_session(app_name=EVAL_APP_NAME, user_id=EVAL_USER_ID, session_id=session_id)
+
+    result = ScenarioResult(name=scenario.name, passed=False)
+    replies: List[str] = []
+    started = time.perf_counter()
+    try:
+        for text in scenario.turns:
+            result.turns += 1
+            message = types.Content(role="user", parts=[types.Part(text=text)])
+            async for event in runner.run_async(user_id=EVAL_USER_ID, session_id=session_id, new_message=message):
+                if event.author == agent.name and event.content and event.content.role == "model" and not event.partial:
+                    result.model_calls += 1
+                    usage = event.usage_metadata
+                    if usage is not None and isinstance(usage.total_token_count, int):
+                        result.total_tokens += usage.total_token_count
+                if not (event.content and event.content.parts):
+                    continue
+                for part in event.content.parts:
+                    if part.text and part.text.strip():
+                        replies.append(part.text.strip())
+                    if part.function_call:
+                        result.tool_calls += 1
+                        if part.function_call.name == "escalate_conversation":
+                            result.escalated = True
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.latency_seconds = time.perf_counter() - started
+
+    snapshot = config_provider()
+    state = states.get(session_id)
+    if state is not None:
+        result.status = state.status.value
+        result.collected_fields = dict(state.collected_fields)
+        result.escalated = result.escalated or state.status == ConversationStatus.ESCALATED
+    result.missing_fields = snapshot.missing_fields(result.collected_fields)
+
+    expect = scenario.expect
+    if expect.escalated is not None:
+        result.checks["escalation"] = result.escalated == expect.escalated
+    required = [f.lower() for f in expect.fields] if expect.fields is not None else list(snapshot.required_order)
+    result.checks["fields"] = all(result.collected_fields.get(f) for f in required)
+    if expect.keywords:
+        result.checks["keywords"] = any(kw.lower() in reply.lower() for kw in expect.keywords for reply in replies)
+    result.passed = result.error is None and all(result.checks.values())
+    return result
+
+
+async def run_scenarios(
+    scenarios: List[Scenario],
+    config_provider: Callable[[], CompiledConfig],
+    llm_client: Optional[LLMClient] = None,
+    concurrency: int = 8,
+    timeout: Optional[float] = None,
+    on_result: Optional[Callable[[ScenarioResult], None]] = None,
+) -> List[ScenarioResult]:
+    """
+    Runs scenarios with at most ``concurrency`` in flight.
+
+    Results come back in input order; ``on_result`` is called as each one
+    finishes (e.g. to stream it to a file). A scenario exceeding ``timeout``
+    seconds is recorded as an error instead of stalling the run.
+    """
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for index in range(len(scenarios)):
+        queue.put_nowait(index)
+    results: List[Optional[ScenarioResult]] = [None] * len(scenarios)
+
+    async def worker() -> None:
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            scenario = scenarios[index]
+            try:
+                result = await asyncio.wait_for(run_scenario(scenario, config_provider, llm_client), timeout)
+            except asyncio.TimeoutError:
+                result = ScenarioResult(name=scenario.name, passed=False, error=f"Timed out after {timeout}s")
+            results[index] = result
+            if on_result:
+                on_result(result)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(scenarios))))))
+    return results
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def summarize(results: List[ScenarioResult], elapsed_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Aggregate pass rate, escalation rate, latency and model usage."""
+    total = len(results)
+    latencies = [r.latency_seconds for r in results]
+    summary: Dict[str, Any] = {
+        "scenarios": total,
+        "passed": sum(r.passed for r in results),
+        "failed": sum(not r.passed and r.error is None for r in results),
+        "errors": sum(r.error is not None for r in results),
+        "pass_rate": sum(r.passed for r in results) / total if total else 0.0,
+        "escalation_rate": sum(r.escalated for r in results) / total if total else 0.0,
+        "model_calls": sum(r.model_calls for r in results),
+        "total_tokens": sum(r.total_tokens for r in results),
+        "latency_seconds": {
+            "mean": sum(latencies) / total if total else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "max": max(latencies, default=0.0),
+        },
+        "failures": [r.name for r in results if not r.passed],
+    }
+    if elapsed_seconds is not None:
+        summary["elapsed_seconds"] = elapsed_seconds
+    return summary
+
+
+class ResultWriter:
+    """Streams results to a JSON lines file as they finish (usable as ``on_result``)."""
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def __call__(self, result: ScenarioResult) -> None:
+        self._file.write(result.model_dump_json() + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
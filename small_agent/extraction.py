@@ -0,0 +1,56 @@
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from config.compiled import CompiledConfig, searchable_pattern
+from config.models import FieldConfig
+
+
+class FieldExtractor:
+    """
+    Pre-LLM extraction of well-formed field values (email, phone, ...).
+
+    Only fields with a ``validation_regex`` take part. A value is extracted
+    only when the message contains exactly one distinct match, and the
+    field's ``capture_cue`` if it has one, so ambiguous input is still left
+    to the model.
+    """
+
+    def __init__(self, fields: List[FieldConfig]):
+        self._patterns: List[Tuple[str, Pattern[str], Optional[Pattern[str]]]] = [
+            (f.name.lower(), searchable_pattern(f.validation_regex), re.compile(f.capture_cue) if f.capture_cue else None)
+            for f in fields
+            if f.validation_regex
+        ]
+
+    @classmethod
+    def from_snapshot(cls, snapshot: CompiledConfig) -> "FieldExtractor":
+        """Reuses the patterns already compiled into a config snapshot."""
+        extractor = cls([])
+        extractor._patterns = [
+            (name, pattern, snapshot.capture_cues.get(name)) for name, pattern in snapshot.search_patterns.items()
+        ]
+        return extractor
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+    def extract(self, text: str, collected_fields: Dict[str, str]) -> Dict[str, str]:
+        """Returns ``{field: value}`` for uncollected fields found in ``text``."""
+        found: Dict[str, str] = {}
+        for name, pattern, cue in self._patterns:
+            if collected_fields.get(name) or (cue is not None and not cue.search(text)):
+                continue
+            matches = {m.group(0).strip() for m in pattern.finditer(text)}
+            if len(matches) == 1:
+                found[name] = matches.pop()
+        return found
+
+
+def capture_note(captured: Dict[str, str], result: Dict) -> str:
+    """Tells the model which fields were already recorded for this message."""
+    values = ", ".join(f"{name}={value}" for name, value in captured.items())
+    note = f"[system] Already recorded from this message via collect_field: {values}. Do not call collect_field for these."
+    if result.get("is_complete"):
+        return note + " All required fields are collected."
+    missing = ", ".join(result.get("missing_fields", []))
+    return note + f" Still missing: {missing}."
@@ -0,0 +1,278 @@
+import base64
+import json
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .metrics import metrics
+from .state import AgentState
+
+# (updated_at, conversation_id): orders conversations by last activity
+ActivityKey = Tuple[float, str]
+
+_SPACES = re.compile(r"\s+")
+_PHONE_PUNCTUATION = re.compile(r"[\s()+.-]")
+
+
+def normalize_value(value: str) -> str:
+    """
+    Canonical form of a collected value for exact-match lookups: trimmed,
+    case-folded, whitespace collapsed; phone-like values keep only digits
+    (so "+54 11 4444-0000" and "541144440000" match).
+    """
+    text = _SPACES.sub(" ", value.strip().casefold())
+    digits = _PHONE_PUNCTUATION.sub("", text)
+    if digits.isdigit():
+        return digits
+    return text
+
+
+def encode_cursor(key: ActivityKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ActivityKey:
+    """Inverse of ``encode_cursor``; raises ValueError for a malformed cursor."""
+    try:
+        updated_at, conversation_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(updated_at), str(conversation_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class _SortedKeys:
+    """
+    Sorted set of activity keys kept in buckets of at most ``2 * load`` keys,
+    so an insert or removal only shifts one bucket, even with millions of keys.
+    """
+
+    def __init__(self, load: int = 1000):
+        self._load = load
+        self._buckets: List[List[ActivityKey]] = []
+        self._maxes: List[ActivityKey] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: ActivityKey) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            return
+        i = min(bisect_left(self._maxes, key), len(self._buckets) - 1)
+        bucket = self._buckets[i]
+        insort(bucket, key)
+        self._maxes[i] = bucket[-1]
+        self._len += 1
+        if len(bucket) > 2 * self._load:
+            self._buckets[i:i + 1] = [bucket[:self._load], bucket[self._load:]]
+            self._maxes[i:i + 1] = [bucket[self._load - 1], bucket[-1]]
+
+    def remove(self, key: ActivityKey) -> None:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            return
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            return
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+
+    def descending(self, before: Optional[ActivityKey] = None) -> Iterator[ActivityKey]:
+        """Keys in descending order, starting below ``before`` if given."""
+        if not self._buckets:
+            return
+        if before is None:
+            i, j = len(self._buckets) - 1, len(self._buckets[-1])
+        else:
+            i = bisect_left(self._maxes, before)
+            if i == len(self._buckets):
+                i, j = i - 1, len(self._buckets[-1])
+            else:
+                j = bisect_left(self._buckets[i], before)
+        while i >= 0:
+            bucket = self._buckets[i]
+            for k in range(j - 1, -1, -1):
+                yield bucket[k]
+            i -= 1
+            if i >= 0:
+                j = len(self._buckets[i])
+
+
+class IndexEntry:
+    """
+    What the index knows about one conversation: enough to render a list
+    page (see ``ConversationIndex.entries``) without loading the state.
+    """
+
+    __slots__ = ("status", "key", "tenant_id", "collected_fields")
+
+    def __init__(self, status: str, key: ActivityKey, tenant_id: Optional[str], collected_fields: Dict[str, str]):
+        self.status = status
+        self.key = key
+        self.tenant_id = tenant_id
+        # As collected; lookups use ``lookup_values``
+        self.collected_fields = collected_fields
+
+    @classmethod
+    def from_state(cls, state: AgentState) -> "IndexEntry":
+        return cls(
+            state.status.value,
+            (state.updated_at, state.conversation_id),
+            state.tenant_id,
+            dict(state.collected_fields),
+        )
+
+    @property
+    def conversation_id(self) -> str:
+        return self.key[1]
+
+    @property
+    def updated_at(self) -> float:
+        return self.key[0]
+
+    def lookup_values(self) -> Dict[str, str]:
+        """Collected values under ``normalize_value``, keyed by field name."""
+        return {name: normalize_value(value) for name, value in self.collected_fields.items() if value}
+
+    def matches(self, status: Optional[str], fields: List[Tuple[str, str]], before: Optional[ActivityKey]) -> bool:
+        """Whether a query for ``status`` and normalized ``fields``, below ``before``, selects this entry."""
+        if status is not None and self.status != status:
+            return False
+        if before is not None and self.key >= before:
+            return False
+        values = self.lookup_values()
+        return all(values.get(name) == value for name, value in fields)
+
+    def same_as(self, other: "IndexEntry") -> bool:
+        return (self.status, self.key, self.tenant_id, self.collected_fields) == (
+            other.status, other.key, other.tenant_id, other.collected_fields
+        )
+
+
+class ConversationIndex:
+    """
+    Secondary indexes over conversations: by status, by last activity
+    (``AgentState.updated_at``) and by normalized collected-field value.
+
+    ``update`` re-indexes one conversation from its state; the in-memory
+    store calls it on every write (durable stores index in their backend,
+    see ``SQLiteConversationStore.query_index``). ``query`` returns conversations most recently active first,
+    paginated with an opaque keyset cursor, so the cost of a page doesn't
+    grow with the number of conversations.
+    """
+
+    def __init__(self, load: int = 1000):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, IndexEntry] = {}
+        self._activity = _SortedKeys(load)
+        self._activity_by_status: Dict[str, _SortedKeys] = {}
+        self._status: Dict[str, Set[str]] = {}
+        self._fields: Dict[Tuple[str, str], Set[str]] = {}
+        self._load = load
+        metrics.gauge("conversations_indexed", lambda: len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, conversation_id: object) -> bool:
+        return conversation_id in self._entries
+
+    def update(self, state: AgentState) -> None:
+        conversation_id = state.conversation_id
+        entry = IndexEntry.from_state(state)
+        with self._lock:
+            old = self._entries.get(conversation_id)
+            if old is not None and old.same_as(entry):
+                return
+            if old is not None:
+                self._unindex(conversation_id, old)
+            self._entries[conversation_id] = entry
+            self._activity.add(entry.key)
+            by_status = self._activity_by_status.get(entry.status)
+            if by_status is None:
+                by_status = self._activity_by_status[entry.status] = _SortedKeys(self._load)
+            by_status.add(entry.key)
+            self._status.setdefault(entry.status, set()).add(conversation_id)
+            for item in entry.lookup_values().items():
+                self._fields.setdefault(item, set()).add(conversation_id)
+
+    def remove(self, conversation_id: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(conversation_id, None)
+            if entry is not None:
+                self._unindex(conversation_id, entry)
+
+    def _unindex(self, conversation_id: str, entry: IndexEntry) -> None:
+        self._activity.remove(entry.key)
+        self._activity_by_status[entry.status].remove(entry.key)
+        members = self._status[entry.status]
+        members.discard(conversation_id)
+        if not members:
+            del self._status[entry.status]
+        for item in entry.lookup_values().items():
+            members = self._fields[item]
+            members.discard(conversation_id)
+            if not members:
+                del self._fields[item]
+
+    def entries(self, conversation_ids: Iterable[str]) -> List[IndexEntry]:
+        """Index entries for ``conversation_ids`` (e.g. a ``query`` page), skipping removed ones."""
+        with self._lock:
+            return [self._entries[cid] for cid in conversation_ids if cid in self._entries]
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                return len(self._entries)
+            return len(self._status.get(status, ()))
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        fields: Optional[Dict[str, str]] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Conversation ids matching every filter, most recently active first.
+
+        ``fields`` maps field names to values, compared after
+        ``normalize_value``. Returns ``(ids, next_cursor)``; ``next_cursor``
+        is None on the last page. Raises ValueError for a bad cursor.
+        """
+        before = decode_cursor(cursor) if cursor else None
+        wanted = [(name.lower(), normalize_value(value)) for name, value in (fields or {}).items()]
+        with self._lock:
+            if wanted:
+                # Field values are selective: intersect from the smallest set,
+                # then order the (few) matches by activity
+                sets = [self._fields.get(item, set()) for item in wanted]
+                if status is not None:
+                    sets.append(self._status.get(status, set()))
+                smallest = min(sets, key=len)
+                keys = sorted(
+                    (self._entries[cid].key for cid in smallest if all(cid in s for s in sets)),
+                    reverse=True,
+                )
+                if before is not None:
+                    keys = [key for key in keys if key < before]
+                page = keys[:limit + 1]
+            else:
+                ordered = self._activity if status is None else self._activity_by_status.get(status, _SortedKeys())
+                page = []
+                for key in ordered.descending(before):
+                    page.append(key)
+                    if len(page) > limit:
+                        break
+        next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        return [cid for _, cid in page[:limit]], next_cursor
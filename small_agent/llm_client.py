@@ -1,13 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import List, Any, Optional
+from typing import Any, Callable, List, Optional, Union
 from google.adk import Agent
 from google.genai import types
 
+from config.models import LLMConfig
+
 class LLMClient(ABC):
     """Abstract base class for LLM clients."""
     
     @abstractmethod
-    def create_agent(self, name: str, instruction: str, tools: List[Any], config: Optional[Any] = None) -> Any:
+    def create_agent(self, name: str, instruction: Union[str, Callable[..., str]], tools: List[Any], config: Optional[Any] = None, before_model_callback: Optional[Callable[..., Any]] = None) -> Any:
         """Creates and returns an agent instance."""
         pass
 
@@ -17,12 +19,23 @@ class GeminiADKClient(LLMClient):
     def __init__(self, model_name: str):
         self.model_name = model_name
         
-    def create_agent(self, name: str, instruction: str, tools: List[Any], config: Optional[types.GenerateContentConfig] = None) -> Agent:
+    def create_agent(self, name: str, instruction: Union[str, Callable[..., str]], tools: List[Any], config: Optional[types.GenerateContentConfig] = None, before_model_callback: Optional[Callable[..., Any]] = None) -> Agent:
         """Creates a Google ADK Agent."""
         return Agent(
             model=self.model_name,
             name=name,
             instruction=instruction,
             tools=tools,
-            generate_content_config=config
+            generate_content_config=config,
+            before_model_callback=before_model_callback,
         )
+
+
+def create_llm_client(config: LLMConfig) -> LLMClient:
+    """Builds the LLM client selected by ``llm.provider``."""
+    if config.provider == "gemini":
+        return GeminiADKClient(model_name=config.model)
+    if config.provider == "offline":
+        from .offline_llm import OfflineLLMClient
+        return OfflineLLMClient(model_name=config.model, settings=config.offline)
+    raise ValueError(f"Unknown LLM provider: {config.provider}")
@@ -0,0 +1,96 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Upper bounds (seconds or counts) shared by all histograms
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _key(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "buckets": {str(b): c for b, c in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry (counters, gauges, histograms).
+
+    Gauges can be registered as callbacks so they are computed only when read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, fn: Callable[[], float], **labels: Any) -> None:
+        """Registers (or replaces) a gauge computed by ``fn`` on read."""
+        with self._lock:
+            self._gauges[_key(name, labels)] = fn
+
+    def observe(self, name: str, value: float, buckets: Optional[Tuple[float, ...]] = None, **labels: Any) -> None:
+        """Records ``value``; ``buckets`` only applies when the histogram is first created."""
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(buckets or DEFAULT_BUCKETS)
+            hist.observe(value)
+
+    def get(self, name: str, **labels: Any) -> float:
+        """Returns the current value of a counter (0 if never incremented)."""
+        return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {k: h.snapshot() for k, h in self._histograms.items()}
+        return {
+            "counters": counters,
+            "gauges": {k: fn() for k, fn in gauges.items()},
+            "histograms": histograms,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+# Process-wide registry
+metrics = Metrics()
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple, Union
+
+from google.adk import Agent
+from google.adk.models.base_llm import BaseLlm, LlmCapabilities
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from pydantic import PrivateAttr
+
+from config.models import OfflineLLMConfig, ScriptRule
+from .llm_client import LLMClient
+
+# Conversation ids, ticket ids etc. differ between runs; mask them in cassette keys
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE)
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _strip_ids(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_ids(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [_strip_ids(v) for v in value]
+    return value
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """Stable fingerprint of what the model sees: system instruction, contents and tool names."""
+    config = llm_request.config
+    tools = []
+    if config and config.tools:
+        for tool in config.tools:
+            tools += [d.name for d in (getattr(tool, "function_declarations", None) or [])]
+    payload = {
+        "system": str(config.system_instruction) if config and config.system_instruction else None,
+        "contents": [_strip_ids(c.model_dump(mode="json", exclude_none=True)) for c in llm_request.contents],
+        "tools": sorted(tools),
+    }
+    normalized = _UUID.sub("<id>", json.dumps(payload, sort_keys=True, ensure_ascii=False))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class OfflineLlm(BaseLlm):
+    """
+    Model backend that needs no network.
+
+    * ``record`` forwards to the real model named by ``model`` and appends
+      every request/response pair to the cassette (JSON lines).
+    * ``replay`` serves responses from the cassette by request fingerprint,
+      after ``latency_seconds``; unknown requests raise ``CassetteMiss``.
+    * ``scripted`` answers from regex rules (reply text or a tool call).
+    """
+
+    settings: OfflineLLMConfig = OfflineLLMConfig()
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _cassette: Optional[Dict[str, List[List[Dict[str, Any]]]]] = PrivateAttr(default=None)
+    _served: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _rules: Optional[List[Tuple[ScriptRule, "re.Pattern[str]"]]] = PrivateAttr(default=None)
+    _inner: Optional[BaseLlm] = PrivateAttr(default=None)
+
+    @property
+    def capabilities(self) -> LlmCapabilities:
+        return LlmCapabilities(output_schema_and_tools=True)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        mode = self.settings.mode
+        if mode == "record":
+            async for response in self._record(llm_request, stream):
+                yield response
+            return
+
+        if mode == "replay":
+            responses = self._replay(llm_request)
+        elif mode == "scripted":
+            responses = [self._scripted(llm_request)]
+        else:
+            raise ValueError(f"Unknown offline LLM mode: {mode}")
+
+        if self.settings.latency_seconds > 0:
+            await asyncio.sleep(self.settings.latency_seconds)
+        for response in responses:
+            yield response
+
+    # Record / replay
+
+    async def _record(self, llm_request: LlmRequest, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        if self._inner is None:
+            self._inner = LLMRegistry.new_llm(self.model)
+        key = request_key(llm_request)
+        recorded = []
+        async for response in self._inner.generate_content_async(llm_request, stream):
+            if not response.partial:
+                recorded.append(response.model_dump(mode="json", exclude_none=True))
+            yield response
+
+        line = json.dumps({"key": key, "responses": recorded}, ensure_ascii=False)
+        path = self.settings.cassette
+        with self._lock:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _load_cassette(self) -> Dict[str, List[List[Dict[str, Any]]]]:
+        with self._lock:
+            if self._cassette is None:
+                cassette: Dict[str, List[List[Dict[str, Any]]]] = {}
+                with open(self.settings.cassette, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            cassette.setdefault(entry["key"], []).append(entry["responses"])
+                self._cassette = cassette
+            return self._cassette
+
+    def _replay(self, llm_request: LlmRequest) -> List[LlmResponse]:
+        key = request_key(llm_request)
+        recordings = self._load_cassette().get(key)
+        if not recordings:
+            raise CassetteMiss(f"No recorded response for request {key[:12]} in {self.settings.cassette}")
+        # The same request recorded several times is replayed in order, then the last one repeats
+        with self._lock:
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+        return [LlmResponse.model_validate(data) for data in recordings[min(index, len(recordings) - 1)]]
+
+    # Scripted
+
+    def _compiled_rules(self) -> List[Tuple[ScriptRule, "re.Pattern[str]"]]:
+        if self._rules is None:
+            self._rules = [(rule, re.compile(rule.match)) for rule in self.settings.rules]
+        return self._rules
+
+    def _scripted(self, llm_request: LlmRequest) -> LlmResponse:
+        last = llm_request.contents[-1] if llm_request.contents else None
+        tool_results = [p.function_response.name for p in (last.parts or []) if p.function_response] if last else []
+        if tool_results:
+            trigger, subject = "tool", tool_results[-1]
+        else:
+            trigger = "user"
+            subject = " ".join(p.text for p in (last.parts or []) if p.text) if last else ""
+
+        part = types.Part(text=self.settings.default_reply)
+        for rule, pattern in self._compiled_rules():
+            if rule.on != trigger:
+                continue
+            match = pattern.search(subject)
+            if match is None:
+                continue
+            groups = [match.group(0), *match.groups()]
+            named = {k: v or "" for k, v in match.groupdict().items()}
+            fill = lambda template: template.format(*groups, text=subject, **named)
+            if rule.call:
+                part = types.Part(function_call=types.FunctionCall(
+                    name=rule.call, args={k: fill(v) for k, v in rule.args.items()},
+                ))
+            else:
+                part = types.Part(text=fill(rule.reply or self.settings.default_reply))
+            break
+
+        # Rough usage so token accounting works offline too
+        config = llm_request.config
+        prompt = "".join(p.text or "" for c in llm_request.contents for p in (c.parts or []))
+        if config and config.system_instruction:
+            prompt += str(config.system_instruction)
+        if part.function_call is not None:
+            output = json.dumps(part.function_call.args)
+        else:
+            output = part.text or ""
+        prompt_tokens, output_tokens = _estimate_tokens(prompt), _estimate_tokens(output)
+        return LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
+
+
+class OfflineLLMClient(LLMClient):
+    """LLMClient backed by ``OfflineLlm`` (record / replay / scripted)."""
+
+    def __init__(self, model_name: str, settings: OfflineLLMConfig):
+        self.model = OfflineLlm(model=model_name, settings=settings)
+
+    def create_agent(self, name: str, instruction: Union[str, Callable[..., str]], tools: List[Any], config: Optional[types.GenerateContentConfig] = None, before_model_callback: Optional[Callable[..., Any]] = None) -> Agent:
+        """Creates a Google ADK Agent that runs on the offline model."""
+        return Agent(
+            model=self.model,
+            name=name,
+            instruction=instruction,
+            tools=tools,
+            generate_content_config=config,
+            before_model_callback=before_model_callback,
+        )
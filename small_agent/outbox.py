@@ -0,0 +1,245 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from config.models import OutboxConfig
+from .metrics import metrics
+from .state import AgentState, Ticket, TicketStatus
+
+# Called with (conversation_id, ticket) whenever a ticket is delivered or gives up
+TicketListener = Callable[[str, Ticket], None]
+
+
+class EscalationOutbox:
+    """
+    Durable outbox for escalation tickets.
+
+    ``enqueue`` only writes a row to SQLite, so escalating never waits on the
+    ticket system. ``run`` (a background task) posts due tickets to the sink
+    in batches of ``batch_size``::
+
+        POST {sink_url}  {"tickets": [{"ticket_id": ..., "conversation_id": ..., ...}]}
+
+    A 2xx response delivers the whole batch; the body may carry
+    ``{"results": [{"ticket_id": ..., "external_id": ..., "url": ...}]}``.
+    Network errors, 408, 429 and 5xx are retried with exponential backoff
+    (with jitter) up to ``max_attempts``; other 4xx fail the batch at once.
+    Tickets are keyed by ticket id, so escalating the same conversation twice
+    queues one ticket. Delivery is at-least-once: the sink should dedupe on
+    ``ticket_id``.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS outbox (
+        ticket_id TEXT PRIMARY KEY,
+        conversation_id TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        last_error TEXT,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+    """
+
+    def __init__(self, config: OutboxConfig, on_update: Optional[TicketListener] = None):
+        if not config.sink_url:
+            raise ValueError("outbox.sink_url is required when the outbox is enabled")
+        self.config = config
+        self.on_update = on_update
+        if os.path.dirname(config.path):
+            os.makedirs(os.path.dirname(config.path), exist_ok=True)
+        self._db = sqlite3.connect(config.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+        self._lock = threading.Lock()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        metrics.gauge("escalation_outbox_pending", lambda: self.pending_count())
+
+    # Producer side
+
+    def enqueue(self, state: AgentState, payload: Dict[str, Any]) -> bool:
+        """
+        Queues ``payload`` (which must carry ``ticket_id``) and marks the
+        conversation's ticket as pending. Returns False for a duplicate.
+        """
+        ticket_id = payload["ticket_id"]
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO outbox (ticket_id, conversation_id, payload, status, next_attempt_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (ticket_id, state.conversation_id, json.dumps(payload, ensure_ascii=False),
+                 TicketStatus.PENDING.value, now, now),
+            )
+        if cursor.rowcount == 0:
+            metrics.inc("escalation_outbox_duplicates_total")
+            return False
+
+        metrics.inc("escalation_outbox_enqueued_total")
+        state.ticket = Ticket(ticket_id=ticket_id)
+        state.touch()
+        self._wake()
+        return True
+
+    def _wake(self) -> None:
+        if self._loop is None or self._wakeup is None:
+            return
+        # Tools may run on a worker thread
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = ?", (TicketStatus.PENDING.value,)
+            ).fetchone()[0]
+
+    def get(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """The outbox row for ``ticket_id`` (status, attempts, last_error, payload)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT ticket_id, conversation_id, payload, status, attempts, last_error FROM outbox WHERE ticket_id = ?",
+                (ticket_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "ticket_id": row[0], "conversation_id": row[1], "payload": json.loads(row[2]),
+            "status": row[3], "attempts": row[4], "last_error": row[5],
+        }
+
+    # Dispatch
+
+    def _due(self, limit: int) -> List[Tuple[str, str, Dict[str, Any], int]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ticket_id, conversation_id, payload, attempts FROM outbox"
+                " WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at, created_at LIMIT ?",
+                (TicketStatus.PENDING.value, time.time(), limit),
+            ).fetchall()
+        return [(ticket_id, cid, json.loads(payload), attempts) for ticket_id, cid, payload, attempts in rows]
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.config.backoff_max_seconds, self.config.backoff_base_seconds * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _settle(self, batch: List[Tuple[str, str, Dict[str, Any], int]], results: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = NULL WHERE ticket_id = ?",
+                [(TicketStatus.DELIVERED.value, ticket_id) for ticket_id, *_ in batch],
+            )
+        metrics.inc("escalation_tickets_delivered_total", len(batch))
+        for ticket_id, conversation_id, _, attempts in batch:
+            result = results.get(ticket_id, {})
+            self._notify(conversation_id, Ticket(
+                ticket_id=ticket_id,
+                status=TicketStatus.DELIVERED,
+                attempts=attempts + 1,
+                external_id=result.get("external_id"),
+                url=result.get("url"),
+            ))
+
+    def _retry(self, batch: List[Tuple[str, str, Dict[str, Any], int]], error: str, retryable: bool) -> None:
+        now = time.time()
+        updates = []
+        for ticket_id, conversation_id, _, attempts in batch:
+            attempts += 1
+            if retryable and attempts < self.config.max_attempts:
+                updates.append((TicketStatus.PENDING.value, error, now + self._backoff(attempts), ticket_id))
+                metrics.inc("escalation_ticket_retries_total")
+                continue
+            updates.append((TicketStatus.FAILED.value, error, now, ticket_id))
+            metrics.inc("escalation_tickets_failed_total")
+            self._notify(conversation_id, Ticket(
+                ticket_id=ticket_id, status=TicketStatus.FAILED, attempts=attempts, error=error,
+            ))
+        with self._lock:
+            self._db.executemany(
+                "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ?, next_attempt_at = ? WHERE ticket_id = ?",
+                updates,
+            )
+
+    def _notify(self, conversation_id: str, ticket: Ticket) -> None:
+        if self.on_update is not None:
+            self.on_update(conversation_id, ticket)
+
+    async def _send(self, batch: List[Tuple[str, str, Dict[str, Any], int]]) -> None:
+        assert self._client is not None
+        started = time.perf_counter()
+        try:
+            response = await self._client.post(
+                self.config.sink_url,
+                json={"tickets": [payload for _, _, payload, _ in batch]},
+                headers=self.config.headers,
+            )
+        except httpx.HTTPError as e:
+            self._retry(batch, f"{type(e).__name__}: {e}", retryable=True)
+            return
+        finally:
+            metrics.observe("escalation_dispatch_seconds", time.perf_counter() - started)
+
+        if response.is_success:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            results = body.get("results", []) if isinstance(body, dict) else []
+            self._settle(batch, {r["ticket_id"]: r for r in results if isinstance(r, dict) and "ticket_id" in r})
+            return
+        retryable = response.status_code in (408, 429) or response.status_code >= 500
+        self._retry(batch, f"HTTP {response.status_code}: {response.text[:200]}", retryable)
+
+    async def dispatch(self) -> int:
+        """Sends every due ticket in batches; returns how many were attempted."""
+        attempted = 0
+        while True:
+            batch = self._due(self.config.batch_size)
+            if not batch:
+                return attempted
+            await self._send(batch)
+            attempted += len(batch)
+            if len(batch) < self.config.batch_size:
+                return attempted
+
+    # Lifecycle
+
+    async def run(self) -> None:
+        """Dispatch loop; wakes on enqueue or every ``flush_interval_seconds``."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._client = httpx.AsyncClient(timeout=self.config.timeout_seconds)
+        try:
+            while True:
+                try:
+                    await self.dispatch()
+                except sqlite3.Error:
+                    metrics.inc("escalation_outbox_errors_total")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.config.flush_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            await self._client.aclose()
+            self._client = None
+
+    def close(self) -> None:
+        """Closes the database; undelivered tickets are sent on the next start."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,128 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+
+from config.compiled import CompiledConfig, compile_config
+from config.loader import read_config
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from google.adk import Agent
+    from google.adk.runners import Runner
+    from google.adk.sessions.base_session_service import BaseSessionService
+
+DEFAULT_TENANT = "default"
+
+_TENANT_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UnknownTenantError(KeyError):
+    """Raised when no config exists for a tenant id."""
+
+
+@dataclass
+class TenantRuntime:
+    """Everything needed to run turns for one tenant."""
+
+    tenant_id: str
+    config_provider: Callable[[], CompiledConfig]
+    agent: "Agent"
+    runner: "Runner"
+    config_path: Optional[str] = None
+
+    @property
+    def snapshot(self) -> CompiledConfig:
+        return self.config_provider()
+
+
+class AgentRegistry:
+    """
+    Lazily builds and caches one agent + runner per tenant.
+
+    Tenant configs are read from ``{directory}/{tenant_id}.yaml`` on first
+    use. At most ``max_cached`` tenants stay built; the least recently used
+    is dropped and rebuilt on its next request. The default tenant is
+    supplied by the caller and is never evicted.
+    """
+
+    def __init__(
+        self,
+        session_service: "BaseSessionService",
+        app_name: str,
+        default: TenantRuntime,
+        directory: str = "config/tenants",
+        max_cached: int = 32,
+    ):
+        self.session_service = session_service
+        self.app_name = app_name
+        self.default = default
+        self.directory = directory
+        self.max_cached = max_cached
+        self._runtimes: "OrderedDict[str, TenantRuntime]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        metrics.gauge("tenants_cached", lambda: len(self._runtimes))
+
+    def config_path(self, tenant_id: str) -> str:
+        if not _TENANT_ID.match(tenant_id):
+            raise UnknownTenantError(tenant_id)
+        return os.path.join(self.directory, f"{tenant_id}.yaml")
+
+    def exists(self, tenant_id: Optional[str]) -> bool:
+        if tenant_id in (None, DEFAULT_TENANT):
+            return True
+        try:
+            return os.path.exists(self.config_path(tenant_id))
+        except UnknownTenantError:
+            return False
+
+    def get(self, tenant_id: Optional[str] = None) -> TenantRuntime:
+        """Returns the runtime for a tenant, building it if needed."""
+        if tenant_id in (None, DEFAULT_TENANT):
+            return self.default
+
+        with self._lock:
+            runtime = self._runtimes.get(tenant_id)
+            if runtime is not None:
+                self._runtimes.move_to_end(tenant_id)
+                return runtime
+
+        # Build outside the lock; a concurrent build of the same tenant is
+        # harmless and the first one to finish wins.
+        runtime = self._build(tenant_id)
+        with self._lock:
+            existing = self._runtimes.get(tenant_id)
+            if existing is not None:
+                return existing
+            self._runtimes[tenant_id] = runtime
+            while len(self._runtimes) > self.max_cached:
+                self._runtimes.popitem(last=False)
+                metrics.inc("tenants_evicted_total")
+        return runtime
+
+    def _build(self, tenant_id: str) -> TenantRuntime:
+        from google.adk.runners import Runner
+        from .agent import build_agent
+
+        path = self.config_path(tenant_id)
+        if not os.path.exists(path):
+            raise UnknownTenantError(tenant_id)
+        snapshot = compile_config(read_config(path))
+        agent = build_agent(lambda: snapshot)
+        runner = Runner(agent=agent, app_name=self.app_name, session_service=self.session_service)
+        metrics.inc("tenants_built_total")
+        return TenantRuntime(
+            tenant_id=tenant_id,
+            config_provider=lambda: snapshot,
+            agent=agent,
+            runner=runner,
+            config_path=path,
+        )
+
+    def invalidate(self, tenant_id: str) -> None:
+        """Drops a cached tenant so its config is re-read on next use."""
+        with self._lock:
+            self._runtimes.pop(tenant_id, None)
@@ -0,0 +1,155 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from config.models import AdmissionConfig
+from .metrics import metrics
+from .telemetry import flow_digest, queue_wait, span
+
+
+class AdmissionRejected(Exception):
+    """Raised when a turn is shed instead of queued (maps to HTTP 429/503)."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("tag", "seq", "flow", "future")
+
+    def __init__(self, tag: float, seq: int, flow: str, future: asyncio.Future):
+        self.tag = tag
+        self.seq = seq
+        self.flow = flow
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.tag, self.seq) < (other.tag, other.seq)
+
+
+class AdmissionController:
+    """
+    Global cap on concurrent agent turns with weighted fair queueing.
+
+    Up to ``max_concurrent_turns`` turns run at once. Others wait in a bounded
+    queue ordered by virtual finish time per flow (tenant or API key), so a
+    flow with weight 2 gets twice the share of a flow with weight 1 and one
+    noisy flow cannot starve the rest. Requests are shed instead of queued:
+    503 when the queue is full or the expected wait exceeds the deadline,
+    429 when a single flow has too many requests queued.
+    """
+
+    def __init__(self, config: Optional[AdmissionConfig] = None):
+        self.config = config or AdmissionConfig()
+        self._active = 0
+        self._queue: List[_Waiter] = []
+        self._queued = 0
+        self._queued_per_flow: Dict[str, int] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        # Moving average of how long a turn holds a slot, for wait estimates
+        self._avg_service_seconds = 1.0
+
+        metrics.gauge("llm_queue_depth", lambda: self._queued)
+        metrics.gauge("llm_active_turns", lambda: self._active)
+
+    def _weight(self, flow: str) -> float:
+        return max(self.config.weights.get(flow, 1.0), 1e-6)
+
+    def expected_wait(self) -> float:
+        """Rough wait for a newly queued request, in seconds."""
+        return (self._queued + 1) / self.config.max_concurrent_turns * self._avg_service_seconds
+
+    def check(self, flow: str) -> None:
+        """Raises AdmissionRejected if a request for ``flow`` would be shed right now."""
+        if self._active < self.config.max_concurrent_turns and not self._queued:
+            return
+        retry_after = self.expected_wait()
+        if self._queued >= self.config.max_queue:
+            metrics.inc("llm_admission_rejected_total", reason="queue_full")
+            raise AdmissionRejected(503, "Server busy, try again later", retry_after)
+        if self._queued_per_flow.get(flow, 0) >= self.config.max_queued_per_flow:
+            metrics.inc("llm_admission_rejected_total", reason="flow_limit")
+            raise AdmissionRejected(429, "Too many queued requests for this client", retry_after)
+        if retry_after > self.config.max_wait_seconds:
+            metrics.inc("llm_admission_rejected_total", reason="deadline")
+            raise AdmissionRejected(503, "Server busy, try again later", retry_after)
+
+    async def acquire(self, flow: str) -> None:
+        """Waits for a turn slot (fair across flows) or raises AdmissionRejected."""
+        started = time.monotonic()
+        self.check(flow)
+        if self._active < self.config.max_concurrent_turns and not self._queued:
+            self._active += 1
+            metrics.observe("llm_queue_wait_seconds", 0.0)
+            return
+
+        tag = max(self._virtual_time, self._last_finish.get(flow, 0.0)) + 1.0 / self._weight(flow)
+        self._last_finish[flow] = tag
+        waiter = _Waiter(tag, next(self._seq), flow, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, waiter)
+        self._queued += 1
+        self._queued_per_flow[flow] = self._queued_per_flow.get(flow, 0) + 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.config.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just as we gave up; hand it on
+                self.release()
+            else:
+                waiter.future.cancel()
+                self._dequeued(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.inc("llm_admission_rejected_total", reason="timeout")
+                raise AdmissionRejected(503, "Timed out waiting for capacity", self.expected_wait()) from None
+            raise
+        metrics.observe("llm_queue_wait_seconds", time.monotonic() - started)
+
+    def _dequeued(self, waiter: _Waiter) -> None:
+        self._queued -= 1
+        remaining = self._queued_per_flow[waiter.flow] - 1
+        if remaining:
+            self._queued_per_flow[waiter.flow] = remaining
+        else:
+            del self._queued_per_flow[waiter.flow]
+
+    def release(self) -> None:
+        """Frees a slot and hands it to the waiter with the smallest finish tag."""
+        self._active -= 1
+        while self._queue:
+            waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                # Cancelled or timed out; already accounted for
+                continue
+            self._dequeued(waiter)
+            self._virtual_time = waiter.tag
+            self._active += 1
+            waiter.future.set_result(None)
+            return
+        if not self._active:
+            # Idle: reset virtual time so old finish tags don't linger
+            self._virtual_time = 0.0
+            self._last_finish.clear()
+
+    @asynccontextmanager
+    async def slot(self, flow: str) -> AsyncIterator[None]:
+        """Holds a turn slot for the duration of the block."""
+        with span("admission.wait", **{"flow.hash": flow_digest(flow)}):
+            requested = time.monotonic()
+            await self.acquire(flow)
+        started = time.monotonic()
+        queue_wait.record(started - requested)
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._avg_service_seconds = 0.9 * self._avg_service_seconds + 0.1 * elapsed
+            self.release()
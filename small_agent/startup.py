@@ -0,0 +1,119 @@
+"""
+Startup timing: where import and initialization time goes.
+
+    python -m small_agent.startup [--module small_agent.api] [--top 15]
+
+Prints a JSON report with the import cost of ``--module`` (measured in a
+fresh interpreter with ``-X importtime``, grouped by top-level package and
+by slowest module) and the time of each initialization phase of the API
+(config, store, root agent, runner, services).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from .metrics import metrics
+
+
+class StartupTimer:
+    """Records the wall time of named startup phases, in order."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def export(self) -> None:
+        """Publishes the phases as ``startup_seconds{phase=...}`` gauges."""
+        for name, seconds in self.phases.items():
+            metrics.gauge("startup_seconds", lambda seconds=seconds: seconds, phase=name)
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parses ``-X importtime`` output into ``{module, self_us, cumulative_us}`` rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header row
+        rows.append({
+            "module": parts[2].strip(),
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+    return rows
+
+
+def import_report(module: str, top: int = 15) -> Dict[str, Any]:
+    """Imports ``module`` in a fresh interpreter and summarizes where the time went."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.getcwd(),
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = parse_importtime(result.stderr)
+    by_package: Dict[str, int] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        if package in ("google", "small_agent", "config"):
+            # Namespace packages: group one level deeper (google.adk, google.genai, ...)
+            package = ".".join(row["module"].split(".")[:2])
+        by_package[package] = by_package.get(package, 0) + row["self_us"]
+
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    slowest = sorted(rows, key=lambda row: row["self_us"], reverse=True)[:top]
+    return {
+        "module": module,
+        "interpreter_wall_ms": wall * 1000,
+        "total_ms": sum(row["self_us"] for row in rows) / 1000,
+        "modules": len(rows),
+        "by_package_ms": {name: us / 1000 for name, us in packages},
+        "slowest_modules_ms": {row["module"]: row["self_us"] / 1000 for row in slowest},
+    }
+
+
+def init_report() -> Dict[str, Any]:
+    """Imports the API in this process and times each initialization phase."""
+    timer = StartupTimer()
+    with timer.phase("import"):
+        from . import api
+    api._initialize()
+    phases = {"import": timer.phases["import"], **api.startup.phases}
+    return {
+        "phases_ms": {name: seconds * 1000 for name, seconds in phases.items()},
+        "total_ms": sum(phases.values()) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="small_agent.api", help="module whose import cost is measured")
+    parser.add_argument("--top", type=int, default=15, help="packages / modules to list")
+    parser.add_argument("--no-init", action="store_true", help="skip building the agent and services")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"imports": import_report(args.module, args.top)}
+    if not args.no_init:
+        report["init"] = init_report()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
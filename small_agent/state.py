@@ -1,28 +1,126 @@
-from typing import Dict, List, Optional
+import time
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from .transcript import Transcript
 
 class ConversationStatus(str, Enum):
     COLLECTING = "COLLECTING"
     ESCALATED = "ESCALATED"
     COMPLETED = "COMPLETED"
 
+class TicketStatus(str, Enum):
+    PENDING = "PENDING"
+    DELIVERED = "DELIVERED"
+    FAILED = "FAILED"
+
+class Ticket(BaseModel):
+    """Escalation ticket as tracked by the outbox (see outbox.py)."""
+
+    ticket_id: str
+    status: TicketStatus = TicketStatus.PENDING
+    attempts: int = 0
+    # Set by the ticket system on delivery
+    external_id: Optional[str] = None
+    url: Optional[str] = None
+    error: Optional[str] = None
+
+class TurnUsage(BaseModel):
+    """Model usage for one turn, or accumulated over a conversation."""
+
+    turns: int = 0
+    model_calls: int = 0
+    tool_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+    def add_model_call(self, usage_metadata: Any = None) -> None:
+        """Counts one model response and the tokens it reports, if any."""
+        self.model_calls += 1
+        for name, reported in (
+            ("prompt_tokens", "prompt_token_count"),
+            ("completion_tokens", "candidates_token_count"),
+            ("total_tokens", "total_token_count"),
+        ):
+            value = getattr(usage_metadata, reported, None)
+            if isinstance(value, int):
+                setattr(self, name, getattr(self, name) + value)
+
+    def add(self, other: "TurnUsage") -> None:
+        for name in TurnUsage.model_fields:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
 class AgentState(BaseModel):
+    # Validate assignment so ``state.messages = [...]`` still yields a Transcript
+    model_config = ConfigDict(validate_assignment=True)
+
     conversation_id: str
+    tenant_id: Optional[str] = None
     status: ConversationStatus = ConversationStatus.COLLECTING
     collected_fields: Dict[str, str] = Field(default_factory=dict)
     summary: Optional[str] = None
-    messages: List[Dict[str, str]] = Field(default_factory=list)
+    # Chat history as shown to clients (compact, append-only). Only the first
+    # ``archived_messages`` (compacted out of the ADK session) are persisted
+    # with the state; durable stores rebuild the rest from the session events
+    # (see compaction.event_messages), so each message is stored once.
+    messages: Transcript = Field(default_factory=Transcript)
+    archived_messages: int = 0
+    # Bumped on every change; used for ETags and render caches
+    revision: int = 0
+    # Wall-clock time of the last change (epoch seconds); orders the activity index
+    updated_at: float = Field(default_factory=time.time)
+    # Accumulated model usage, and the usage of the most recent turn
+    usage: TurnUsage = Field(default_factory=TurnUsage)
+    last_turn_usage: Optional[TurnUsage] = None
+    # Escalation ticket, once queued for delivery
+    ticket: Optional[Ticket] = None
+    # Long-running tool calls awaiting a response: call id -> tool name
+    pending_calls: Dict[str, str] = Field(default_factory=dict)
+    # (revision, snapshot, text) of the last rendered instruction; not persisted
+    _instruction_cache: Optional[Tuple[int, Any, str]] = PrivateAttr(default=None)
+    # Config snapshot of the turn in progress (see agent.pinned_snapshot); not persisted
+    _turn_snapshot: Optional[Any] = PrivateAttr(default=None)
+
+    def touch(self) -> None:
+        """Marks the state as changed."""
+        self.revision += 1
+        self.updated_at = time.time()
+
+    def add_message(self, role: str, text: str) -> None:
+        """Appends a message to the history."""
+        self.messages.add(role, text)
+        self.touch()
+
+    def record_usage(self, turn: TurnUsage) -> None:
+        """Adds one turn's usage to the conversation totals."""
+        self.last_turn_usage = turn
+        self.usage.add(turn)
+        self.touch()
 
-    def is_complete(self, required_fields: List[str]) -> bool:
+    def etag(self) -> str:
+        """Weak validator covering status, fields, summary and history length."""
+        # Stable across processes (unlike hash()), so any worker can validate it
+        fingerprint = zlib.crc32(repr((
+            self.status.value,
+            self.summary,
+            len(self.messages),
+            sorted(self.collected_fields.items()),
+        )).encode())
+        return f'W/"{self.revision}-{fingerprint:08x}"'
+
+    def is_complete(self, required_fields: Iterable[str]) -> bool:
         """
         Checks if all required fields have been collected.
+
+        ``required_fields`` must already be lower-cased (see
+        ``CompiledConfig.required_fields``).
         """
         if self.status in [ConversationStatus.ESCALATED, ConversationStatus.COMPLETED]:
             return True
-            
+
         # Check if all required fields are in collected_fields and have a non-empty value
-        for field in required_fields:
-            if field.lower() not in self.collected_fields or not self.collected_fields[field.lower()]:
-                return False
-        return True
+        collected = self.collected_fields
+        return all(collected.get(field) for field in required_fields)
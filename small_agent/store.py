@@ -0,0 +1,767 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.sessions.session import Session
+
+from config.models import SessionLimitsConfig, StorageConfig
+from .compaction import event_messages
+from .indexes import ConversationIndex, IndexEntry, decode_cursor, encode_cursor, normalize_value
+from .metrics import metrics
+from .state import AgentState, ConversationStatus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (ConversationStatus.ESCALATED, ConversationStatus.COMPLETED)
+
+
+class ConversationStore(MutableMapping, ABC):
+    """
+    Storage interface for conversation state and ADK session events.
+
+    The store behaves like a ``Dict[str, AgentState]`` keyed by conversation id.
+    Loaded states are kept resident so the API and the agent tools share the
+    same ``AgentState`` object; call ``save`` after mutating one in place.
+
+    Resident memory is bounded by ``limits``: conversations idle for longer
+    than the TTL (or the shorter terminal TTL once ESCALATED/COMPLETED) expire,
+    and the least recently used ones are evicted beyond the cap. Durable
+    stores spill evicted conversations to disk and reload them on access;
+    in-memory stores drop them.
+    """
+
+    #: Whether data written to this store survives a process restart.
+    durable: bool = False
+
+    def __init__(self, limits: Optional[SessionLimitsConfig] = None):
+        self.limits = limits or SessionLimitsConfig()
+        # Ordered from least to most recently used
+        self._resident: "OrderedDict[str, AgentState]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._pinned: Dict[str, int] = {}
+        self._eviction_listeners: List[Callable[[str, str], None]] = []
+        self._lock = threading.RLock()
+
+        metrics.gauge("conversations_resident", lambda: self.resident_count)
+        metrics.gauge("conversation_messages_resident", lambda: sum(len(s.messages) for s in list(self._resident.values())))
+        metrics.gauge("conversation_transcript_bytes_resident", lambda: sum(s.messages.nbytes for s in list(self._resident.values())))
+
+    # Backend hooks
+
+    @abstractmethod
+    def _load(self, conversation_id: str) -> Optional[AgentState]:
+        """Loads a state that is not resident, or returns None."""
+
+    @abstractmethod
+    def _write(self, state: AgentState) -> None:
+        """Persists a state (may be deferred)."""
+
+    @abstractmethod
+    def _remove(self, conversation_id: str) -> None:
+        """Removes a state from the backend."""
+
+    @abstractmethod
+    def _stored_ids(self) -> Set[str]:
+        """Returns the ids known to the backend."""
+
+    @abstractmethod
+    def _exists(self, conversation_id: str) -> bool:
+        """Whether the backend holds a state, without loading it."""
+
+    @abstractmethod
+    def query_index(
+        self,
+        status: Optional[str] = None,
+        fields: Optional[Dict[str, str]] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[IndexEntry], Optional[str]]:
+        """
+        One page of conversations for ``GET /conversations``, with the
+        semantics of ``ConversationIndex.query`` but returning the entries
+        themselves, so listing never loads (or re-admits) a state.
+        """
+
+    # Mapping interface
+
+    def __getitem__(self, conversation_id: str) -> AgentState:
+        with self._lock:
+            state = self._resident.get(conversation_id)
+            if state is None:
+                state = self._load(conversation_id)
+                if state is None:
+                    raise KeyError(conversation_id)
+                self._admit(state)
+            else:
+                self._touch(conversation_id)
+            return state
+
+    def __setitem__(self, conversation_id: str, state: AgentState) -> None:
+        with self._lock:
+            self._write(state)
+            self._admit(state)
+
+    def __delitem__(self, conversation_id: str) -> None:
+        with self._lock:
+            if conversation_id not in self:
+                raise KeyError(conversation_id)
+            self._resident.pop(conversation_id, None)
+            self._last_access.pop(conversation_id, None)
+            self._remove(conversation_id)
+
+    def __contains__(self, conversation_id: object) -> bool:
+        # An existence check never loads or admits the state
+        with self._lock:
+            return conversation_id in self._resident or (
+                isinstance(conversation_id, str) and self._exists(conversation_id)
+            )
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            ids = set(self._resident) | self._stored_ids()
+        return iter(ids)
+
+    def __len__(self) -> int:
+        """Every conversation, resident or stored (reads every stored id; see ``resident_count``)."""
+        with self._lock:
+            return len(set(self._resident) | self._stored_ids())
+
+    @property
+    def resident_count(self) -> int:
+        """Conversations currently held in memory."""
+        return len(self._resident)
+
+    def save(self, state: AgentState) -> None:
+        """Records that a resident state was mutated in place."""
+        with self._lock:
+            self._write(state)
+            if state.conversation_id in self._resident:
+                self._touch(state.conversation_id)
+            else:
+                self._admit(state)
+
+    # Eviction
+
+    def add_eviction_listener(self, listener: Callable[[str, str], None]) -> None:
+        """Registers ``listener(conversation_id, reason)`` called after an eviction."""
+        self._eviction_listeners.append(listener)
+
+    @contextmanager
+    def pinned(self, conversation_id: str) -> Iterator[None]:
+        """Protects a conversation from eviction while a turn is running."""
+        with self._lock:
+            self._pinned[conversation_id] = self._pinned.get(conversation_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                remaining = self._pinned.pop(conversation_id) - 1
+                if remaining:
+                    self._pinned[conversation_id] = remaining
+
+    def _touch(self, conversation_id: str) -> None:
+        self._resident.move_to_end(conversation_id)
+        self._last_access[conversation_id] = time.monotonic()
+
+    def _admit(self, state: AgentState) -> None:
+        self._resident[state.conversation_id] = state
+        self._touch(state.conversation_id)
+        self._evict_lru(keep=state.conversation_id)
+
+    def _ttl(self, state: AgentState) -> float:
+        if state.status in TERMINAL_STATUSES:
+            return min(self.limits.terminal_ttl_seconds, self.limits.idle_ttl_seconds)
+        return self.limits.idle_ttl_seconds
+
+    def _evict_lru(self, keep: str) -> None:
+        """Evicts idle conversations and enforces the cap, oldest first."""
+        now = time.monotonic()
+        excess = len(self._resident) - self.limits.max_conversations
+        victims = []
+        for conversation_id, state in self._resident.items():
+            if conversation_id in self._pinned or conversation_id == keep:
+                continue
+            if now - self._last_access[conversation_id] >= self._ttl(state):
+                victims.append((conversation_id, "terminal" if state.status in TERMINAL_STATUSES else "idle"))
+            elif excess - len(victims) > 0:
+                victims.append((conversation_id, "lru"))
+            else:
+                # Everything after this was used more recently; terminal
+                # conversations further along are left to sweep()
+                break
+        for conversation_id, reason in victims:
+            self._evict(conversation_id, reason)
+
+    def sweep(self) -> int:
+        """Expires every conversation past its TTL; returns the number evicted."""
+        with self._lock:
+            now = time.monotonic()
+            victims = [
+                conversation_id
+                for conversation_id, state in self._resident.items()
+                if conversation_id not in self._pinned
+                and now - self._last_access[conversation_id] >= self._ttl(state)
+            ]
+            for conversation_id in victims:
+                state = self._resident[conversation_id]
+                self._evict(conversation_id, "terminal" if state.status in TERMINAL_STATUSES else "idle")
+            return len(victims)
+
+    def _evict(self, conversation_id: str, reason: str) -> None:
+        state = self._resident.pop(conversation_id)
+        self._last_access.pop(conversation_id, None)
+        if self.durable:
+            # Spill: make sure the latest version is written before dropping it
+            self._write(state)
+        else:
+            self._remove(conversation_id)
+        metrics.inc("conversations_evicted_total", reason=reason)
+        for listener in self._eviction_listeners:
+            listener(conversation_id, reason)
+
+    def flush(self) -> None:
+        """Writes any buffered changes to the backend."""
+
+    def close(self) -> None:
+        """Flushes and releases backend resources."""
+        self.flush()
+
+    # ADK session persistence (no-ops for non-durable stores)
+
+    def save_session(self, session: Session) -> None:
+        """Persists session metadata (state, last update time)."""
+
+    def append_session_event(self, session_id: str, event: Event) -> None:
+        """Persists a single session event."""
+
+    def replace_session_events(self, session_id: str, events: List[Event]) -> None:
+        """Replaces all persisted events of a session (used by context compaction)."""
+
+    def load_session(self, session_id: str) -> Optional[Session]:
+        """Loads a session with its events, or returns None."""
+        return None
+
+    def delete_session(self, session_id: str) -> None:
+        """Removes a session and its events."""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Process-local store; everything lives in the resident map, and
+    ``query_index`` is served from a ``ConversationIndex`` kept in step with
+    it (evicted conversations are dropped from both).
+    """
+
+    def __init__(self, limits: Optional[SessionLimitsConfig] = None):
+        super().__init__(limits)
+        self._index = ConversationIndex()
+
+    def _load(self, conversation_id: str) -> Optional[AgentState]:
+        return None
+
+    def _write(self, state: AgentState) -> None:
+        self._index.update(state)
+
+    def _remove(self, conversation_id: str) -> None:
+        self._index.remove(conversation_id)
+
+    def _stored_ids(self) -> Set[str]:
+        return set()
+
+    def _exists(self, conversation_id: str) -> bool:
+        return False
+
+    def query_index(
+        self,
+        status: Optional[str] = None,
+        fields: Optional[Dict[str, str]] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[IndexEntry], Optional[str]]:
+        ids, next_cursor = self._index.query(status, fields, limit, cursor)
+        return self._index.entries(ids), next_cursor
+
+
+class _WriteBatch:
+    """Buffered writes awaiting a flush."""
+
+    def __init__(self):
+        # Serialized state and its index entry, per conversation
+        self.states: Dict[str, Tuple[str, IndexEntry]] = {}
+        self.deleted_states: Set[str] = set()
+        self.sessions: Dict[str, Tuple[str, str, str, float]] = {}
+        self.events: List[Tuple[str, str]] = []
+        self.deleted_sessions: Set[str] = set()
+        # Sessions whose stored events are dropped before ``events`` are written
+        self.reset_events: Set[str] = set()
+
+    def requeue(self, newer: "_WriteBatch") -> None:
+        """Applies ``newer`` on top of this (failed, older) batch, so both can be retried as one."""
+        self.states = {i: data for i, data in self.states.items() if i not in newer.deleted_states}
+        self.states.update(newer.states)
+        self.deleted_states = (self.deleted_states - set(newer.states)) | newer.deleted_states
+        dropped = newer.deleted_sessions | newer.reset_events
+        self.events = [(sid, data) for sid, data in self.events if sid not in dropped] + newer.events
+        # A session deleted here but saved again in ``newer``: keep clearing its old events
+        self.reset_events |= newer.reset_events | (self.deleted_sessions & set(newer.sessions))
+        self.sessions = {sid: meta for sid, meta in self.sessions.items() if sid not in newer.deleted_sessions}
+        self.sessions.update(newer.sessions)
+        self.deleted_sessions = (self.deleted_sessions - set(newer.sessions)) | newer.deleted_sessions
+
+    def __len__(self) -> int:
+        return (
+            len(self.states) + len(self.deleted_states)
+            + len(self.sessions) + len(self.events) + len(self.deleted_sessions)
+            + len(self.reset_events)
+        )
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    SQLite (WAL) store with batched write-behind.
+
+    Writes are serialized immediately but committed by a background thread,
+    either every ``flush_interval`` seconds or once ``batch_size`` writes are
+    pending, so a message turn never waits on an fsync. Repeated saves of the
+    same conversation between flushes are coalesced into one row write.
+
+    The file is owned by one process: resident states are never re-read, so
+    a second process writing the same file would lose updates.
+
+    Status, last activity and normalized field values are written with each
+    state into indexed side tables (``conversation_index``,
+    ``conversation_fields``), so ``query_index`` is a SQL query and startup
+    never reads the stored states.
+    """
+
+    durable = True
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS adk_sessions (
+        id TEXT PRIMARY KEY,
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        state TEXT NOT NULL,
+        last_update_time REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS adk_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS adk_events_session ON adk_events (session_id, seq);
+    CREATE TABLE IF NOT EXISTS conversation_index (
+        id TEXT PRIMARY KEY,
+        tenant_id TEXT,
+        status TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS conversation_index_activity ON conversation_index (updated_at, id);
+    CREATE INDEX IF NOT EXISTS conversation_index_status ON conversation_index (status, updated_at, id);
+    CREATE TABLE IF NOT EXISTS conversation_fields (
+        conversation_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (conversation_id, name)
+    );
+    CREATE INDEX IF NOT EXISTS conversation_fields_value ON conversation_fields (name, value, conversation_id);
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5, batch_size: int = 100, limits: Optional[SessionLimitsConfig] = None):
+        super().__init__(limits)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # The writer connection belongs to the flush thread; callers read
+        # through their own connection (WAL allows concurrent readers).
+        self._writer = self._connect()
+        self._writer.executescript(self._SCHEMA)
+        self._index_unindexed()
+        self._reader = self._connect()
+        self._flush_lock = threading.Lock()
+
+        self._pending = _WriteBatch()
+        self._inflight = _WriteBatch()
+
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="conversation-store-flush", daemon=True)
+        self._flusher.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        return db
+
+    def _index_unindexed(self) -> None:
+        """Indexes states written before the index tables existed (a one-time migration)."""
+        rows = self._writer.execute(
+            "SELECT data FROM conversations WHERE id NOT IN (SELECT id FROM conversation_index)"
+        ).fetchall()
+        if not rows:
+            return
+        entries = [IndexEntry.from_state(AgentState.model_validate_json(data)) for data, in rows]
+        self._writer.execute("BEGIN")
+        self._write_index(self._writer, [], entries)
+        self._writer.execute("COMMIT")
+        logger.info("Indexed %d conversations stored without index rows", len(entries))
+
+    @staticmethod
+    def _write_index(db: sqlite3.Connection, deleted: List[str], entries: List[IndexEntry]) -> None:
+        """Replaces the index rows of ``entries`` and drops those of ``deleted`` (inside a transaction)."""
+        dropped = [(i,) for i in deleted] + [(entry.conversation_id,) for entry in entries]
+        db.executemany("DELETE FROM conversation_index WHERE id = ?", dropped)
+        db.executemany("DELETE FROM conversation_fields WHERE conversation_id = ?", dropped)
+        db.executemany(
+            "INSERT INTO conversation_index (id, tenant_id, status, updated_at) VALUES (?, ?, ?, ?)",
+            [(entry.conversation_id, entry.tenant_id, entry.status, entry.updated_at) for entry in entries],
+        )
+        db.executemany(
+            "INSERT INTO conversation_fields (conversation_id, name, value) VALUES (?, ?, ?)",
+            [(entry.conversation_id, name, value) for entry in entries for name, value in entry.lookup_values().items()],
+        )
+
+    def _enqueued(self) -> None:
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # The batch was requeued by flush(); retry on the next interval
+                logger.exception("Conversation store flush failed; retrying in %ss", self.flush_interval)
+
+    # Backend hooks
+
+    def _load(self, conversation_id: str) -> Optional[AgentState]:
+        data = None
+        # Newest writes first: pending, then the batch being flushed, then disk
+        for batch in (self._pending, self._inflight):
+            if conversation_id in batch.deleted_states:
+                return None
+            if conversation_id in batch.states:
+                data = batch.states[conversation_id][0]
+                break
+        if data is None:
+            row = self._reader.execute("SELECT data FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+            if row is None:
+                return None
+            data = row[0]
+        state = AgentState.model_validate_json(data)
+        session = self.load_session(conversation_id)
+        derived = event_messages(session.events) if session is not None else []
+        if len(state.messages) > state.archived_messages:
+            # Written with the whole transcript, before archived_messages existed
+            state.archived_messages = max(len(state.messages) - len(derived), 0)
+        else:
+            for role, text in derived:
+                state.messages.add(role, text)
+        return state
+
+    def _write(self, state: AgentState) -> None:
+        # Messages still in the session events are rebuilt from them on load
+        data = state.model_dump(mode="json", exclude={"messages"})
+        data["messages"] = state.messages[:state.archived_messages]
+        self._pending.deleted_states.discard(state.conversation_id)
+        self._pending.states[state.conversation_id] = (json.dumps(data), IndexEntry.from_state(state))
+        self._enqueued()
+
+    def _remove(self, conversation_id: str) -> None:
+        self._pending.states.pop(conversation_id, None)
+        self._pending.deleted_states.add(conversation_id)
+        self._enqueued()
+
+    def _exists(self, conversation_id: str) -> bool:
+        for batch in (self._pending, self._inflight):
+            if conversation_id in batch.deleted_states:
+                return False
+            if conversation_id in batch.states:
+                return True
+        row = self._reader.execute("SELECT 1 FROM conversations WHERE id = ? LIMIT 1", (conversation_id,)).fetchone()
+        return row is not None
+
+    def _stored_ids(self) -> Set[str]:
+        ids = {row[0] for row in self._reader.execute("SELECT id FROM conversations")}
+        for batch in (self._inflight, self._pending):
+            ids = (ids | set(batch.states)) - batch.deleted_states
+        return ids
+
+    def query_index(
+        self,
+        status: Optional[str] = None,
+        fields: Optional[Dict[str, str]] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[IndexEntry], Optional[str]]:
+        before = decode_cursor(cursor) if cursor else None
+        wanted = [(name.lower(), normalize_value(value)) for name, value in (fields or {}).items()]
+        # Display values come straight from the stored JSON, parsed by SQLite
+        sql = [
+            "SELECT i.id, i.tenant_id, i.status, i.updated_at, json_extract(c.data, '$.collected_fields')",
+            "FROM conversation_index i JOIN conversations c ON c.id = i.id WHERE 1",
+        ]
+        params: List[Any] = []
+        if status is not None:
+            sql.append("AND i.status = ?")
+            params.append(status)
+        for name, value in wanted:
+            sql.append("AND i.id IN (SELECT conversation_id FROM conversation_fields WHERE name = ? AND value = ?)")
+            params += [name, value]
+        if before is not None:
+            sql.append("AND (i.updated_at, i.id) < (?, ?)")
+            params += list(before)
+        sql.append("ORDER BY i.updated_at DESC, i.id DESC LIMIT ?")
+
+        with self._lock:
+            # Writes not flushed yet take precedence over their rows on disk
+            unflushed: Dict[str, Optional[IndexEntry]] = {}
+            for batch in (self._inflight, self._pending):
+                unflushed.update(dict.fromkeys(batch.deleted_states))
+                unflushed.update({i: entry for i, (_, entry) in batch.states.items()})
+            rows = self._reader.execute(" ".join(sql), (*params, limit + 1 + len(unflushed))).fetchall()
+        entries = [
+            IndexEntry(row_status, (updated_at, conversation_id), tenant_id, json.loads(collected))
+            for conversation_id, tenant_id, row_status, updated_at, collected in rows
+            if conversation_id not in unflushed
+        ]
+        entries += [entry for entry in unflushed.values() if entry is not None and entry.matches(status, wanted, before)]
+        entries.sort(key=lambda entry: entry.key, reverse=True)
+        next_cursor = encode_cursor(entries[limit - 1].key) if len(entries) > limit else None
+        return entries[:limit], next_cursor
+
+    # ADK sessions
+
+    def save_session(self, session: Session) -> None:
+        with self._lock:
+            self._pending.deleted_sessions.discard(session.id)
+            self._pending.sessions[session.id] = (
+                session.app_name, session.user_id, json.dumps(session.state, default=str), session.last_update_time
+            )
+            self._enqueued()
+
+    def append_session_event(self, session_id: str, event: Event) -> None:
+        with self._lock:
+            self._pending.events.append((session_id, event.model_dump_json(exclude_none=True)))
+            self._enqueued()
+
+    def replace_session_events(self, session_id: str, events: List[Event]) -> None:
+        with self._lock:
+            self._pending.events = [(sid, data) for sid, data in self._pending.events if sid != session_id]
+            self._pending.reset_events.add(session_id)
+            self._pending.events += [(session_id, event.model_dump_json(exclude_none=True)) for event in events]
+            # Compaction moved messages into state.archived_messages; write both in one batch
+            state = self._resident.get(session_id)
+            if state is not None:
+                self._write(state)
+            self._enqueued()
+
+    def load_session(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            if session_id in self._pending.deleted_sessions:
+                return None
+            meta = self._pending.sessions.get(session_id) or self._inflight.sessions.get(session_id)
+            if meta is None and session_id not in self._inflight.deleted_sessions:
+                row = self._reader.execute(
+                    "SELECT app_name, user_id, state, last_update_time FROM adk_sessions WHERE id = ?",
+                    (session_id,),
+                ).fetchone()
+                meta = tuple(row) if row else None
+            if meta is None:
+                return None
+            events = []
+            if not any(session_id in b.deleted_sessions or session_id in b.reset_events for b in (self._inflight, self._pending)):
+                rows = self._reader.execute(
+                    "SELECT data FROM adk_events WHERE session_id = ? ORDER BY seq", (session_id,)
+                ).fetchall()
+                events = [row[0] for row in rows]
+            if session_id not in self._pending.reset_events:
+                events += [data for sid, data in self._inflight.events if sid == session_id]
+            events += [data for sid, data in self._pending.events if sid == session_id]
+
+        app_name, user_id, state, last_update_time = meta
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=json.loads(state),
+            events=[Event.model_validate_json(data) for data in events],
+            last_update_time=last_update_time,
+        )
+
+    def delete_session(self, session_id: str) -> None:
+        with self._lock:
+            self._pending.sessions.pop(session_id, None)
+            self._pending.events = [(sid, data) for sid, data in self._pending.events if sid != session_id]
+            self._pending.reset_events.discard(session_id)
+            self._pending.deleted_sessions.add(session_id)
+            self._enqueued()
+
+    # Write-behind
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                if not len(self._pending):
+                    return
+                batch = self._inflight = self._pending
+                self._pending = _WriteBatch()
+
+            # One transaction (and one fsync) for the whole batch, outside the
+            # caller lock so request handling never waits on the disk.
+            db = self._writer
+            try:
+                db.execute("BEGIN")
+                db.executemany("DELETE FROM conversations WHERE id = ?", [(i,) for i in batch.deleted_states])
+                db.executemany(
+                    "INSERT OR REPLACE INTO conversations (id, data) VALUES (?, ?)",
+                    [(i, data) for i, (data, _) in batch.states.items()],
+                )
+                self._write_index(db, list(batch.deleted_states), [entry for _, entry in batch.states.values()])
+                db.executemany("DELETE FROM adk_sessions WHERE id = ?", [(i,) for i in batch.deleted_sessions])
+                db.executemany("DELETE FROM adk_events WHERE session_id = ?", [(i,) for i in batch.deleted_sessions | batch.reset_events])
+                db.executemany(
+                    "INSERT OR REPLACE INTO adk_sessions (id, app_name, user_id, state, last_update_time) VALUES (?, ?, ?, ?, ?)",
+                    [(sid, *meta) for sid, meta in batch.sessions.items()],
+                )
+                db.executemany("INSERT INTO adk_events (session_id, data) VALUES (?, ?)", batch.events)
+                db.execute("COMMIT")
+            except Exception:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                # Nothing is lost: the batch goes back in front of the writes made since
+                with self._lock:
+                    batch.requeue(self._pending)
+                    self._pending = batch
+                    self._inflight = _WriteBatch()
+                metrics.inc("conversation_store_flush_errors_total")
+                raise
+            with self._lock:
+                self._inflight = _WriteBatch()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self._writer.close()
+        self._reader.close()
+
+
+class PersistentSessionService(InMemorySessionService):
+    """
+    ADK session service backed by a ``ConversationStore``.
+
+    Sessions are served from memory as usual; creations and appended events are
+    written through to the store, and sessions missing from memory (e.g. after
+    a restart) are rehydrated from it.
+    """
+
+    def __init__(self, store: ConversationStore):
+        super().__init__()
+        self.store = store
+        store.add_eviction_listener(self._on_evicted)
+
+    def _on_evicted(self, conversation_id: str, reason: str) -> None:
+        # Drop the in-memory copy; durable stores rehydrate it on the next access
+        for users in self.sessions.values():
+            for sessions in users.values():
+                sessions.pop(conversation_id, None)
+
+    def _storage_session(self, app_name: str, user_id: str, session_id: str) -> Optional[Session]:
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _rehydrate(self, app_name: str, user_id: str, session_id: str) -> None:
+        if self._storage_session(app_name, user_id, session_id) is not None:
+            return
+        session = self.store.load_session(session_id)
+        if session is not None and session.app_name == app_name and session.user_id == user_id:
+            self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> Session:
+        if session_id:
+            self._rehydrate(app_name, user_id, session_id)
+        session = await super().create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+        self.store.save_session(self._storage_session(app_name, user_id, session.id))
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config: Optional[Any] = None) -> Optional[Session]:
+        self._rehydrate(app_name, user_id, session_id)
+        return await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        storage_session = self._storage_session(session.app_name, session.user_id, session.id)
+        seen = len(storage_session.events) if storage_session is not None else 0
+        event = await super().append_event(session, event)
+        # Only persist events that were actually committed (not partial or re-delivered)
+        if storage_session is not None and len(storage_session.events) > seen:
+            self.store.append_session_event(session.id, event)
+            self.store.save_session(storage_session)
+        return event
+
+    def compact_session(
+        self,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        compact: Callable[[List[Event]], Optional[List[Event]]],
+    ) -> bool:
+        """
+        Rewrites a session's events in place with ``compact(events)``.
+
+        ``compact`` sees the live event list and must not mutate it; it
+        returns the replacement list, or None to leave the session as is.
+        """
+        self._rehydrate(app_name, user_id, session_id)
+        storage_session = self._storage_session(app_name, user_id, session_id)
+        if storage_session is None:
+            return False
+        events = compact(storage_session.events)
+        if events is None:
+            return False
+        storage_session.events = events
+        self.store.replace_session_events(session_id, events)
+        return True
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._rehydrate(app_name, user_id, session_id)
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self.store.delete_session(session_id)
+
+
+def create_store(config: StorageConfig, limits: Optional[SessionLimitsConfig] = None) -> ConversationStore:
+    """Builds the conversation store selected by the storage config."""
+    if config.backend == "memory":
+        return InMemoryConversationStore(limits)
+    if config.backend == "sqlite":
+        return SQLiteConversationStore(
+            config.path,
+            flush_interval=config.flush_interval_seconds,
+            batch_size=config.flush_batch_size,
+            limits=limits,
+        )
+    raise ValueError(f"Unknown storage backend: {config.backend}")
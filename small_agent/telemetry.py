@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from opentelemetry import metrics as otel_metrics
+from opentelemetry import trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    ConsoleMetricExporter,
+    MetricExporter,
+    MetricExportResult,
+    PeriodicExportingMetricReader,
+)
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+
+from config.models import TelemetryConfig
+
+# Instruments bind to whatever providers are installed; until then they are no-ops
+tracer = trace.get_tracer("small_agent")
+meter = otel_metrics.get_meter("small_agent")
+
+turn_duration = meter.create_histogram("agent.turn.duration", unit="s", description="Agent turn latency")
+queue_wait = meter.create_histogram("agent.turn.queue_wait", unit="s", description="Time waiting for an admission slot")
+model_calls_per_turn = meter.create_histogram("agent.turn.model_calls", description="Model calls per agent turn")
+
+
+class _JsonLinesFile:
+    """Append-only JSON lines file shared by the file exporters."""
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, records: Sequence[Dict[str, Any]]) -> None:
+        with self._lock:
+            for record in records:
+                self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class FileSpanExporter(SpanExporter):
+    """Writes finished spans as JSON lines (one span per line)."""
+
+    def __init__(self, path: str):
+        self._out = _JsonLinesFile(path)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        self._out.write([{
+            "name": span.name,
+            "trace_id": f"{span.context.trace_id:032x}",
+            "span_id": f"{span.context.span_id:016x}",
+            "parent_id": f"{span.parent.span_id:016x}" if span.parent else None,
+            "start": span.start_time,
+            "duration_ms": (span.end_time - span.start_time) / 1e6 if span.end_time else None,
+            "status": span.status.status_code.name,
+            "attributes": dict(span.attributes or {}),
+        } for span in spans])
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        self._out.close()
+
+
+class FileMetricExporter(MetricExporter):
+    """Writes each metrics collection as one JSON line."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._out = _JsonLinesFile(path)
+
+    def export(self, metrics_data: Any, timeout_millis: float = 10_000, **kwargs: Any) -> MetricExportResult:
+        self._out.write([{"time": time.time(), "metrics": json.loads(metrics_data.to_json(indent=None))}])
+        return MetricExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: float = 10_000) -> bool:
+        return True
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs: Any) -> None:
+        self._out.close()
+
+
+def _exporters(config: TelemetryConfig):
+    """Returns (span exporter, metric exporter) for the configured backend."""
+    if config.exporter == "console":
+        return ConsoleSpanExporter(), ConsoleMetricExporter()
+    if config.exporter == "file":
+        root, ext = os.path.splitext(config.file_path)
+        return FileSpanExporter(config.file_path), FileMetricExporter(f"{root}.metrics{ext or '.jsonl'}")
+    if config.exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError as e:
+            raise ImportError("telemetry.exporter 'otlp' needs opentelemetry-exporter-otlp-proto-http") from e
+        # Endpoints default to OTEL_EXPORTER_OTLP_* environment variables
+        endpoint = config.otlp_endpoint.rstrip("/") if config.otlp_endpoint else None
+        return (
+            OTLPSpanExporter(endpoint=f"{endpoint}/v1/traces" if endpoint else None),
+            OTLPMetricExporter(endpoint=f"{endpoint}/v1/metrics" if endpoint else None),
+        )
+    if config.exporter == "cloud_trace":
+        from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
+        return CloudTraceSpanExporter(project_id=os.environ.get("GOOGLE_CLOUD_PROJECT")), None
+    raise ValueError(f"Unknown telemetry exporter: {config.exporter}")
+
+
+_installed: Optional[Callable[[], None]] = None
+_install_lock = threading.Lock()
+
+
+def setup_telemetry(config: TelemetryConfig, active_conversations: Optional[Callable[[], int]] = None) -> None:
+    """
+    Installs global tracer and meter providers for the configured exporter.
+
+    ADK's own ``call_llm`` and ``execute_tool`` spans use the global provider
+    too, so they show up nested under our request and turn spans. Safe to
+    call more than once; only the first call installs providers.
+    """
+    global _installed
+    if not config.enabled:
+        return
+    with _install_lock:
+        if _installed is not None:
+            return
+        resource = Resource.create({"service.name": config.service_name})
+        span_exporter, metric_exporter = _exporters(config)
+
+        tracer_provider = TracerProvider(resource=resource)
+        tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        trace.set_tracer_provider(tracer_provider)
+
+        meter_provider = None
+        if metric_exporter is not None:
+            reader = PeriodicExportingMetricReader(
+                metric_exporter, export_interval_millis=config.metrics_interval_seconds * 1000
+            )
+            meter_provider = MeterProvider(resource=resource, metric_readers=[reader])
+            otel_metrics.set_meter_provider(meter_provider)
+            if active_conversations is not None:
+                meter.create_observable_gauge(
+                    "agent.conversations.active",
+                    callbacks=[lambda options: [otel_metrics.Observation(active_conversations())]],
+                    description="Conversations resident in memory",
+                )
+
+        def shutdown() -> None:
+            tracer_provider.shutdown()
+            if meter_provider is not None:
+                meter_provider.shutdown()
+
+        _installed = shutdown
+
+
+def shutdown_telemetry() -> None:
+    """Flushes and stops the exporters installed by ``setup_telemetry``."""
+    global _installed
+    with _install_lock:
+        if _installed is not None:
+            _installed()
+            _installed = None
+
+
+def flow_digest(flow: str) -> str:
+    """Span-safe label for a fair-queueing flow, which may be a raw API key."""
+    return hashlib.sha256(flow.encode()).hexdigest()[:12]
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Starts a child span of the current one (a no-op until telemetry is set up)."""
+    with tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        yield current
+
+
+class TracingMiddleware:
+    """ASGI middleware wrapping each HTTP request in a server span."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        with tracer.start_as_current_span(method, kind=trace.SpanKind.SERVER) as current:
+            current.set_attribute("http.request.method", method)
+            current.set_attribute("url.path", scope["path"])
+
+            async def send_wrapper(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    current.set_attribute("http.response.status_code", message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None and getattr(route, "path", None):
+                    current.update_name(f"{method} {route.path}")
+                    current.set_attribute("http.route", route.path)
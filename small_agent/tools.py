@@ -1,10 +1,43 @@
-from typing import Any, Dict
-from google.adk.tools.tool_context import ToolContext
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from config.compiled import CompiledConfig
+from config.loader import get_snapshot
 from .state import AgentState, ConversationStatus
 
+if TYPE_CHECKING:
+    from google.adk.tools.tool_context import ToolContext
+
+# Called with (state, ticket) on every escalation, e.g. to queue the ticket (see outbox.py)
+EscalationListener = Callable[[AgentState, Dict[str, Any]], None]
+_escalation_listeners: List[EscalationListener] = []
+
+def add_escalation_listener(listener: EscalationListener) -> None:
+    _escalation_listeners.append(listener)
+
+def remove_escalation_listener(listener: EscalationListener) -> None:
+    if listener in _escalation_listeners:
+        _escalation_listeners.remove(listener)
+
+# Called with (state, change) when a field is collected or the status changes (see changefeed.py)
+ChangeListener = Callable[[AgentState, Dict[str, Any]], None]
+_change_listeners: List[ChangeListener] = []
+
+def add_change_listener(listener: ChangeListener) -> None:
+    _change_listeners.append(listener)
+
+def remove_change_listener(listener: ChangeListener) -> None:
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+def _notify_change(state: AgentState, change: Dict[str, Any]) -> None:
+    for listener in list(_change_listeners):
+        listener(state, change)
+
 class AgentTools:
-    def __init__(self, state: AgentState):
+    def __init__(self, state: AgentState, config: Optional[CompiledConfig] = None):
         self.state = state
+        # Defaults to the current snapshot; pass one to pin a turn to a version
+        self.config = config or get_snapshot()
 
     def collect_field(self, name: str, value: str) -> Dict[str, Any]:
         """
@@ -14,16 +47,25 @@ class AgentTools:
             name: The name of the field to collect (e.g., 'name', 'email', 'phone').
             value: The value provided by the user.
         """
-        from config.loader import get_config
-        config = get_config()
-        required_fields = [f.name for f in config.fields if f.required]
-
         # Normalize field name to lower case
         field_key = name.lower()
+        previous = self.state.status
         self.state.collected_fields[field_key] = value
-        
-        is_complete = self.state.is_complete(required_fields)
-        missing_fields = [f for f in required_fields if f not in self.state.collected_fields]
+        self.state.touch()
+
+        is_complete = self.state.is_complete(self.config.required_fields)
+        missing_fields = self.config.missing_fields(self.state.collected_fields)
+        # With escalation enabled the model hands off next (the progress block says so);
+        # without it, collecting the last required field completes the intake
+        if is_complete and previous == ConversationStatus.COLLECTING and not self.config.config.escalation.enabled:
+            self.state.status = ConversationStatus.COMPLETED
+
+        if _change_listeners:
+            _notify_change(self.state, {
+                'type': 'field_collected', 'field': field_key, 'value': value, 'missing_fields': missing_fields,
+            })
+            if self.state.status != previous:
+                _notify_change(self.state, {'type': 'status_changed', 'previous_status': previous.value})
 
         return {
             'status': 'collected',
@@ -34,7 +76,7 @@ class AgentTools:
         }
 
     def escalate_conversation(
-        self, reason: str, summary: str, tool_context: ToolContext
+        self, reason: str, summary: str, tool_context: Optional["ToolContext"] = None
     ) -> Dict[str, Any]:
         """
         Escalates the conversation to a human agent.
@@ -42,13 +84,29 @@ class AgentTools:
         Args:
             reason: The reason for escalation.
             summary: A summary of the conversation so far.
-            tool_context: The context for the tool execution.
+            tool_context: The context for the tool execution (None when escalated by the API).
         """
+        previous = self.state.status
         self.state.status = ConversationStatus.ESCALATED
         self.state.summary = f"Escalated due to: {reason}. Summary: {summary}"
+        self.state.touch()
         
-        # In a real app, this might create a ticket in an external system
+        # One ticket per conversation; listeners deliver it to the ticket system
         ticket_id = f"support-ticket-{self.state.conversation_id}"
+        if _escalation_listeners:
+            ticket = {
+                'ticket_id': ticket_id,
+                'conversation_id': self.state.conversation_id,
+                'tenant_id': self.state.tenant_id,
+                'reason': reason,
+                'summary': summary,
+                'collected_fields': dict(self.state.collected_fields),
+                'created_at': time.time(),
+            }
+            for listener in list(_escalation_listeners):
+                listener(self.state, ticket)
+        if previous != ConversationStatus.ESCALATED:
+            _notify_change(self.state, {'type': 'status_changed', 'previous_status': previous.value, 'reason': reason})
         
         return {
             'status': 'escalated',
@@ -0,0 +1,119 @@
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Union, overload
+
+# Roles are interned process-wide; a transcript stores one byte per message
+_ROLE_IDS: Dict[str, int] = {}
+_ROLE_NAMES: List[str] = []
+
+
+def _role_id(role: str) -> int:
+    role_id = _ROLE_IDS.get(role)
+    if role_id is None:
+        if len(_ROLE_NAMES) >= 255:
+            raise ValueError("Too many distinct message roles")
+        role_id = _ROLE_IDS[role] = len(_ROLE_NAMES)
+        _ROLE_NAMES.append(role)
+    return role_id
+
+
+class Transcript(Sequence):
+    """
+    Compact, append-only message log.
+
+    Roles are stored as interned one-byte ids and all text lives in a single
+    contiguous UTF-8 buffer indexed by offsets, instead of one dict and two
+    strings per message. Indexing returns ``{"role": ..., "text": ...}``
+    dicts built on demand, so it reads like the old ``List[Dict[str, str]]``.
+    """
+
+    __slots__ = ("_roles", "_offsets", "_buffer")
+
+    def __init__(self, messages: Iterable[Dict[str, str]] = ()):
+        self._roles = array("B")
+        self._offsets = array("Q", [0])
+        self._buffer = bytearray()
+        for message in messages:
+            self.append(message)
+
+    def add(self, role: str, text: str) -> None:
+        self._roles.append(_role_id(role))
+        self._buffer += text.encode("utf-8")
+        self._offsets.append(len(self._buffer))
+
+    def append(self, message: Dict[str, str]) -> None:
+        self.add(message["role"], message["text"])
+
+    def role(self, index: int) -> str:
+        return _ROLE_NAMES[self._roles[index]]
+
+    def text(self, index: int) -> str:
+        return self._buffer[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, str]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Dict[str, str]]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, str], List[Dict[str, str]]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return {"role": self.role(index), "text": self.text(index)}
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for i in range(len(self)):
+            yield {"role": self.role(i), "text": self.text(i)}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Transcript):
+            return self._roles == other._roles and self._offsets == other._offsets and self._buffer == other._buffer
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Transcript({self.to_list()!r})"
+
+    def to_list(self) -> List[Dict[str, str]]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the log's buffers."""
+        return (
+            len(self._buffer)
+            + self._roles.itemsize * len(self._roles)
+            + self._offsets.itemsize * len(self._offsets)
+        )
+
+    # Pydantic integration: validates from a list of dicts, serializes to one
+
+    @classmethod
+    def _validate(cls, value: Any) -> "Transcript":
+        if isinstance(value, Transcript):
+            return value
+        return cls(value)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> Any:
+        from pydantic_core import core_schema
+
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(lambda t: t.to_list()),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: Any, handler: Any) -> Dict[str, Any]:
+        return {
+            "type": "array",
+            "items": {"type": "object", "additionalProperties": {"type": "string"}},
+        }
@@ -0,0 +1,100 @@
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Case-folds, strips accents and collapses punctuation/underscores to single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SEPARATORS.sub(" ", stripped).strip()
+
+
+class TriggerMatcher:
+    """
+    Aho-Corasick automaton over the configured escalation triggers.
+
+    All triggers are matched in a single pass over the normalized message, so
+    the cost is O(len(message)) regardless of how many triggers are configured.
+    A trigger must start at a word boundary but may end inside a word, so
+    "urgent" matches "urgente" but not "insurgent".
+    """
+
+    def __init__(self, triggers: Iterable[str]):
+        self.triggers: List[str] = []
+        self._lengths: List[int] = []
+        # Node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for trigger in triggers:
+            pattern = normalize(trigger)
+            if pattern:
+                self._add(pattern, len(self.triggers))
+                self.triggers.append(trigger)
+                self._lengths.append(len(pattern))
+        self._build_failure_links()
+
+    def __bool__(self) -> bool:
+        return bool(self.triggers)
+
+    def _add(self, pattern: str, index: int) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(index)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> List[str]:
+        """Returns every configured trigger found in ``text``, in order of appearance."""
+        normalized = normalize(text)
+        found: List[str] = []
+        seen = set()
+        node = 0
+        for end, ch in enumerate(normalized):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for index in self._out[node]:
+                start = end - self._lengths[index] + 1
+                if index not in seen and (start == 0 or normalized[start - 1] == " "):
+                    seen.add(index)
+                    found.append(self.triggers[index])
+        return found
+
+    def find(self, text: str) -> Optional[str]:
+        """Returns the first trigger found in ``text``, or None."""
+        matches = self.find_all(text)
+        return matches[0] if matches else None
+
+
+def handoff_note(trigger: str, ticket_id: str) -> str:
+    """Tells the model the conversation was already escalated so it only phrases the hand-off."""
+    return (
+        f"[system] This conversation has already been escalated to a human agent "
+        f"(trigger: {trigger}, ticket: {ticket_id}). Do not call any tools. "
+        f"Briefly tell the user, in your persona, that a human agent will follow up."
+    )
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+
+class IdempotencyKeyReused(Exception):
+    """An idempotency key was reused for a request with a different body."""
+
+
+class TurnCoordinator:
+    """
+    Serializes turns per conversation and coalesces retried requests.
+
+    Turns for the same conversation run one at a time, so ``runner.run_async``
+    never runs twice against one session and ``state.messages`` appends never
+    interleave. Requests carrying the same idempotency key either attach to
+    the in-flight turn or get its cached result for ``result_ttl`` seconds,
+    provided they also carry the same request fingerprint (a hash of the
+    body); a different fingerprint raises ``IdempotencyKeyReused``.
+    Failed turns are not cached, so a retry after an error runs again.
+    """
+
+    def __init__(self, result_ttl: float = 300, max_results: int = 10000):
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+        # (conversation id, key) -> (fingerprint, future) / (time, fingerprint, result)
+        self._inflight: Dict[Tuple[str, str], Tuple[str, asyncio.Future]] = {}
+        self._results: "OrderedDict[Tuple[str, str], Tuple[float, str, Any]]" = OrderedDict()
+
+        metrics.gauge("turns_locked_conversations", lambda: len(self._locks))
+
+    @asynccontextmanager
+    async def lock(self, conversation_id: str) -> AsyncIterator[None]:
+        """Holds the conversation's turn lock; locks are dropped once unused."""
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = self._locks[conversation_id] = asyncio.Lock()
+        self._lock_users[conversation_id] = self._lock_users.get(conversation_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            remaining = self._lock_users.pop(conversation_id) - 1
+            if remaining:
+                self._lock_users[conversation_id] = remaining
+            else:
+                self._locks.pop(conversation_id, None)
+
+    def _cached(self, key: Tuple[str, str]) -> Optional[Tuple[float, str, Any]]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.result_ttl:
+            del self._results[key]
+            return None
+        return entry
+
+    def _remember(self, key: Tuple[str, str], fingerprint: str, result: Any) -> None:
+        self._results[key] = (time.monotonic(), fingerprint, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    @staticmethod
+    def _check(expected: str, fingerprint: str) -> None:
+        if fingerprint != expected:
+            metrics.inc("turns_idempotency_conflicts_total")
+            raise IdempotencyKeyReused("Idempotency-Key was already used with a different request body")
+
+    async def run(
+        self,
+        conversation_id: str,
+        idempotency_key: Optional[str],
+        turn: Callable[[], Awaitable[T]],
+        fingerprint: str = "",
+    ) -> T:
+        """
+        Runs ``turn`` under the conversation lock, deduplicated by key.
+
+        Raises ``IdempotencyKeyReused`` if the key was already used in this
+        conversation with a different ``fingerprint``.
+        """
+        if not idempotency_key:
+            async with self.lock(conversation_id):
+                return await turn()
+
+        key = (conversation_id, idempotency_key)
+        cached = self._cached(key)
+        if cached is not None:
+            self._check(cached[1], fingerprint)
+            metrics.inc("turns_coalesced_total", kind="cached")
+            return cached[2]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._check(inflight[0], fingerprint)
+            metrics.inc("turns_coalesced_total", kind="inflight")
+            return await asyncio.shield(inflight[1])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        try:
+            async with self.lock(conversation_id):
+                result = await turn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unattached failure doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._remember(key, fingerprint, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
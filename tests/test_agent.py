@@ -1,8 +1,9 @@
 
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 from small_agent.state import AgentState, ConversationStatus
 from small_agent.tools import AgentTools
+from config.compiled import compile_config
 from config.models import BaseConfig, FieldConfig
 
 @pytest.fixture
@@ -20,31 +21,29 @@ def agent_state():
     return AgentState(conversation_id="test_session")
 
 def test_collect_field_incomplete(agent_state, mock_config):
-    tools = AgentTools(agent_state)
+    tools = AgentTools(agent_state, compile_config(mock_config))
+
+    # Collect first field
+    result = tools.collect_field("name", "John")
     
-    with patch("config.loader.get_config", return_value=mock_config):
-        # Collect first field
-        result = tools.collect_field("name", "John")
-        
-        assert result["status"] == "collected"
-        assert result["field"] == "name"
-        assert result["value"] == "John"
-        assert result["is_complete"] is False
-        assert "email" in result["missing_fields"]
-        assert "name" not in result["missing_fields"]
-        assert agent_state.collected_fields["name"] == "John"
+    assert result["status"] == "collected"
+    assert result["field"] == "name"
+    assert result["value"] == "John"
+    assert result["is_complete"] is False
+    assert "email" in result["missing_fields"]
+    assert "name" not in result["missing_fields"]
+    assert agent_state.collected_fields["name"] == "John"
 
 def test_collect_field_complete(agent_state, mock_config):
-    tools = AgentTools(agent_state)
+    tools = AgentTools(agent_state, compile_config(mock_config))
+
+    # Collect all required fields
+    tools.collect_field("name", "John")
+    result = tools.collect_field("email", "john@example.com")
     
-    with patch("config.loader.get_config", return_value=mock_config):
-        # Collect all required fields
-        tools.collect_field("name", "John")
-        result = tools.collect_field("email", "john@example.com")
-        
-        assert result["is_complete"] is True
-        assert len(result["missing_fields"]) == 0
-        assert agent_state.collected_fields["email"] == "john@example.com"
+    assert result["is_complete"] is True
+    assert len(result["missing_fields"]) == 0
+    assert agent_state.collected_fields["email"] == "john@example.com"
 
 def test_escalate_conversation(agent_state):
     tools = AgentTools(agent_state)
@@ -60,3 +59,21 @@ def test_escalate_conversation(agent_state):
     assert result["ticketId"].startswith("support-ticket-")
     assert agent_state.status == ConversationStatus.ESCALATED
     assert "User wants a human" in agent_state.summary
+
+def test_state_instruction_tracks_progress(agent_state, mock_config):
+    from small_agent.agent import state_instruction
+    snapshot = compile_config(mock_config)
+
+    text = state_instruction(snapshot, agent_state)
+    assert "Next field to ask for: name." in text
+    # Same revision and snapshot: served from the cache
+    assert state_instruction(snapshot, agent_state) is text
+
+    AgentTools(agent_state, snapshot).collect_field("name", "John")
+    text = state_instruction(snapshot, agent_state)
+    assert "Collected: name=John" in text
+    assert "Next field to ask for: email." in text
+
+    agent_state.status = ConversationStatus.ESCALATED
+    agent_state.touch()
+    assert "handed off" in state_instruction(snapshot, agent_state)
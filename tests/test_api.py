@@ -1,8 +1,10 @@
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch, MagicMock
 from small_agent.api import app, session_states
+from small_agent.state import ConversationStatus
 from google.genai import types
 
 client = TestClient(app)
@@ -74,3 +76,367 @@ def test_get_chat_history():
     data = response.json()
     assert len(data["messages"]) == 2
     assert data["messages"][0]["text"] == "A"
+
+def test_stream_message(mock_runner_run_async):
+    create_resp = client.post("/conversations/")
+    conv_id = create_resp.json()["conversation_id"]
+
+    async def event_generator(*args, **kwargs):
+        mock_event = MagicMock()
+        mock_event.content.parts = [
+            types.Part(function_call=types.FunctionCall(id="call-1", name="collect_field", args={"name": "name", "value": "Ana"})),
+        ]
+        yield mock_event
+        mock_event = MagicMock()
+        mock_event.content.parts = [types.Part(text="Gracias Ana")]
+        yield mock_event
+
+    mock_runner_run_async.side_effect = event_generator
+
+    with client.stream("POST", f"/conversations/{conv_id}/messages/stream", json={"text": "Soy Ana"}) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        body = "".join(resp.iter_text())
+
+    event_names = [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+    assert event_names == ["tool_call", "message", "done"]
+    assert "Gracias Ana" in body
+
+    # The streamed turn updates history exactly like the buffered endpoint
+    state = session_states[conv_id]
+    assert state.messages == [
+        {"role": "user", "text": "Soy Ana"},
+        {"role": "model", "text": "Gracias Ana"},
+    ]
+
+def test_stream_producer_finishes_before_a_slow_reader():
+    from small_agent.api import _read_ahead
+    finished = []
+
+    async def produce():
+        for i in range(3):
+            yield f"event {i}"
+        finished.append(True)  # e.g. the admission slot is released here
+
+    async def slow_reader():
+        received = []
+        async for item in _read_ahead(produce()):
+            received.append((item, bool(finished)))
+            await asyncio.sleep(0.01)
+        return received
+
+    received = asyncio.run(slow_reader())
+    assert [item for item, _ in received] == ["event 0", "event 1", "event 2"]
+    # The producer was done while the reader was still on its first event
+    assert received[1][1] and received[2][1]
+
+def test_stream_message_not_found():
+    response = client.post("/conversations/missing/messages/stream", json={"text": "Hola"})
+    assert response.status_code == 404
+
+def test_send_message_fast_path_extraction(mock_runner_run_async):
+    create_resp = client.post("/conversations/")
+    conv_id = create_resp.json()["conversation_id"]
+
+    sent = {}
+
+    async def event_generator(*args, **kwargs):
+        sent["content"] = kwargs["new_message"]
+        mock_event = MagicMock()
+        mock_event.content.parts = [types.Part(text="Gracias, ya tengo tu correo")]
+        yield mock_event
+
+    mock_runner_run_async.side_effect = event_generator
+
+    msg_resp = client.post(
+        f"/conversations/{conv_id}/messages/",
+        json={"text": "Mi correo es ana@example.com"}
+    )
+    assert msg_resp.status_code == 200
+
+    # Recorded locally before the model ran, and the model was told about it
+    assert session_states[conv_id].collected_fields["email"] == "ana@example.com"
+    note = sent["content"].parts[-1].text
+    assert "email=ana@example.com" in note
+    assert "Still missing" in note
+
+def test_fast_path_skipped_once_not_collecting(mock_runner_run_async):
+    create_resp = client.post("/conversations/")
+    conv_id = create_resp.json()["conversation_id"]
+    session_states[conv_id].status = ConversationStatus.ESCALATED
+
+    async def event_generator(*args, **kwargs):
+        mock_event = MagicMock()
+        mock_event.content.parts = [types.Part(text="Un agente te contactará")]
+        yield mock_event
+
+    mock_runner_run_async.side_effect = event_generator
+
+    msg_resp = client.post(f"/conversations/{conv_id}/messages/", json={"text": "Mi correo es ana@example.com"})
+    assert msg_resp.status_code == 200
+    assert "email" not in session_states[conv_id].collected_fields
+
+def test_send_message_trigger_escalates_before_model(mock_runner_run_async):
+    create_resp = client.post("/conversations/")
+    conv_id = create_resp.json()["conversation_id"]
+
+    sent = {}
+
+    async def event_generator(*args, **kwargs):
+        sent["content"] = kwargs["new_message"]
+        mock_event = MagicMock()
+        mock_event.content.parts = [types.Part(text="Te paso con un agente humano")]
+        yield mock_event
+
+    mock_runner_run_async.side_effect = event_generator
+
+    msg_resp = client.post(
+        f"/conversations/{conv_id}/messages/",
+        json={"text": "Necesito un refund request URGENTE"}
+    )
+    assert msg_resp.status_code == 200
+
+    state = session_states[conv_id]
+    assert state.status == ConversationStatus.ESCALATED
+    assert "refund request" in state.summary
+    assert "Do not call any tools" in sent["content"].parts[-1].text
+
+def test_create_conversation_for_tenant():
+    response = client.post("/conversations/", json={"tenant_id": "example"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["tenant_id"] == "example"
+    assert session_states[data["conversation_id"]].tenant_id == "example"
+
+def test_create_conversation_unknown_tenant():
+    response = client.post("/conversations/", json={"tenant_id": "does-not-exist"})
+    assert response.status_code == 404
+
+def test_create_conversation_with_greeting():
+    from small_agent.api import session_service, APP_NAME, DEFAULT_USER_ID
+
+    response = client.post("/conversations/", json={"greet": True})
+    assert response.status_code == 200
+    data = response.json()
+    conv_id = data["conversation_id"]
+    assert data["greeting"].startswith("Hola, soy Kora")
+
+    # Seeded into the local history and into the model's context
+    assert session_states[conv_id].messages == [{"role": "model", "text": data["greeting"]}]
+    session = asyncio.run(session_service.get_session(app_name=APP_NAME, user_id=DEFAULT_USER_ID, session_id=conv_id))
+    assert session.events[-1].content.role == "model"
+    assert session.events[-1].content.parts[0].text == data["greeting"]
+
+def test_create_conversation_without_greeting():
+    response = client.post("/conversations/")
+    assert response.json()["greeting"] is None
+
+def test_send_message_idempotency_key(mock_runner_run_async):
+    create_resp = client.post("/conversations/")
+    conv_id = create_resp.json()["conversation_id"]
+
+    async def event_generator(*args, **kwargs):
+        mock_event = MagicMock()
+        mock_event.content.parts = [types.Part(text="Hola")]
+        yield mock_event
+
+    mock_runner_run_async.side_effect = event_generator
+
+    headers = {"Idempotency-Key": "retry-1"}
+    first = client.post(f"/conversations/{conv_id}/messages/", json={"text": "Hi"}, headers=headers)
+    retry = client.post(f"/conversations/{conv_id}/messages/", json={"text": "Hi"}, headers=headers)
+
+    assert first.json() == retry.json()
+    assert mock_runner_run_async.call_count == 1
+    assert len(session_states[conv_id].messages) == 2
+
+    # Same key, different message: rejected instead of replaying the first reply
+    reused = client.post(f"/conversations/{conv_id}/messages/", json={"text": "Bye"}, headers=headers)
+    assert reused.status_code == 422
+    assert mock_runner_run_async.call_count == 1
+
+def test_send_messages_batch(mock_runner_run_async):
+    conv_a = client.post("/conversations/").json()["conversation_id"]
+    conv_b = client.post("/conversations/").json()["conversation_id"]
+
+    async def event_generator(*args, **kwargs):
+        text = kwargs["new_message"].parts[0].text
+        mock_event = MagicMock()
+        mock_event.content.parts = [types.Part(text=f"echo {text}")]
+        yield mock_event
+
+    mock_runner_run_async.side_effect = event_generator
+
+    response = client.post("/conversations/messages:batch", json={"messages": [
+        {"conversation_id": conv_a, "text": "a1"},
+        {"conversation_id": conv_b, "text": "b1"},
+        {"conversation_id": "missing", "text": "x"},
+        {"conversation_id": conv_a, "text": "a2"},
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [r["status_code"] for r in results] == [200, 200, 404, 200]
+    assert results[1]["responses"][0]["text"] == "echo b1"
+    assert results[2]["error"] == "Conversation not found"
+
+    # Per-conversation order is preserved
+    assert [m["text"] for m in session_states[conv_a].messages] == ["a1", "echo a1", "a2", "echo a2"]
+
+def test_get_chat_history_incremental():
+    conv_id = "history-cursor-test"
+    from small_agent.state import AgentState
+    session_states[conv_id] = AgentState(conversation_id=conv_id)
+    for text in ["A", "B", "C"]:
+        session_states[conv_id].add_message("user", text)
+
+    first = client.get(f"/conversations/{conv_id}/messages/", params={"limit": 2}).json()
+    assert [m["text"] for m in first["messages"]] == ["A", "B"]
+    assert first["has_more"] is True
+
+    rest = client.get(f"/conversations/{conv_id}/messages/", params={"since": first["next_cursor"]})
+    assert [m["text"] for m in rest.json()["messages"]] == ["C"]
+
+    # Nothing new since the last poll: 304
+    cursor = rest.json()["next_cursor"]
+    etag = client.get(f"/conversations/{conv_id}/messages/", params={"since": cursor}).headers["ETag"]
+    unchanged = client.get(f"/conversations/{conv_id}/messages/", params={"since": cursor}, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    session_states[conv_id].add_message("model", "D")
+    changed = client.get(f"/conversations/{conv_id}/messages/", params={"since": cursor}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert [m["text"] for m in changed.json()["messages"]] == ["D"]
+
+def test_get_conversation_state_lean_and_etag():
+    conv_id = client.post("/conversations/").json()["conversation_id"]
+    session_states[conv_id].add_message("user", "Hola")
+
+    lean = client.get(f"/conversations/{conv_id}", params={"include_messages": "false"})
+    assert lean.json()["messages"] is None
+    assert lean.json()["message_count"] == 1
+
+    etag = lean.headers["ETag"]
+    assert client.get(f"/conversations/{conv_id}", params={"include_messages": "false"}, headers={"If-None-Match": etag}).status_code == 304
+
+    from small_agent.tools import AgentTools
+    AgentTools(session_states[conv_id]).collect_field("name", "Ana")
+    refreshed = client.get(f"/conversations/{conv_id}", params={"include_messages": "false"}, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["collected_fields"] == {"name": "Ana"}
+
+def test_turn_usage_is_accumulated(mock_runner_run_async):
+    from google.adk.events.event import Event
+    from small_agent.api import root_agent
+    conv_id = client.post("/conversations/").json()["conversation_id"]
+
+    async def event_generator(*args, **kwargs):
+        usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=100, candidates_token_count=10, total_token_count=110)
+        yield Event(
+            author=root_agent.name,
+            content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name="collect_field", args={}))]),
+            usage_metadata=usage,
+        )
+        yield Event(author=root_agent.name, content=types.Content(role="model", parts=[types.Part(text="Listo")]), usage_metadata=usage)
+
+    mock_runner_run_async.side_effect = event_generator
+    client.post(f"/conversations/{conv_id}/messages/", json={"text": "uno"})
+    client.post(f"/conversations/{conv_id}/messages/", json={"text": "dos"})
+
+    data = client.get(f"/conversations/{conv_id}").json()
+    assert data["last_turn_usage"] == {
+        "turns": 1, "model_calls": 2, "tool_calls": 1,
+        "prompt_tokens": 200, "completion_tokens": 20, "total_tokens": 220,
+    }
+    assert data["usage"]["model_calls"] == 4
+    assert data["usage"]["total_tokens"] == 440
+
+def test_resolve_pending_tool_calls(mock_runner_run_async):
+    from google.adk.events.event import Event
+    from small_agent.api import root_agent
+    conv_ids = [client.post("/conversations/").json()["conversation_id"] for _ in range(2)]
+    messages = []
+
+    async def event_generator(*args, **kwargs):
+        message = kwargs["new_message"]
+        messages.append((kwargs["session_id"], message))
+        if message.parts[0].function_response:
+            yield Event(author=root_agent.name, content=types.Content(role="model", parts=[types.Part(text="Aprobado")]))
+            return
+        call_id = f"call-{kwargs['session_id']}"
+        yield Event(
+            author=root_agent.name,
+            content=types.Content(role="model", parts=[types.Part(
+                function_call=types.FunctionCall(id=call_id, name="escalate_conversation", args={"reason": "x", "summary": "y"}),
+            )]),
+            long_running_tool_ids={call_id},
+        )
+
+    mock_runner_run_async.side_effect = event_generator
+    for conv_id in conv_ids:
+        client.post(f"/conversations/{conv_id}/messages/", json={"text": "Necesito ayuda"})
+    assert client.get(f"/conversations/{conv_ids[0]}").json()["pending_calls"] == {f"call-{conv_ids[0]}": "escalate_conversation"}
+
+    response = client.post("/conversations/tool-calls:resolve", json={"resolutions": [
+        {"conversation_id": conv_ids[0], "call_id": f"call-{conv_ids[0]}", "response": {"status": "approved"}},
+        {"conversation_id": conv_ids[1], "call_id": f"call-{conv_ids[1]}", "response": {"status": "approved"}},
+        {"conversation_id": conv_ids[1], "call_id": f"call-{conv_ids[1]}", "response": {"status": "approved"}},
+        {"conversation_id": conv_ids[1], "call_id": "unknown", "response": {}},
+        {"conversation_id": "missing", "call_id": "x", "response": {}},
+    ]})
+    data = response.json()
+    assert [r["status_code"] for r in data["results"]] == [200, 200, 409, 404, 404]
+    assert data["responses"][conv_ids[0]] == [{"role": "model", "text": "Aprobado"}]
+
+    resumed = {sid: msg for sid, msg in messages[2:]}
+    function_response = resumed[conv_ids[1]].parts[0].function_response
+    assert (function_response.id, function_response.name) == (f"call-{conv_ids[1]}", "escalate_conversation")
+    assert function_response.response == {"status": "approved"}
+    assert client.get(f"/conversations/{conv_ids[1]}").json()["pending_calls"] == {}
+
+    # Already resolved
+    again = client.post("/conversations/tool-calls:resolve", json={"resolutions": [
+        {"conversation_id": conv_ids[0], "call_id": f"call-{conv_ids[0]}", "response": {}},
+    ]})
+    assert again.json()["results"][0]["status_code"] == 404
+
+def test_change_feed_long_poll():
+    cursor = client.get("/changes", params={"cursor": 10**9, "limit": 1000}).json()["next_cursor"]
+    conv_id = client.post("/conversations/").json()["conversation_id"]
+    from small_agent.tools import AgentTools
+    AgentTools(session_states[conv_id]).collect_field("name", "Ana")
+    AgentTools(session_states[conv_id]).escalate_conversation("urgent", "x")
+
+    data = client.get("/changes", params={"cursor": cursor, "status": "ESCALATED"}).json()
+    assert [(e["type"], e["conversation_id"]) for e in data["events"]] == [("status_changed", conv_id)]
+    assert data["truncated"] is False
+
+    # Nothing new: returns empty after the wait
+    empty = client.get("/changes", params={"cursor": data["next_cursor"], "wait": 0.05}).json()
+    assert empty["events"] == [] and empty["next_cursor"] == data["next_cursor"]
+
+def test_list_conversations_by_status_and_field():
+    from small_agent.tools import AgentTools
+    conv_ids = [client.post("/conversations/").json()["conversation_id"] for _ in range(3)]
+    AgentTools(session_states[conv_ids[0]]).collect_field("email", "Lookup@Example.com")
+    AgentTools(session_states[conv_ids[1]]).collect_field("email", "lookup@example.com")
+    AgentTools(session_states[conv_ids[1]]).escalate_conversation("urgent", "x")
+
+    # Pages come from the index entries, without loading states from the store
+    with patch.object(session_states, "get", side_effect=AssertionError("listing loaded a state")):
+        by_email = client.get("/conversations", params={"field.email": "LOOKUP@example.com "}).json()
+    assert [c["conversation_id"] for c in by_email["conversations"]] == [conv_ids[1], conv_ids[0]]
+    assert by_email["conversations"][1]["collected_fields"] == {"email": "Lookup@Example.com"}
+    assert by_email["conversations"][1]["tenant_id"] == "default"
+
+    escalated = client.get("/conversations", params={"status": "ESCALATED", "field.email": "lookup@example.com"}).json()
+    assert [c["conversation_id"] for c in escalated["conversations"]] == [conv_ids[1]]
+    assert escalated["conversations"][0]["status"] == "ESCALATED"
+
+    # Most recently active first: conv_ids[0] changed after conv_ids[2] was created
+    first = client.get("/conversations", params={"status": "COLLECTING", "limit": 1}).json()
+    assert first["conversations"][0]["conversation_id"] == conv_ids[0]
+    second = client.get("/conversations", params={"status": "COLLECTING", "limit": 1, "cursor": first["next_cursor"]}).json()
+    assert second["conversations"][0]["conversation_id"] == conv_ids[2]
+
+    assert client.get("/conversations", params={"cursor": "garbage"}).status_code == 400
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from config.compiled import compile_config
+from config.models import BaseConfig, EscalationConfig, FieldConfig
+from small_agent.changefeed import ChangeFeed
+from small_agent.state import AgentState, ConversationStatus
+from small_agent.tools import AgentTools, add_change_listener, remove_change_listener
+
+def test_tools_publish_field_and_status_changes():
+    feed = ChangeFeed(capacity=100)
+    state = AgentState(conversation_id="c1", tenant_id="acme")
+    add_change_listener(feed.record)
+    try:
+        tools = AgentTools(state)
+        tools.collect_field("name", "Ana")
+        tools.collect_field("phone", "+54 11 4444 0000")
+        tools.collect_field("email", "ana@example.com")
+        tools.escalate_conversation("urgent", "needs a human")
+    finally:
+        remove_change_listener(feed.record)
+
+    events, cursor, truncated = feed.read()
+    assert [(e.type, e.status) for e in events] == [
+        ("field_collected", "COLLECTING"),
+        ("field_collected", "COLLECTING"),
+        ("field_collected", "COLLECTING"),
+        ("status_changed", "ESCALATED"),
+    ]
+    assert events[0].data == {"field": "name", "value": "Ana", "missing_fields": ["phone", "email"]}
+    assert events[2].data == {"field": "email", "value": "ana@example.com", "missing_fields": []}
+    assert events[3].data == {"previous_status": "COLLECTING", "reason": "urgent"}
+    assert state.status == ConversationStatus.ESCALATED
+    assert (cursor, truncated) == (4, False)
+
+    escalated, _, _ = feed.read(status="ESCALATED")
+    assert [e.seq for e in escalated] == [4]
+    assert feed.read(tenant_id="other")[0] == []
+    assert [e.seq for e in feed.read(event_type="status_changed")[0]] == [4]
+
+def test_last_field_leaves_status_and_asks_for_escalation():
+    state = AgentState(conversation_id="c1")
+    tools = AgentTools(state)
+    tools.collect_field("name", "Ana")
+    tools.collect_field("phone", "+54 11 4444 0000")
+    result = tools.collect_field("email", "ana@example.com")
+
+    assert result["is_complete"] and state.status == ConversationStatus.COLLECTING
+    progress = tools.config.render_progress(state.collected_fields, state.status.value)
+    assert "call 'escalate_conversation' now" in progress
+    assert "handed off" not in progress
+
+def test_completion_without_escalation_publishes_completed():
+    config = BaseConfig(fields=[FieldConfig(name="email", description="Email")], escalation=EscalationConfig(enabled=False))
+    feed = ChangeFeed(capacity=10)
+    state = AgentState(conversation_id="c1")
+    add_change_listener(feed.record)
+    try:
+        AgentTools(state, compile_config(config)).collect_field("email", "ana@example.com")
+    finally:
+        remove_change_listener(feed.record)
+
+    assert state.status == ConversationStatus.COMPLETED
+    events, _, _ = feed.read(status="COMPLETED")
+    assert [(e.type, e.data.get("previous_status")) for e in events] == [("field_collected", None), ("status_changed", "COLLECTING")]
+    progress = compile_config(config).render_progress(state.collected_fields, state.status.value)
+    assert "intake is complete" in progress and "escalate" not in progress
+
+def test_ring_buffer_overwrites_oldest_and_reports_truncation():
+    feed = ChangeFeed(capacity=3)
+    state = AgentState(conversation_id="c1")
+    for i in range(5):
+        feed.record(state, {"type": "field_collected", "field": f"f{i}"})
+
+    events, cursor, truncated = feed.read(cursor=0)
+    assert [e.seq for e in events] == [3, 4, 5]
+    assert (cursor, truncated) == (5, True)
+    events, cursor, truncated = feed.read(cursor=3)
+    assert [e.seq for e in events] == [4, 5]
+    assert (cursor, truncated) == (5, False)
+    # Cursor from before a restart
+    events, cursor, truncated = feed.read(cursor=99)
+    assert [e.seq for e in events] == [3, 4, 5] and truncated
+
+    # Filtered reads advance the cursor past skipped events
+    events, cursor, _ = feed.read(cursor=0, limit=10, event_type="status_changed")
+    assert events == [] and cursor == 5
+
+def test_wait_wakes_on_event_from_another_thread():
+    feed = ChangeFeed(capacity=10)
+
+    async def scenario():
+        assert await feed.wait(0, timeout=0.01) is False
+        waiter = asyncio.create_task(feed.wait(0, timeout=5))
+        await asyncio.sleep(0.01)
+        thread = threading.Thread(target=feed.record, args=(AgentState(conversation_id="c1"), {"type": "status_changed"}))
+        thread.start()
+        assert await waiter is True
+        thread.join()
+
+    asyncio.run(scenario())
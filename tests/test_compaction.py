@@ -0,0 +1,99 @@
+import asyncio
+import json
+from google.adk.events.event import Event
+from google.genai import types
+from config.compiled import compile_config
+from config.models import BaseConfig, CompactionConfig, FieldConfig
+from small_agent.compaction import compact_events, estimate_tokens, event_messages, is_summary
+from small_agent.state import AgentState
+from small_agent.store import PersistentSessionService, SQLiteConversationStore
+
+def _snapshot(**compaction):
+    return compile_config(BaseConfig(
+        fields=[
+            FieldConfig(name="name", description="User name"),
+            FieldConfig(name="email", description="User email"),
+        ],
+        compaction=CompactionConfig(**compaction),
+    ))
+
+def _conversation(turns):
+    events = []
+    for i in range(turns):
+        events.append(Event(author="user", content=types.Content(role="user", parts=[types.Part(text=f"user {i}")])))
+        events.append(Event(author="agent", content=types.Content(role="model", parts=[types.Part(text=f"agent {i}" + " lorem ipsum" * 20)])))
+    return events
+
+def test_short_conversations_are_left_alone():
+    assert compact_events(_conversation(3), AgentState(conversation_id="c1"), _snapshot(max_turns=5)) is None
+
+def test_compaction_keeps_recent_turns_and_summarizes_fields():
+    state = AgentState(conversation_id="c1", collected_fields={"name": "Ana"})
+    events = _conversation(6)
+
+    compacted = compact_events(events, state, _snapshot(max_turns=4, keep_recent_turns=2))
+
+    assert is_summary(compacted[0])
+    summary = compacted[0].content.parts[0].text
+    assert "name=Ana" in summary
+    assert "Still missing: email." in summary
+    # Cut lands on a user turn boundary
+    assert compacted[1:] == events[8:]
+    assert estimate_tokens(compacted) < estimate_tokens(events)
+
+def test_token_budget_triggers_compaction():
+    compacted = compact_events(_conversation(4), AgentState(conversation_id="c1"), _snapshot(max_tokens=5, keep_recent_turns=1))
+    assert len(compacted) == 3
+
+def test_compacted_session_is_persisted(tmp_path):
+    async def scenario():
+        store = SQLiteConversationStore(str(tmp_path / "c.db"), flush_interval=60)
+        service = PersistentSessionService(store)
+        session = await service.create_session(app_name="app", user_id="u", session_id="s1")
+        for event in _conversation(3):
+            await service.append_event(session, event)
+        store.flush()
+
+        state = AgentState(conversation_id="s1")
+        snapshot = _snapshot(max_turns=1, keep_recent_turns=1)
+        assert service.compact_session("app", "u", "s1", lambda events: compact_events(events, state, snapshot))
+        store.close()
+
+        reopened = SQLiteConversationStore(str(tmp_path / "c.db"), flush_interval=60)
+        restored = await PersistentSessionService(reopened).get_session(app_name="app", user_id="u", session_id="s1")
+        reopened.close()
+        return restored
+
+    restored = asyncio.run(scenario())
+    assert is_summary(restored.events[0])
+    assert [e.content.parts[0].text for e in restored.events[1:]] == ["user 2", "agent 2" + " lorem ipsum" * 20]
+
+def test_transcript_is_stored_once_next_to_the_events(tmp_path):
+    path = str(tmp_path / "c.db")
+    events = _conversation(3)
+
+    async def scenario():
+        store = SQLiteConversationStore(path, flush_interval=60)
+        service = PersistentSessionService(store)
+        session = await service.create_session(app_name="app", user_id="u", session_id="s1")
+        state = store["s1"] = AgentState(conversation_id="s1")
+        for event in events:
+            await service.append_event(session, event)
+        for role, text in event_messages(events):
+            state.add_message(role, text)
+        store.save(state)
+
+        snapshot = _snapshot(max_turns=1, keep_recent_turns=1)
+        assert service.compact_session("app", "u", "s1", lambda events: compact_events(events, state, snapshot))
+        store.close()
+        return state
+
+    state = asyncio.run(scenario())
+    assert state.archived_messages == 4
+    reopened = SQLiteConversationStore(path, flush_interval=60)
+    # Compacted messages live in the state row, the rest only in the event rows
+    [(data,)] = reopened._reader.execute("SELECT data FROM conversations").fetchall()
+    assert [m["text"] for m in json.loads(data)["messages"]] == ["user 0", events[1].content.parts[0].text, "user 1", events[3].content.parts[0].text]
+    assert reopened["s1"].messages == state.messages
+    assert len(reopened["s1"].messages) == 6
+    reopened.close()
@@ -5,6 +5,12 @@ import yaml
 from config.loader import load_config
 from config.models import BaseConfig
 
+@pytest.fixture(autouse=True)
+def restore_default_config():
+    yield
+    # Tests install their own configs; put the default back for other modules
+    load_config()
+
 def test_load_valid_config(tmp_path):
     # Create a temporary valid config file
     config_data = {
@@ -47,3 +53,53 @@ def test_default_config_fallback():
     # This might be hard to test without mocking os.path.exists if the file actually exists on disk.
     # We will skip this specific branch for now or mock it.
     pass
+
+def _write_config(path, triggers, email_regex=None):
+    fields = [{"name": "Name", "description": "Name"}, {"name": "email", "description": "Email", "validation_regex": email_regex}]
+    with open(path, "w") as f:
+        yaml.dump({"fields": fields, "escalation": {"triggers": triggers}}, f)
+
+def test_compiled_snapshot(tmp_path):
+    from config.loader import get_snapshot
+    config_file = tmp_path / "snapshot.yaml"
+    _write_config(config_file, ["help"], email_regex=r"^\S+@\S+$")
+
+    load_config(str(config_file))
+    snapshot = get_snapshot()
+
+    assert snapshot.required_fields == frozenset({"name", "email"})
+    assert snapshot.required_order == ("name", "email")
+    assert snapshot.search_patterns["email"].search("mail me at a@b.c").group(0) == "a@b.c"
+    assert "help" in snapshot.instruction
+    assert snapshot.missing_fields({"name": "Ana"}) == ["email"]
+
+def test_watcher_swaps_snapshot_on_change(tmp_path):
+    from config.loader import ConfigWatcher, get_snapshot
+    config_file = tmp_path / "watched.yaml"
+    _write_config(config_file, ["help"])
+    load_config(str(config_file))
+    before = get_snapshot()
+
+    watcher = ConfigWatcher(str(config_file))
+    assert watcher.check() is None
+
+    _write_config(config_file, ["human"])
+    # Same-second writes may keep the mtime; poll regardless
+    after = watcher.check(force=True)
+
+    assert after is get_snapshot()
+    assert after.version > before.version
+    assert after.config.escalation.triggers == ["human"]
+    # The previous snapshot is untouched for in-flight turns
+    assert before.config.escalation.triggers == ["help"]
+
+def test_invalid_reload_keeps_previous_snapshot(tmp_path):
+    from config.loader import get_snapshot, reload_config
+    config_file = tmp_path / "broken.yaml"
+    _write_config(config_file, ["help"])
+    load_config(str(config_file))
+    before = get_snapshot()
+
+    config_file.write_text("fields: [not, a, field]")
+    assert reload_config(str(config_file)) is None
+    assert get_snapshot() is before
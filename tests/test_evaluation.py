@@ -0,0 +1,52 @@
+import asyncio
+from config.compiled import compile_config
+from config.models import BaseConfig, FieldConfig, LLMConfig, OfflineLLMConfig, ScriptRule
+from small_agent.agent import session_states
+from small_agent.evaluation import Scenario, ResultWriter, load_scenarios, run_scenarios, summarize
+
+RULES = [
+    ScriptRule(match=r"(?i)urgente", call="escalate_conversation", args={"reason": "urgent", "summary": "{text}"}),
+    ScriptRule(match=r"(?i)soy (?P<name>\w+)", call="collect_field", args={"name": "name", "value": "{name}"}),
+    ScriptRule(on="tool", match="collect_field", reply="Gracias, {0}"),
+    ScriptRule(on="tool", match="escalate_conversation", reply="Te paso con una persona."),
+]
+
+def _snapshot():
+    return compile_config(BaseConfig(
+        fields=[FieldConfig(name="name", description="User name")],
+        llm=LLMConfig(provider="offline", offline=OfflineLLMConfig(rules=RULES)),
+    ))
+
+def test_scenarios_run_concurrently_with_isolated_state(tmp_path):
+    snapshot = _snapshot()
+    scenarios = [
+        Scenario(name=f"happy {i}", turns=["Hola", f"soy Ana{i}"], expect={"escalated": False, "keywords": ["gracias"]})
+        for i in range(5)
+    ] + [Scenario(name="urgent", turns=["Es urgente"], expect={"escalated": True, "fields": []})]
+    before = len(session_states)
+
+    with ResultWriter(str(tmp_path / "results.jsonl")) as writer:
+        results = asyncio.run(run_scenarios(scenarios, lambda: snapshot, concurrency=3, on_result=writer))
+
+    assert [r.name for r in results] == [s.name for s in scenarios]
+    assert all(r.passed for r in results), [r for r in results if not r.passed]
+    assert results[2].collected_fields == {"name": "Ana2"}
+    assert results[0].model_calls == 3
+    assert results[-1].escalated and results[-1].status == "ESCALATED"
+    # Nothing leaks into the API's conversation store
+    assert len(session_states) == before
+    assert len((tmp_path / "results.jsonl").read_text().splitlines()) == 6
+
+    summary = summarize(results)
+    assert summary["pass_rate"] == 1.0
+    assert summary["model_calls"] == sum(r.model_calls for r in results)
+
+def test_scenarios_load_from_yaml_and_jsonl(tmp_path):
+    yaml_file = tmp_path / "s.yaml"
+    yaml_file.write_text("scenarios:\n  - name: a\n    turns: [Hola]\n")
+    jsonl_file = tmp_path / "s.jsonl"
+    jsonl_file.write_text('{"name": "b", "turns": ["Hola"], "expect": {"escalated": true}}\n')
+
+    assert [s.name for s in load_scenarios(str(yaml_file))] == ["a"]
+    assert load_scenarios(str(jsonl_file))[0].expect.escalated is True
+    assert [s.name for s in load_scenarios("evals/scenarios.yaml")] == ["Happy Path", "Escalation Trigger"]
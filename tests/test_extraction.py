@@ -0,0 +1,55 @@
+import pytest
+from config.compiled import compile_config
+from config.loader import read_config
+from config.models import FieldConfig
+from small_agent.extraction import FieldExtractor, capture_note
+
+@pytest.fixture
+def extractor():
+    return FieldExtractor([
+        FieldConfig(name="name", description="User name"),
+        FieldConfig(name="phone", description="User phone", validation_regex=r"^\+?\d[\d\s().-]{5,}\d$"),
+        FieldConfig(name="email", description="User email", validation_regex=r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$"),
+    ])
+
+def test_extracts_fields_from_free_text(extractor):
+    found = extractor.extract("Soy Ana, mi correo es ana@example.com y mi tel +54 11 4444-5555.", {})
+    assert found == {"email": "ana@example.com", "phone": "+54 11 4444-5555"}
+
+def test_fields_without_regex_are_left_to_the_model(extractor):
+    assert extractor.extract("Juan Perez", {}) == {}
+
+def test_ambiguous_matches_are_skipped(extractor):
+    assert extractor.extract("ana@example.com o ana@work.com", {}) == {}
+
+def test_already_collected_fields_are_skipped(extractor):
+    assert extractor.extract("ana@example.com", {"email": "old@example.com"}) == {}
+
+@pytest.fixture
+def shipped():
+    return FieldExtractor.from_snapshot(compile_config(read_config()))
+
+@pytest.mark.parametrize("text", [
+    "Nací el 1990-03-12",
+    "Mi pedido es 12345678",
+    "Pagué 1.500.000 pesos",
+    "mi tel es 1990-03-12",
+    "mi tel es 12-03-1990",
+    "mi tel es 1.500.000.",
+    "mi tel es 12345",
+])
+def test_shipped_phone_rejects_numbers_that_are_not_phones(shipped, text):
+    assert "phone" not in shipped.extract(text, {})
+
+@pytest.mark.parametrize("text, phone", [
+    ("mi tel +54 11 4444-5555.", "+54 11 4444-5555"),
+    ("Mi teléfono es (011) 4444-5555", "(011) 4444-5555"),
+    ("whatsapp 11.4444.5555", "11.4444.5555"),
+])
+def test_shipped_phone_is_captured_with_a_cue(shipped, text, phone):
+    assert shipped.extract(text, {})["phone"] == phone
+
+def test_capture_note_lists_missing_fields():
+    note = capture_note({"email": "ana@example.com"}, {"is_complete": False, "missing_fields": ["name"]})
+    assert "email=ana@example.com" in note
+    assert "Still missing: name." in note
@@ -0,0 +1,77 @@
+import random
+from small_agent.indexes import ConversationIndex, _SortedKeys, decode_cursor, encode_cursor, normalize_value
+from small_agent.state import AgentState, ConversationStatus
+
+def make_state(cid, updated_at, status=ConversationStatus.COLLECTING, **fields):
+    return AgentState(conversation_id=cid, status=status, collected_fields=fields, updated_at=updated_at)
+
+def test_normalize_value():
+    assert normalize_value("  Ana@Example.COM ") == "ana@example.com"
+    assert normalize_value("+54 (11) 4444-0000") == normalize_value("541144440000") == "541144440000"
+    assert normalize_value("Ana   María") == "ana maría"
+
+def test_sorted_keys_stay_sorted_across_buckets():
+    keys = _SortedKeys(load=4)
+    values = [(float(random.randint(0, 50)), f"c{i}") for i in range(200)]
+    for key in values:
+        keys.add(key)
+    for key in values[::3]:
+        keys.remove(key)
+    expected = sorted(set(values) - set(values[::3]), reverse=True)
+    assert list(keys.descending()) == expected
+    assert len(keys) == len(expected)
+    assert list(keys.descending(before=expected[10])) == expected[11:]
+
+def test_query_by_status_and_field_with_pagination():
+    index = ConversationIndex(load=4)
+    for i in range(30):
+        status = ConversationStatus.ESCALATED if i % 3 == 0 else ConversationStatus.COLLECTING
+        index.update(make_state(f"c{i}", float(i), status, email=f"user{i % 5}@example.com"))
+
+    ids, cursor = index.query(status="ESCALATED", limit=4)
+    assert ids == ["c27", "c24", "c21", "c18"]
+    ids, cursor = index.query(status="ESCALATED", limit=4, cursor=cursor)
+    assert ids == ["c15", "c12", "c9", "c6"]
+    ids, cursor = index.query(status="ESCALATED", limit=4, cursor=cursor)
+    assert ids == ["c3", "c0"] and cursor is None
+
+    ids, cursor = index.query(fields={"email": " USER2@example.com"}, limit=3)
+    assert ids == ["c27", "c22", "c17"]
+    assert index.query(fields={"email": "user2@example.com"}, limit=3, cursor=cursor)[0] == ["c12", "c7", "c2"]
+    assert index.query(status="ESCALATED", fields={"email": "user2@example.com"})[0] == ["c27", "c12"]
+    assert index.query(fields={"email": "nobody@example.com"}) == ([], None)
+    assert index.count("ESCALATED") == 10
+
+def test_update_moves_entries_and_remove_drops_them():
+    index = ConversationIndex()
+    state = make_state("c1", 1.0, email="a@example.com")
+    index.update(state)
+    index.update(make_state("c2", 2.0))
+
+    state.collected_fields["email"] = "b@example.com"
+    state.status = ConversationStatus.ESCALATED
+    state.touch()
+    index.update(state)
+    assert index.query(fields={"email": "a@example.com"})[0] == []
+    assert index.query(fields={"email": "b@example.com"})[0] == ["c1"]
+    assert index.query()[0] == ["c1", "c2"]
+    assert index.query(status="COLLECTING")[0] == ["c2"]
+
+    index.remove("c1")
+    assert index.query()[0] == ["c2"]
+    assert index.query(status="ESCALATED")[0] == []
+    assert "c1" not in index
+
+def test_entries_describe_a_page_without_the_states():
+    index = ConversationIndex()
+    index.update(make_state("c1", 1.0, email="Ana@Example.com"))
+    index.update(make_state("c2", 2.0, ConversationStatus.ESCALATED))
+    index.remove("c2")
+
+    [entry] = index.entries(["c2", "c1"])
+    assert (entry.conversation_id, entry.status, entry.updated_at) == ("c1", "COLLECTING", 1.0)
+    assert entry.collected_fields == {"email": "Ana@Example.com"}
+
+def test_cursor_round_trip():
+    key = (1700000000.123456, "c-1")
+    assert decode_cursor(encode_cursor(key)) == key
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.adk.runners import Runner
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.genai import types
+from config.compiled import compile_config
+from config.models import BaseConfig, FieldConfig, LLMConfig, OfflineLLMConfig, ScriptRule
+from small_agent.agent import build_agent, session_states
+from small_agent.offline_llm import CassetteMiss, OfflineLlm
+
+RULES = [
+    ScriptRule(match=r"my name is (?P<name>\w+)", call="collect_field", args={"name": "name", "value": "{name}"}),
+    ScriptRule(on="tool", match="collect_field", reply="Thanks! What is your email?"),
+]
+
+def _request(text):
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=text)])])
+
+async def _generate(llm, text):
+    return [r async for r in llm.generate_content_async(_request(text))]
+
+def test_scripted_rules_drive_tool_calls():
+    llm = OfflineLlm(model="offline", settings=OfflineLLMConfig(rules=RULES))
+
+    [response] = asyncio.run(_generate(llm, "hi, my name is Ana"))
+    call = response.content.parts[0].function_call
+    assert (call.name, call.args) == ("collect_field", {"name": "name", "value": "Ana"})
+    assert response.usage_metadata.total_token_count > 0
+
+    [response] = asyncio.run(_generate(llm, "hello"))
+    assert response.content.parts[0].text == OfflineLLMConfig().default_reply
+
+def test_empty_scripted_reply():
+    llm = OfflineLlm(model="offline", settings=OfflineLLMConfig(default_reply=""))
+    [response] = asyncio.run(_generate(llm, "hello"))
+    assert response.content.parts[0].text == ""
+    assert response.usage_metadata.candidates_token_count == 0
+
+def test_record_then_replay(tmp_path):
+    cassette = str(tmp_path / "llm.jsonl")
+    recorder = OfflineLlm(model="offline", settings=OfflineLLMConfig(mode="record", cassette=cassette))
+    # Stand-in for the real model
+    recorder._inner = OfflineLlm(model="offline", settings=OfflineLLMConfig(default_reply="recorded answer"))
+    asyncio.run(_generate(recorder, "question"))
+
+    player = OfflineLlm(model="offline", settings=OfflineLLMConfig(mode="replay", cassette=cassette))
+    [response] = asyncio.run(_generate(player, "question"))
+    assert response.content.parts[0].text == "recorded answer"
+    with pytest.raises(CassetteMiss):
+        asyncio.run(_generate(player, "something else"))
+
+def test_agent_runs_offline():
+    snapshot = compile_config(BaseConfig(
+        fields=[FieldConfig(name="name", description="User name")],
+        llm=LLMConfig(provider="offline", offline=OfflineLLMConfig(rules=RULES)),
+    ))
+    agent = build_agent(lambda: snapshot)
+    assert isinstance(agent.model, OfflineLlm)
+
+    async def scenario():
+        service = InMemorySessionService()
+        await service.create_session(app_name="offline", user_id="u", session_id="offline-1")
+        runner = Runner(agent=agent, app_name="offline", session_service=service)
+        message = types.Content(role="user", parts=[types.Part(text="my name is Ana")])
+        return [e async for e in runner.run_async(user_id="u", session_id="offline-1", new_message=message)]
+
+    events = asyncio.run(scenario())
+    assert events[-1].content.parts[0].text == "Thanks! What is your email?"
+    assert session_states["offline-1"].collected_fields == {"name": "Ana"}
+    del session_states["offline-1"]
+
+def test_model_call_cap_stops_tool_loops():
+    looping = [
+        ScriptRule(match=".*", call="collect_field", args={"name": "name", "value": "Ana"}),
+        ScriptRule(on="tool", match="collect_field", call="collect_field", args={"name": "name", "value": "Ana"}),
+    ]
+    snapshot = compile_config(BaseConfig(
+        fields=[FieldConfig(name="name", description="User name")],
+        llm=LLMConfig(provider="offline", max_model_calls_per_turn=3, offline=OfflineLLMConfig(rules=looping)),
+    ))
+    agent = build_agent(lambda: snapshot)
+
+    async def scenario():
+        service = InMemorySessionService()
+        await service.create_session(app_name="offline", user_id="u", session_id="loop-1")
+        runner = Runner(agent=agent, app_name="offline", session_service=service)
+        message = types.Content(role="user", parts=[types.Part(text="hola")])
+        return [e async for e in runner.run_async(user_id="u", session_id="loop-1", new_message=message)]
+
+    events = asyncio.run(scenario())
+    calls = [e for e in events if e.get_function_calls()]
+    assert len(calls) == 3
+    assert events[-1].content.parts[0].text == snapshot.config.llm.model_call_cap_reply
+    assert events[-1].custom_metadata == {"model_call_cap": True}
+    del session_states["loop-1"]
+
+def test_pinned_snapshot_survives_a_mid_turn_reload():
+    from small_agent.agent import pinned_snapshot
+    from small_agent.state import AgentState
+    looping = [
+        ScriptRule(match=".*", call="collect_field", args={"name": "name", "value": "Ana"}),
+        ScriptRule(on="tool", match="collect_field", call="collect_field", args={"name": "name", "value": "Ana"}),
+    ]
+    fields = [FieldConfig(name="name", description="User name")]
+    pinned = compile_config(BaseConfig(
+        fields=fields, llm=LLMConfig(provider="offline", max_model_calls_per_turn=3, offline=OfflineLLMConfig(rules=looping)),
+    ))
+    reloaded = compile_config(BaseConfig(fields=fields, llm=LLMConfig(provider="offline", max_model_calls_per_turn=1)))
+    current = [pinned]
+    agent = build_agent(lambda: current[0])
+    state = session_states["pin-1"] = AgentState(conversation_id="pin-1")
+
+    async def scenario():
+        service = InMemorySessionService()
+        await service.create_session(app_name="offline", user_id="u", session_id="pin-1")
+        runner = Runner(agent=agent, app_name="offline", session_service=service)
+        message = types.Content(role="user", parts=[types.Part(text="hola")])
+        with pinned_snapshot(state, pinned):
+            current[0] = reloaded
+            return [e async for e in runner.run_async(user_id="u", session_id="pin-1", new_message=message)]
+
+    events = asyncio.run(scenario())
+    # The cap of the snapshot the turn started with still applies
+    assert len([e for e in events if e.get_function_calls()]) == 3
+    assert state._turn_snapshot is None
+    del session_states["pin-1"]
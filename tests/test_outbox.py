@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from config.models import OutboxConfig
+from small_agent.outbox import EscalationOutbox
+from small_agent.state import AgentState, ConversationStatus, TicketStatus
+from small_agent.tools import AgentTools, add_escalation_listener, remove_escalation_listener
+
+class StubSink:
+    """Local ticket system: records POSTed batches and replies with queued status codes."""
+
+    def __init__(self, statuses=()):
+        self.batches = []
+        self.statuses = list(statuses)
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                sink.batches.append(body["tickets"])
+                status = sink.statuses.pop(0) if sink.statuses else 200
+                reply = {"results": [
+                    {"ticket_id": t["ticket_id"], "external_id": f"EXT-{len(sink.batches)}-{i}"}
+                    for i, t in enumerate(body["tickets"])
+                ]} if status == 200 else {"error": "unavailable"}
+                data = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/tickets"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def sink():
+    stub = StubSink()
+    yield stub
+    stub.close()
+
+def make_outbox(tmp_path, sink, updates, **overrides):
+    config = OutboxConfig(
+        enabled=True, sink_url=sink.url, path=str(tmp_path / "outbox.db"),
+        flush_interval_seconds=0.05, backoff_base_seconds=0.01, backoff_max_seconds=0.02, **overrides,
+    )
+    return EscalationOutbox(config, on_update=lambda cid, ticket: updates.setdefault(cid, []).append(ticket))
+
+async def run_until(outbox, condition, timeout=5.0):
+    task = asyncio.create_task(outbox.run())
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not condition():
+            assert asyncio.get_running_loop().time() < deadline, "timed out"
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+def test_escalations_are_batched_and_deduplicated(tmp_path, sink):
+    updates = {}
+    outbox = make_outbox(tmp_path, sink, updates)
+    states = [AgentState(conversation_id=f"c{i}") for i in range(3)]
+    add_escalation_listener(outbox.enqueue)
+    try:
+        for state in states:
+            AgentTools(state).escalate_conversation("angry", "wants a refund")
+        # Escalating again queues nothing new
+        AgentTools(states[0]).escalate_conversation("angry", "again")
+    finally:
+        remove_escalation_listener(outbox.enqueue)
+
+    assert all(s.status == ConversationStatus.ESCALATED and s.ticket.status == TicketStatus.PENDING for s in states)
+    assert outbox.pending_count() == 3
+
+    asyncio.run(run_until(outbox, lambda: len(updates) == 3))
+    assert len(sink.batches) == 1
+    assert sorted(t["ticket_id"] for t in sink.batches[0]) == [f"support-ticket-c{i}" for i in range(3)]
+    ticket = updates["c0"][0]
+    assert ticket.status == TicketStatus.DELIVERED and ticket.external_id.startswith("EXT-1-")
+    assert outbox.pending_count() == 0
+    outbox.close()
+
+def test_transient_failures_are_retried_with_backoff(tmp_path, sink):
+    sink.statuses = [503, 503]
+    updates = {}
+    outbox = make_outbox(tmp_path, sink, updates)
+    outbox.enqueue(AgentState(conversation_id="c1"), {"ticket_id": "t1"})
+
+    asyncio.run(run_until(outbox, lambda: "c1" in updates))
+    assert len(sink.batches) == 3
+    assert updates["c1"][0].status == TicketStatus.DELIVERED
+    assert updates["c1"][0].attempts == 3
+    outbox.close()
+
+def test_gives_up_on_client_errors_and_after_max_attempts(tmp_path, sink):
+    sink.statuses = [400, 503, 503]
+    updates = {}
+    outbox = make_outbox(tmp_path, sink, updates, batch_size=1, max_attempts=2)
+    outbox.enqueue(AgentState(conversation_id="c1"), {"ticket_id": "t1"})
+    outbox.enqueue(AgentState(conversation_id="c2"), {"ticket_id": "t2"})
+
+    asyncio.run(run_until(outbox, lambda: len(updates) == 2))
+    assert updates["c1"][0].status == TicketStatus.FAILED and updates["c1"][0].attempts == 1
+    assert updates["c2"][0].status == TicketStatus.FAILED and updates["c2"][0].attempts == 2
+    assert outbox.get("t2")["last_error"].startswith("HTTP 503")
+    outbox.close()
+
+def test_undelivered_tickets_survive_a_restart(tmp_path, sink):
+    updates = {}
+    make_outbox(tmp_path, sink, updates).enqueue(AgentState(conversation_id="c1"), {"ticket_id": "t1"})
+
+    restarted = make_outbox(tmp_path, sink, updates)
+    asyncio.run(run_until(restarted, lambda: "c1" in updates))
+    assert updates["c1"][0].status == TicketStatus.DELIVERED
+    restarted.close()
@@ -0,0 +1,41 @@
+import pytest
+import yaml
+from unittest.mock import MagicMock
+from small_agent.registry import DEFAULT_TENANT, AgentRegistry, TenantRuntime, UnknownTenantError
+
+@pytest.fixture
+def tenants_dir(tmp_path):
+    for tenant in ("acme", "globex", "initech"):
+        with open(tmp_path / f"{tenant}.yaml", "w") as f:
+            yaml.dump({"persona": {"name": tenant.title()}, "fields": [{"name": "email", "description": "Email"}]}, f)
+    return tmp_path
+
+@pytest.fixture
+def registry(tenants_dir):
+    default = TenantRuntime(DEFAULT_TENANT, MagicMock(), MagicMock(), MagicMock())
+    return AgentRegistry(MagicMock(), "test_app", default, directory=str(tenants_dir), max_cached=2)
+
+def test_default_tenant(registry):
+    assert registry.get() is registry.default
+    assert registry.get(DEFAULT_TENANT) is registry.default
+
+def test_tenant_is_built_lazily_and_cached(registry):
+    acme = registry.get("acme")
+    assert acme.snapshot.config.persona.name == "Acme"
+    assert acme.runner.agent is acme.agent
+    assert registry.get("acme") is acme
+
+def test_least_recently_used_tenant_is_evicted(registry):
+    acme = registry.get("acme")
+    registry.get("globex")
+    registry.get("acme")
+    registry.get("initech")
+
+    assert list(registry._runtimes) == ["acme", "initech"]
+    assert registry.get("acme") is acme
+
+def test_unknown_tenant(registry):
+    assert not registry.exists("missing")
+    assert not registry.exists("../secrets")
+    with pytest.raises(UnknownTenantError):
+        registry.get("missing")
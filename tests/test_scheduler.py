@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from config.models import AdmissionConfig
+from small_agent.scheduler import AdmissionController, AdmissionRejected
+
+async def _hold(controller, flow, order, release):
+    async with controller.slot(flow):
+        order.append(flow)
+        await release.wait()
+
+def test_concurrency_cap_and_fair_order():
+    async def scenario():
+        controller = AdmissionController(AdmissionConfig(max_concurrent_turns=1))
+        order = []
+        gate = asyncio.Event()
+
+        first = asyncio.create_task(_hold(controller, "a", order, gate))
+        await asyncio.sleep(0)
+        # "a" queues two more before "b" arrives; "b" is still served before a's third turn
+        served = []
+
+        async def turn(flow):
+            async with controller.slot(flow):
+                served.append(flow)
+
+        tasks = [asyncio.create_task(turn(f)) for f in ("a", "a", "b")]
+        await asyncio.sleep(0)
+        assert order == ["a"]
+        assert controller._queued == 3
+
+        gate.set()
+        await asyncio.gather(first, *tasks)
+        return served
+
+    assert asyncio.run(scenario()) == ["a", "b", "a"]
+
+def test_weights_give_larger_share():
+    async def scenario():
+        controller = AdmissionController(AdmissionConfig(max_concurrent_turns=1, weights={"gold": 2.0}))
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(_hold(controller, "x", [], gate))
+        await asyncio.sleep(0)
+
+        served = []
+
+        async def turn(flow):
+            async with controller.slot(flow):
+                served.append(flow)
+
+        tasks = [asyncio.create_task(turn(f)) for f in ["free"] * 3 + ["gold"] * 4]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+        return served
+
+    served = asyncio.run(scenario())
+    # Within the first three slots, gold gets two for every one of free
+    assert served[:3].count("gold") == 2
+
+def test_queue_full_is_503():
+    async def scenario():
+        controller = AdmissionController(AdmissionConfig(max_concurrent_turns=1, max_queue=1))
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(_hold(controller, "a", [], gate))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("c")
+        gate.set()
+        await blocker
+        await waiting
+        controller.release()
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503
+
+def test_per_flow_limit_is_429():
+    async def scenario():
+        controller = AdmissionController(AdmissionConfig(max_concurrent_turns=1, max_queued_per_flow=1))
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(_hold(controller, "a", [], gate))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(controller.acquire("noisy"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("noisy")
+        # Another flow is still admitted to the queue
+        other = asyncio.create_task(controller.acquire("quiet"))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocker, waiting)
+        controller.release()
+        await other
+        controller.release()
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+def test_wait_deadline_is_503():
+    async def scenario():
+        controller = AdmissionController(AdmissionConfig(max_concurrent_turns=1, max_wait_seconds=0.01))
+        controller._avg_service_seconds = 0.0
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(_hold(controller, "a", [], gate))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("b")
+        assert controller._queued == 0
+        gate.set()
+        await blocker
+        return rejected.value, controller
+
+    rejected, controller = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert controller._active == 0
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from small_agent.startup import StartupTimer, parse_importtime
+
+def _run(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+def test_core_modules_import_without_adk():
+    loaded = _run(
+        "import sys, small_agent.state, small_agent.tools, config.loader; "
+        "print(sorted(m for m in ('google.adk', 'google.genai', 'small_agent.agent') if m in sys.modules))"
+    )
+    assert loaded == "[]"
+
+def test_importing_the_api_defers_app_and_services():
+    out = _run(
+        "import sys, small_agent.api as api; "
+        "print(api._initialized, 'app' in vars(api), 'runner' in vars(api), sorted(api.startup.phases)); "
+        "print(sorted(m for m in ('google.adk', 'google.genai', 'small_agent.agent', 'small_agent.store') if m in sys.modules)); "
+        "api.app; print(sorted(api.startup.phases)); "
+        "api.runner; print(api._initialized, sorted(api.startup.phases))"
+    )
+    imported, loaded, with_app, initialized = out.splitlines()
+    assert imported == "False False False []"
+    assert loaded == "[]"
+    assert with_app == "['create_app']"
+    assert initialized == "True ['config', 'create_app', 'root_agent', 'runner', 'services', 'store']"
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   json.decoder\n"
+        "import time:       300 |        420 | json\n"
+        "unrelated line\n"
+    )
+    assert parse_importtime(stderr) == [
+        {"module": "json.decoder", "self_us": 120, "cumulative_us": 120},
+        {"module": "json", "self_us": 300, "cumulative_us": 420},
+    ]
+
+def test_startup_timer_accumulates_phases():
+    timer = StartupTimer()
+    with timer.phase("a"):
+        pass
+    with timer.phase("a"):
+        pass
+    assert list(timer.phases) == ["a"] and timer.phases["a"] >= 0
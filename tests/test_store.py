@@ -0,0 +1,213 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+from google.adk.events.event import Event
+from google.genai import types
+from small_agent.state import AgentState, ConversationStatus
+from small_agent.store import InMemoryConversationStore, PersistentSessionService, SQLiteConversationStore
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "conversations.db")
+
+def test_in_memory_store_behaves_like_dict():
+    store = InMemoryConversationStore()
+    store["a"] = AgentState(conversation_id="a")
+
+    assert "a" in store
+    assert "b" not in store
+    assert store["a"] is store["a"]
+    assert list(store) == ["a"]
+
+    del store["a"]
+    assert len(store) == 0
+
+def test_sqlite_store_survives_reopen(db_path):
+    store = SQLiteConversationStore(db_path, flush_interval=60)
+    state = AgentState(conversation_id="c1")
+    store["c1"] = state
+    state.collected_fields["email"] = "ana@example.com"
+    state.status = ConversationStatus.ESCALATED
+    store.save(state)
+
+    # Unflushed writes are still visible through the store
+    assert store["c1"].collected_fields["email"] == "ana@example.com"
+    store.close()
+
+    reopened = SQLiteConversationStore(db_path, flush_interval=60)
+    restored = reopened["c1"]
+    assert restored.status == ConversationStatus.ESCALATED
+    assert restored.collected_fields == {"email": "ana@example.com"}
+    reopened.close()
+
+def test_sqlite_store_coalesces_writes(db_path):
+    store = SQLiteConversationStore(db_path, flush_interval=60)
+    state = AgentState(conversation_id="c1")
+    store["c1"] = state
+    for i in range(10):
+        state.messages.append({"role": "user", "text": str(i)})
+        store.save(state)
+
+    assert len(store._pending.states) == 1
+    store.flush()
+    assert len(store._pending) == 0
+    store.close()
+
+def test_session_service_rehydrates_events(db_path):
+    async def scenario():
+        store = SQLiteConversationStore(db_path, flush_interval=60)
+        service = PersistentSessionService(store)
+        session = await service.create_session(app_name="app", user_id="u", session_id="s1")
+        event = Event(author="user", content=types.Content(role="user", parts=[types.Part(text="Hola")]))
+        await service.append_event(session, event)
+        store.close()
+
+        reopened = SQLiteConversationStore(db_path, flush_interval=60)
+        restored = await PersistentSessionService(reopened).get_session(app_name="app", user_id="u", session_id="s1")
+        reopened.close()
+        return restored
+
+    restored = asyncio.run(scenario())
+    assert restored is not None
+    assert [e.content.parts[0].text for e in restored.events] == ["Hola"]
+
+def test_lru_eviction_beyond_cap():
+    from config.models import SessionLimitsConfig
+    store = InMemoryConversationStore(SessionLimitsConfig(max_conversations=2))
+    evicted = []
+    store.add_eviction_listener(lambda cid, reason: evicted.append((cid, reason)))
+
+    store["a"] = AgentState(conversation_id="a")
+    store["b"] = AgentState(conversation_id="b")
+    store["a"]  # touch: "b" is now least recently used
+    store["c"] = AgentState(conversation_id="c")
+
+    assert evicted == [("b", "lru")]
+    assert set(store) == {"a", "c"}
+
+def test_pinned_conversation_is_not_evicted():
+    from config.models import SessionLimitsConfig
+    store = InMemoryConversationStore(SessionLimitsConfig(max_conversations=1))
+    store["a"] = AgentState(conversation_id="a")
+    with store.pinned("a"):
+        store["b"] = AgentState(conversation_id="b")
+        assert "a" in store
+    # The cap is exceeded rather than evicting a conversation mid-turn
+    assert set(store) == {"a", "b"}
+
+def test_sweep_expires_terminal_conversations_first():
+    from config.models import SessionLimitsConfig
+    store = InMemoryConversationStore(SessionLimitsConfig(idle_ttl_seconds=3600, terminal_ttl_seconds=0))
+    store["open"] = AgentState(conversation_id="open")
+    store["done"] = AgentState(conversation_id="done", status=ConversationStatus.ESCALATED)
+
+    assert store.sweep() == 1
+    assert set(store) == {"open"}
+
+def test_membership_check_does_not_load_spilled_states(db_path):
+    from config.models import SessionLimitsConfig
+    store = SQLiteConversationStore(db_path, flush_interval=60, limits=SessionLimitsConfig(max_conversations=1))
+    store["a"] = AgentState(conversation_id="a")
+    store["b"] = AgentState(conversation_id="b")
+    store.flush()
+
+    assert "a" in store and "missing" not in store
+    assert list(store._resident) == ["b"] and store.resident_count == 1
+    del store["a"]
+    assert "a" not in store and list(store._resident) == ["b"]
+    store.close()
+
+def test_lru_eviction_spills_to_sqlite(db_path):
+    from config.models import SessionLimitsConfig
+    store = SQLiteConversationStore(db_path, flush_interval=60, limits=SessionLimitsConfig(max_conversations=1))
+    store["a"] = AgentState(conversation_id="a", collected_fields={"name": "Ana"})
+    store["b"] = AgentState(conversation_id="b")
+
+    assert list(store._resident) == ["b"]
+    # Evicted conversation is reloaded from disk on access
+    assert store["a"].collected_fields == {"name": "Ana"}
+    store.close()
+
+class _FailingWriter:
+    """Wraps the writer connection and fails the next ``failures`` conversation writes."""
+
+    def __init__(self, db, failures=1):
+        self.db = db
+        self.failures = failures
+
+    def executemany(self, sql, rows):
+        if self.failures and sql.startswith("INSERT OR REPLACE INTO conversations"):
+            self.failures -= 1
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.db.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+def test_failed_flush_requeues_the_batch(db_path):
+    store = SQLiteConversationStore(db_path, flush_interval=60)
+    store._writer = _FailingWriter(store._writer)
+    store["a"] = AgentState(conversation_id="a", collected_fields={"name": "Ana"})
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+
+    # Still visible, and retried together with writes made since
+    assert store["a"].collected_fields == {"name": "Ana"}
+    store["b"] = AgentState(conversation_id="b")
+    del store["a"]
+    store.flush()
+    assert len(store._pending) == 0
+    assert {row[0] for row in store._reader.execute("SELECT id FROM conversations")} == {"b"}
+    store.close()
+
+def test_flush_thread_survives_a_failed_write(db_path):
+    store = SQLiteConversationStore(db_path, flush_interval=0.01)
+    store._writer = _FailingWriter(store._writer, failures=2)
+    store["a"] = AgentState(conversation_id="a")
+
+    deadline = time.monotonic() + 5
+    while store._writer.failures or len(store._pending) or len(store._inflight):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert store._flusher.is_alive()
+    assert store._reader.execute("SELECT id FROM conversations").fetchall() == [("a",)]
+    store.close()
+
+def test_sqlite_index_queries_flushed_and_pending_states(db_path):
+    store = SQLiteConversationStore(db_path, flush_interval=60)
+    for i in range(6):
+        status = ConversationStatus.ESCALATED if i % 2 else ConversationStatus.COLLECTING
+        store[f"c{i}"] = AgentState(conversation_id=f"c{i}", status=status, updated_at=float(i), collected_fields={"email": f"U{i % 3}@x.com"})
+    store.flush()
+    # Unflushed writes override what is on disk
+    store["c6"] = AgentState(conversation_id="c6", updated_at=6.0, collected_fields={"email": "u0@x.com"})
+    store["c0"] = AgentState(conversation_id="c0", updated_at=7.0, status=ConversationStatus.ESCALATED)
+    del store["c5"]
+
+    entries, cursor = store.query_index(status="ESCALATED", limit=2)
+    assert [e.conversation_id for e in entries] == ["c0", "c3"]
+    entries, cursor = store.query_index(status="ESCALATED", limit=2, cursor=cursor)
+    assert [e.conversation_id for e in entries] == ["c1"] and cursor is None
+    [entry, _] = store.query_index(fields={"email": " u0@X.com"})[0]
+    assert (entry.conversation_id, entry.collected_fields) == ("c6", {"email": "u0@x.com"})
+    store.close()
+
+    # After a restart the index is read from disk, not rebuilt from the states
+    reopened = SQLiteConversationStore(db_path, flush_interval=60)
+    entries, _ = reopened.query_index(fields={"email": "u0@x.com"})
+    assert [(e.conversation_id, e.collected_fields, e.updated_at) for e in entries] == [("c6", {"email": "u0@x.com"}, 6.0), ("c3", {"email": "U0@x.com"}, 3.0)]
+    assert not reopened._resident
+    reopened.close()
+
+def test_sqlite_index_covers_files_written_before_it(db_path):
+    db = sqlite3.connect(db_path)
+    db.execute("CREATE TABLE conversations (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+    state = AgentState(conversation_id="old", updated_at=1.0, collected_fields={"name": "Ana"})
+    db.execute("INSERT INTO conversations VALUES (?, ?)", ("old", state.model_dump_json()))
+    db.commit()
+    db.close()
+
+    store = SQLiteConversationStore(db_path, flush_interval=60)
+    assert [e.conversation_id for e in store.query_index(fields={"name": "ana"})[0]] == ["old"]
+    store.close()
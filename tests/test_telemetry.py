@@ -0,0 +1,31 @@
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from config.models import AdmissionConfig, TelemetryConfig
+from small_agent.scheduler import AdmissionController
+from small_agent.telemetry import TracingMiddleware, flow_digest, setup_telemetry, shutdown_telemetry, span
+
+def test_file_exporter_records_nested_spans_without_api_keys(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    setup_telemetry(TelemetryConfig(enabled=True, exporter="file", file_path=str(path)))
+
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        async with AdmissionController(AdmissionConfig()).slot("sk-secret-key"):
+            with span("lookup", item=item_id):
+                return {"id": item_id}
+
+    assert TestClient(app).get("/items/42").json() == {"id": "42"}
+    shutdown_telemetry()
+
+    spans = {s["name"]: s for s in map(json.loads, path.read_text().splitlines())}
+    request = spans["GET /items/{item_id}"]
+    assert request["attributes"]["http.response.status_code"] == 200
+    assert spans["lookup"]["parent_id"] == request["span_id"]
+    assert spans["lookup"]["attributes"] == {"item": "42"}
+    # The fair-queueing flow may be an API key; spans only carry its digest
+    assert spans["admission.wait"]["attributes"] == {"flow.hash": flow_digest("sk-secret-key")}
+    assert "sk-secret-key" not in path.read_text()
@@ -0,0 +1,29 @@
+from small_agent.state import AgentState
+from small_agent.transcript import Transcript
+
+
+def test_transcript_reads_like_a_list_of_messages():
+    transcript = Transcript()
+    transcript.add("user", "Olá, preciso de ajuda")
+    transcript.add("model", "Claro!")
+
+    assert len(transcript) == 2
+    assert transcript[0] == {"role": "user", "text": "Olá, preciso de ajuda"}
+    assert transcript[-1]["role"] == "model"
+    assert transcript[1:] == [{"role": "model", "text": "Claro!"}]
+    assert transcript == [
+        {"role": "user", "text": "Olá, preciso de ajuda"},
+        {"role": "model", "text": "Claro!"},
+    ]
+
+
+def test_agent_state_round_trips_transcript():
+    state = AgentState(conversation_id="c1")
+    state.add_message("user", "hi")
+    state.messages = [{"role": "user", "text": "hi"}, {"role": "model", "text": "hello"}]
+    assert isinstance(state.messages, Transcript)
+
+    restored = AgentState.model_validate_json(state.model_dump_json())
+    assert isinstance(restored.messages, Transcript)
+    assert restored.messages == state.messages
+    assert state.model_dump()["messages"][1] == {"role": "model", "text": "hello"}
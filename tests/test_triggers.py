@@ -0,0 +1,29 @@
+from small_agent.triggers import TriggerMatcher, normalize
+
+TRIGGERS = ["urgent", "refund request", "complex billing issue", "complex_question", "reembolso rápido"]
+
+def test_normalize_strips_case_accents_and_separators():
+    assert normalize("  Reembolso RÁPIDO!! ") == "reembolso rapido"
+    assert normalize("complex_question") == "complex question"
+
+def test_matches_multiple_triggers_in_one_pass():
+    matcher = TriggerMatcher(TRIGGERS)
+    assert matcher.find_all("Tengo un Refund-Request URGENTE") == ["refund request", "urgent"]
+
+def test_matches_accent_insensitive():
+    matcher = TriggerMatcher(TRIGGERS)
+    assert matcher.find("quiero un reembolso rapido") == "reembolso rápido"
+    assert matcher.find("tengo una complex question") == "complex_question"
+
+def test_trigger_must_start_at_word_boundary():
+    matcher = TriggerMatcher(TRIGGERS)
+    assert matcher.find("the insurgents") is None
+
+def test_overlapping_triggers():
+    matcher = TriggerMatcher(["billing", "complex billing issue", "issue"])
+    assert matcher.find_all("a complex billing issue") == ["billing", "complex billing issue", "issue"]
+
+def test_scales_to_many_triggers():
+    matcher = TriggerMatcher([f"trigger {i}" for i in range(500)] + ["urgent"])
+    assert matcher.find("this is urgent") == "urgent"
+    assert matcher.find("nothing to see here") is None
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from small_agent.turns import IdempotencyKeyReused, TurnCoordinator
+
+def test_turns_for_one_conversation_do_not_overlap():
+    async def scenario():
+        coordinator = TurnCoordinator()
+        active = []
+        overlaps = []
+
+        async def turn():
+            active.append(1)
+            overlaps.append(len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+        await asyncio.gather(*(coordinator.run("c1", None, turn) for _ in range(5)))
+        return overlaps, coordinator
+
+    overlaps, coordinator = asyncio.run(scenario())
+    assert max(overlaps) == 1
+    assert coordinator._locks == {}
+
+def test_different_conversations_run_concurrently():
+    async def scenario():
+        coordinator = TurnCoordinator()
+        started = asyncio.Event()
+
+        async def first():
+            await asyncio.wait_for(started.wait(), timeout=1)
+
+        async def second():
+            started.set()
+
+        await asyncio.gather(coordinator.run("c1", None, first), coordinator.run("c2", None, second))
+
+    asyncio.run(scenario())
+
+def test_retry_attaches_to_inflight_turn_and_then_hits_cache():
+    async def scenario():
+        coordinator = TurnCoordinator()
+        calls = []
+
+        async def turn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return ["reply"]
+
+        results = await asyncio.gather(
+            coordinator.run("c1", "key-1", turn),
+            coordinator.run("c1", "key-1", turn),
+        )
+        cached = await coordinator.run("c1", "key-1", turn)
+        return calls, results, cached
+
+    calls, results, cached = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results == [["reply"], ["reply"]]
+    assert cached == ["reply"]
+
+def test_failed_turn_is_not_cached():
+    async def scenario():
+        coordinator = TurnCoordinator()
+        calls = []
+
+        async def turn():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("model error")
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await coordinator.run("c1", "key-1", turn)
+        return await coordinator.run("c1", "key-1", turn), calls
+
+    result, calls = asyncio.run(scenario())
+    assert result == "ok"
+    assert len(calls) == 2
+
+def test_reused_key_with_another_body_is_rejected():
+    async def scenario():
+        coordinator = TurnCoordinator()
+
+        async def turn():
+            await asyncio.sleep(0.01)
+            return "reply"
+
+        first = asyncio.create_task(coordinator.run("c1", "key-1", turn, "hash-a"))
+        await asyncio.sleep(0)
+        with pytest.raises(IdempotencyKeyReused):
+            await coordinator.run("c1", "key-1", turn, "hash-b")
+        await first
+        with pytest.raises(IdempotencyKeyReused):
+            await coordinator.run("c1", "key-1", turn, "hash-b")
+        # Keys are scoped to the conversation
+        return await coordinator.run("c2", "key-1", turn, "hash-b")
+
+    assert asyncio.run(scenario()) == "reply"